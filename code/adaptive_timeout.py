@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    Adaptive per-query timeouts for `codeql database analyze`, instead of one global `--timeout=25` under
+    which slow queries silently produce no rows.
+    It performs the following tasks:
+    - Resolves the suite into its queries (cached by `query_cache.py`) and groups them by their timeout
+      budget: the global timeout, or a larger budget learned for the query in earlier runs.
+    - Analyzes the existing database once per budget group, with the evaluator log enabled.
+    - Detects the queries that timed out from the evaluator log (see `evaluator_log.py`) and re-runs just
+      those queries against the same database with a larger budget, until they complete or reach
+      `max_timeout`.
+    - Merges the rows of every run into one results CSV.
+    - Records the evaluation time of every query in a history JSON file and derives its budget from it,
+      so the next run gives slow queries enough time from the start.
+USAGE:
+    analyze_with_adaptive_timeout(codeqldb_path, qls_path, output_csv, history_path, cache_root)
+    Or pass `timeout_history` to `run_codeql_analysis` of `codeql_analyze.py`.
+DEPENDENCIES:
+    - Python 3.x
+    - CodeQL CLI
+    - codeql_analyze.py, evaluator_log.py, query_cache.py, records.py and rollup_cache.py in the same folder
+"""
+
+import math
+import os
+import subprocess
+import tempfile
+
+import codeql_analyze
+import evaluator_log
+import query_cache
+import rollup_cache
+from records import merge_csv_rows, write_csv_rows
+
+# Budget = observed evaluation time times this margin
+BUDGET_MARGIN = 1.5
+
+
+def query_budget(history, query, timeout):
+    """
+    The timeout budget of a query in seconds: the global timeout or the budget learned from history
+    """
+    return max(timeout, history.get(query, {}).get('budget', timeout))
+
+
+def update_history(history, rows, budget, timeout, max_timeout, factor=4):
+    """
+    Record the timing rows of one run in the history
+    A timed-out query keeps its truncated time as a lower bound until a retry completes and records its
+    real time.
+    :param budget: the --timeout of the run
+    """
+    for row in rows:
+        entry = history.setdefault(row['path'], {'millis': 0, 'budget': timeout, 'timeouts': 0})
+        if row['timed_out']:
+            entry['timeouts'] += 1
+            entry['millis'] = max(entry['millis'], row['millis'])
+            entry['budget'] = max(entry['budget'], min(max_timeout, budget * factor))
+        else:
+            entry['millis'] = row['millis']
+            entry['budget'] = max(timeout, min(max_timeout, math.ceil(row['millis'] * BUDGET_MARGIN / 1000)))
+
+
+def analyze_queries(codeqldb_path, queries, budget, work_dir, threads=None, ram=None, compilation_cache=None):
+    """
+    Analyze the database with a list of queries and one timeout
+    :return: (part CSV path or None, timing rows of the run)
+    """
+    name = f"timeout_{budget}"
+    suite_path = query_cache.write_query_list_suite(queries, os.path.join(work_dir, name + '.qls'),
+                                                    f"Queries with a {budget}s budget")
+    part_csv = os.path.join(work_dir, name + '.csv')
+    log_path = os.path.join(work_dir, name + '_evaluator_log.json')
+    for path in (part_csv, log_path):
+        if os.path.exists(path):
+            os.remove(path)
+    try:
+        codeql_analyze.analyze_database(codeqldb_path, suite_path, part_csv, threads, ram, budget, compilation_cache,
+                                        extra_args=[f'--evaluator-log={log_path}'])
+    except subprocess.CalledProcessError as e:
+        print(f"CodeQL analysis with --timeout={budget} reported an error: {e}")
+    rows = []
+    if os.path.exists(log_path):
+        summary_path = evaluator_log.summarize_evaluator_log(log_path)
+        rows = evaluator_log.query_timing_table(summary_path, log_path, queries)
+    else:
+        # Without a log, every query of a failed run counts as timed out
+        rows = [evaluator_log.timing_row(query, timed_out=not os.path.exists(part_csv)) for query in queries]
+    saved_csv = part_csv + '.done'
+    if os.path.exists(part_csv):
+        os.replace(part_csv, saved_csv)
+        return saved_csv, rows
+    return None, rows
+
+
+def analyze_with_adaptive_timeout(codeqldb_path, qls_path, output_csv, history_path, cache_root, timeout=25,
+                                  max_timeout=600, factor=4, threads=None, ram=None, compilation_cache=None,
+                                  report_csv=None):
+    """
+    Analyze a database with per-query timeout budgets and retry timed-out queries with larger budgets
+    :param report_csv: optional per-query timing report of the last attempt of every query (see evaluator_log.py)
+    :return: list of queries that still timed out at max_timeout
+    """
+    cache_dir = query_cache.suite_cache_dir(qls_path, cache_root)
+    queries = query_cache.resolve_suite(qls_path, cache_dir)
+    history = rollup_cache.load_cache(history_path)
+
+    pending = {}
+    for query in queries:
+        pending.setdefault(query_budget(history, query, timeout), []).append(query)
+    part_csvs = []
+    gave_up = []
+    final = {}
+    retried = 0
+    with tempfile.TemporaryDirectory(prefix='codeql_timeout_') as work_dir:
+        while pending:
+            budget = min(pending)
+            batch = pending.pop(budget)
+            part_csv, rows = analyze_queries(codeqldb_path, batch, budget, work_dir, threads, ram, compilation_cache)
+            if part_csv:
+                part_csvs.append(part_csv)
+            update_history(history, rows, budget, timeout, max_timeout, factor)
+            final.update((row['path'], row) for row in rows)
+            timed_out = [row['path'] for row in rows if row['timed_out']]
+            if not timed_out:
+                continue
+            if budget >= max_timeout:
+                gave_up.extend(timed_out)
+                continue
+            next_budget = min(max_timeout, budget * factor)
+            print(f"{len(timed_out)} queries timed out with --timeout={budget}; retrying with --timeout={next_budget}")
+            retried += len(timed_out)
+            pending.setdefault(next_budget, []).extend(timed_out)
+        write_csv_rows(output_csv, merge_csv_rows(part_csvs))
+    rollup_cache.save_cache(history_path, history)
+    if report_csv:
+        evaluator_log.save_timing_report(list(final.values()), report_csv)
+
+    if retried:
+        print(f"Retried {retried} timed-out queries with larger budgets")
+    if gave_up:
+        print(f"Queries still timed out at --timeout={max_timeout} ({len(gave_up)}): {', '.join(gave_up)}")
+    return gave_up
+
+
+if __name__ == "__main__":
+    codeqldb_path = r'your path to the CodeQL database' # Replace with your directory path
+    qls_path = r'your path to the CodeQL query file' # Replace with your directory path
+    output_csv = r'your path to the output CSV file' # Replace with your file path
+    history_path = r'your path to the timeout history JSON file' # Replace with your file path
+    cache_root = r'your path to the query cache folder' # Replace with your directory path
+
+    analyze_with_adaptive_timeout(codeqldb_path, qls_path, output_csv, history_path, cache_root)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    This script attributes every CodeQL alert of the generate tree to the code the assistant inserted.
+    It performs the following tasks:
+    - Loads the alerts of every `codeql_analysis_results.csv` below a root folder into one `AlertTable`
+      (see `records.py`), remembering the group folder of every alert (e.g. `GPT4/raw`).
+    - Computes the inserted span of every file once from its filename (`scenario_meta.py`).
+    - Joins all alerts against the spans of their files with vectorized NumPy interval logic and labels them:
+      - inserted: the alert's lines overlap the inserted span;
+      - adjacent: the alert starts or ends within `margin` lines of the span (e.g. an unused import whose
+        use was removed, or a statement broken by the inserted lines);
+      - pre-existing: every other alert, including alerts of files without an inserted span.
+    - Writes the labeled alerts and prints the label counts per group.
+USAGE:
+    python alert_attribution.py <generate root> [output CSV] [margin]
+DEPENDENCIES:
+    - Python 3.x
+    - numpy
+    - records.py, results_store.py and scenario_meta.py in the same folder
+NOTES:
+    - Adjacency is a line-distance approximation of "depends on the inserted lines"; alerts whose cause is
+      further away (e.g. a use of an inserted name many lines below) are labeled pre-existing.
+"""
+
+import csv
+import os
+import sys
+
+import numpy as np
+
+from records import AlertTable, read_csv_rows
+from results_store import find_result_csvs, tool_and_group
+from scenario_meta import parse_scenario_name
+
+INSERTED, ADJACENT, PRE_EXISTING = 0, 1, 2
+LABELS = ('inserted', 'adjacent', 'pre-existing')
+
+
+def load_alerts(root):
+    """
+    Load the alerts of every results CSV below root
+    :return: (AlertTable, list of group names, np.ndarray of the group index of every alert)
+    """
+    table = AlertTable()
+    groups, counts = [], []
+    for csv_path in find_result_csvs(root):
+        tool, group = tool_and_group(root, csv_path)
+        before = len(table)
+        table.extend(read_csv_rows(csv_path))
+        groups.append(f"{tool}/{group}" if tool else group)
+        counts.append(len(table) - before)
+    group_index = np.repeat(np.arange(len(groups)), counts)
+    return table, groups, group_index
+
+
+def inserted_spans(paths):
+    """
+    Inserted span (first line, last line) of every path; (0, -1), an empty span, if the name has no metadata
+    :return: (first lines, last lines) arrays aligned to paths
+    """
+    first = np.zeros(len(paths), dtype=np.int64)
+    last = np.full(len(paths), -1, dtype=np.int64)
+    for i, path in enumerate(paths):
+        meta = parse_scenario_name(path)
+        if meta is not None:
+            _, num_lines, start_line, _ = meta
+            # automate_vscode_interaction treats start line 0 as line 1
+            first[i] = max(start_line, 1)
+            last[i] = first[i] + num_lines - 1
+    return first, last
+
+
+def attribute_alerts(table, margin=2):
+    """
+    Label every alert of the table as inserted, adjacent or pre-existing
+    :return: np.ndarray of INSERTED / ADJACENT / PRE_EXISTING labels
+    """
+    path_codes = np.frombuffer(table.codes('path'), dtype=np.uint32).astype(np.int64)
+    start = np.frombuffer(table.codes('start_line'), dtype=np.int32)
+    end = np.frombuffer(table.codes('end_line'), dtype=np.int32)
+    first, last = inserted_spans(table.pools['path'].strings)
+    first, last = first[path_codes], last[path_codes]
+    has_span = last >= first
+
+    inserted = has_span & (start <= last) & (end >= first)
+    adjacent = has_span & ~inserted & (start <= last + margin) & (end >= first - margin)
+    labels = np.full(len(start), PRE_EXISTING, dtype=np.int8)
+    labels[adjacent] = ADJACENT
+    labels[inserted] = INSERTED
+    return labels
+
+
+def label_counts(group_index, labels, n_groups):
+    """
+    Count labels per group
+    :return: (n_groups x 3) array
+    """
+    flat = np.bincount(group_index * len(LABELS) + labels, minlength=n_groups * len(LABELS))
+    return flat.reshape(n_groups, len(LABELS))
+
+
+def write_attribution(table, groups, group_index, labels, output_csv):
+    """
+    Write every alert with its group and label
+    """
+    names, paths = table.column('name'), table.column('path')
+    start, end = table.column('start_line'), table.column('end_line')
+    with open(output_csv, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['group', 'path', 'name', 'start_line', 'end_line', 'label'])
+        for i in range(len(table)):
+            writer.writerow([groups[group_index[i]], paths[i], names[i], start[i], end[i], LABELS[labels[i]]])
+
+
+def run_attribution(root, output_csv, margin=2):
+    """
+    Attribute every alert below root and print the label counts per group
+    :return: dict of group -> {label: count}
+    """
+    table, groups, group_index = load_alerts(root)
+    labels = attribute_alerts(table, margin)
+    write_attribution(table, groups, group_index, labels, output_csv)
+    counts = label_counts(group_index, labels, len(groups))
+    print(f"{'group':30} " + ' '.join(f"{label:>12}" for label in LABELS))
+    for group, row in zip(groups, counts):
+        print(f"{group:30} " + ' '.join(f"{count:>12}" for count in row))
+    print(f"{len(table)} attributed alerts saved to {output_csv}")
+    return {group: dict(zip(LABELS, row.tolist())) for group, row in zip(groups, counts)}
+
+
+if __name__ == "__main__":
+    generate_root = sys.argv[1] if len(sys.argv) > 1 else r'your path to the generate folder' # Replace with your directory path
+    output_csv = sys.argv[2] if len(sys.argv) > 2 else os.path.join(generate_root, 'alert_attribution.csv')
+    margin = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    if not os.path.exists(generate_root):
+        print(f"Directory {generate_root} does not exist.")
+        exit(1)
+
+    run_attribution(generate_root, output_csv, margin)
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    A content-addressed cache of CodeQL alerts, so that byte-identical files (unchanged scenarios, failed
+    generations that echo their input, re-runs) are analyzed only once across groups and models.
+    It performs the following tasks:
+    - Hashes every .py file of the given folders (SHA-256 of the content).
+    - Looks each hash up in a cache keyed by file hash, query suite hash and CodeQL version.
+    - Stages one copy of every uncached file, builds a single database over them and analyzes it.
+    - Stores the alerts of every newly analyzed file in the cache, including files without alerts.
+    - Writes each folder's `codeql_analysis_results.csv` from the cached alerts.
+USAGE:
+    - Update the paths in the `__main__` section, or call
+      `run_cached_analysis(folders, staging_root, codeqldb_path, qls_path, cache_dir)`.
+DEPENDENCIES:
+    - Python 3.x
+    - CodeQL CLI
+    - codeql_analyze.py, codeql_combined.py, codeql_scheduler.py and records.py in the same folder
+NOTES:
+    - The suite's queries are treated as per-file: the alerts of a file only depend on its content and name.
+      Staged files keep their file name, in a directory named after their hash.
+    - The cache is a directory of small JSON files, `<cache_dir>/<suite and version key>/<hash[:2]>/<hash>.json`.
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+
+import codeql_analyze
+from codeql_combined import stage_files
+from codeql_scheduler import find_group_folders
+from records import read_csv_rows, rewrite_message_links, write_csv_rows
+
+
+def file_digest(path):
+    """
+    SHA-256 of the content of a file
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AlertCache:
+    """
+    Alerts of analyzed files keyed by content hash, for one query suite and CodeQL version
+    Alerts are stored as CSV rows without their path column.
+    """
+
+    def __init__(self, cache_dir, qls_path, version=None):
+        version = version or codeql_analyze.codeql_version()
+        key = hashlib.sha1(f"{codeql_analyze.suite_digest(qls_path)}:{version}".encode('utf-8')).hexdigest()
+        self.root = os.path.join(cache_dir, key)
+
+    def entry_path(self, content_hash):
+        return os.path.join(self.root, content_hash[:2], content_hash + '.json')
+
+    def get(self, content_hash):
+        """
+        Return the cached alerts of a file, or None if the file has not been analyzed
+        """
+        try:
+            with open(self.entry_path(content_hash), 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, content_hash, alerts):
+        path = self.entry_path(content_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(alerts, file)
+        os.replace(path + '.tmp', path)
+
+
+def analyze_uncached(files, cache, staging_root, codeqldb_path, qls_path, threads=None, ram=None, timeout=25):
+    """
+    Analyze files whose content is not cached yet and store their alerts
+    Alerts of a failed analysis (e.g. a timeout with a partial CSV) are returned but not cached.
+    :param files: dict of content hash -> one source path with that content
+    :return: (dict of content hash -> alerts, True if the analysis completed), or None on error
+    """
+    staging_dir = stage_files(((path, os.path.join(content_hash, os.path.basename(path)))
+                               for content_hash, path in files.items()), staging_root)
+    output_csv = os.path.join(staging_dir, 'codeql_analysis_results.csv')
+    codeql_analyze.create_database(staging_dir, codeqldb_path, threads, ram)
+    complete = True
+    try:
+        codeql_analyze.analyze_database(codeqldb_path, qls_path, output_csv, threads, ram, timeout)
+    except subprocess.CalledProcessError as e:
+        print(f"Error running CodeQL analysis: {e}")
+        if not os.path.exists(output_csv):
+            return None
+        complete = False
+
+    alerts = {content_hash: [] for content_hash in files}
+    for row in read_csv_rows(output_csv):
+        content_hash = row[4].lstrip('/').split('/', 1)[0]
+        if content_hash in alerts:
+            alerts[content_hash].append(row[:4] + row[5:])
+    if complete:
+        for content_hash, rows in alerts.items():
+            cache.put(content_hash, rows)
+    else:
+        print(f"Partial results of {len(alerts)} files are not cached")
+    return alerts, complete
+
+
+def link_path(link, content_hash, path, folder_paths):
+    """
+    Map a staged <content hash>/<name> link path to a path in the folder: the alert's own file for its own
+    hash, else a file of the folder with that content, or None to keep the link
+    """
+    link_hash = link.split('/', 1)[0]
+    return path if link_hash == content_hash else folder_paths.get(link_hash)
+
+
+def run_cached_analysis(folders, staging_root, codeqldb_path, qls_path, cache_dir, threads=None, ram=None, timeout=25,
+                        incomplete=None):
+    """
+    Analyze the folders, re-using cached alerts of files whose content was analyzed before
+    If the analysis of the uncached files fails after writing partial results, the folders with such files
+    are reported as incomplete and added to incomplete (a set), if given.
+    :return: dict of folder -> (number of lines in the output CSV, number of .py files), or -1 on error
+    """
+    cache = AlertCache(cache_dir, qls_path)
+    folder_files = {}
+    uncached = {}
+    for folder in folders:
+        if not codeql_analyze.check_codeql_folder(folder):
+            continue
+        folder_files[folder] = []
+        for relative in codeql_analyze.list_python_files(folder):
+            path = os.path.join(folder, relative)
+            content_hash = file_digest(path)
+            folder_files[folder].append((relative, content_hash))
+            if content_hash not in uncached and cache.get(content_hash) is None:
+                uncached[content_hash] = path
+
+    total = sum(len(files) for files in folder_files.values())
+    fresh = sum(1 for files in folder_files.values() for _, content_hash in files if content_hash in uncached)
+    print(f"{total - fresh} of {total} files are cached, {len(uncached)} distinct files to analyze")
+    fresh_alerts, complete = {}, True
+    if uncached:
+        analyzed = analyze_uncached(uncached, cache, staging_root, codeqldb_path, qls_path, threads, ram, timeout)
+        if analyzed is None:
+            return {folder: -1 for folder in folders}
+        fresh_alerts, complete = analyzed
+
+    results = {folder: -1 for folder in folders}
+    for folder, files in folder_files.items():
+        rows = []
+        # Location links of the messages still point into the staged <content hash>/<name> folders
+        folder_paths = {}
+        for relative, content_hash in files:
+            folder_paths.setdefault(content_hash, relative.replace(os.sep, '/'))
+        for relative, content_hash in files:
+            path = relative.replace(os.sep, '/')
+            alerts = fresh_alerts[content_hash] if content_hash in fresh_alerts else cache.get(content_hash)
+            for alert in alerts or []:
+                message = rewrite_message_links(alert[3], lambda link: link_path(link, content_hash, path,
+                                                                                 folder_paths))
+                rows.append(alert[:3] + [message, '/' + path] + alert[4:])
+        output_csv = os.path.join(folder, 'codeql_analysis_results.csv')
+        write_csv_rows(output_csv, rows)
+        if not complete and any(content_hash in fresh_alerts for _, content_hash in files):
+            print(f"Analysis of '{folder}' incomplete. Partial results saved to {output_csv}")
+            if incomplete is not None:
+                incomplete.add(folder)
+        results[folder] = codeql_analyze.report_results(folder, output_csv)
+    return results
+
+
+if __name__ == "__main__":
+    generate_root = r'your path to the generate folder' # Replace with your directory path
+    staging_root = r'your path to a staging folder' # Replace with your directory path
+    codeqldb_path = r'your path to the CodeQL database' # Replace with your directory path
+    qls_path = r'your path to the CodeQL query file' # Replace with your directory path
+    cache_dir = r'your path to the alert cache folder' # Replace with your directory path
+
+    incomplete = set()
+    results = run_cached_analysis(find_group_folders(generate_root), staging_root, codeqldb_path, qls_path, cache_dir,
+                                  incomplete=incomplete)
+    print(f"Analyzed {sum(1 for result in results.values() if result != -1)} of {len(results)} folders")
+    for folder in sorted(incomplete):
+        print(f"Incomplete: {folder}")
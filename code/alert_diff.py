@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    This script computes how CodeQL alerts change between scenario groups (raw, del, fix, ran, blank) or
+    models for the same dataset id, over the whole generate tree at once.
+    It performs the following tasks:
+    - Reads every `codeql_analysis_results.csv` below a root folder; the group of a CSV is its folder path
+      relative to the root (e.g. `GPT4/raw`), as in `results_store.py`.
+    - Keys every alert by (dataset id, rule, normalized location). The location is normalized against the
+      CO insertion window encoded in the filename: lines before the window keep their number, lines inside
+      the window are counted from its start, and lines after the window are shifted back by its length,
+      so the same code gets the same key in every group.
+    - Joins two groups with multiset (Counter) operations, i.e. hash joins on the key, into added,
+      removed and persisting alerts, and aggregates them per dataset id and per rule.
+USAGE:
+    python alert_diff.py <generate root> [output CSV]
+    Every pair of groups is compared; the per-id table is written to the output CSV.
+DEPENDENCIES:
+    - Python 3.x
+    - records.py, results_store.py and scenario_meta.py in the same folder
+"""
+
+import csv
+import itertools
+import os
+import sys
+from collections import Counter
+
+from records import read_csv_rows
+from results_store import find_result_csvs, tool_and_group
+from scenario_meta import parse_scenario_name
+
+BEFORE, INSIDE, AFTER = 0, 1, 2
+
+
+def normalized_location(line, start_line, num_lines):
+    """
+    Map a line number to (region, line) relative to the insertion window of its file
+    """
+    start_line = max(start_line, 1)
+    if line < start_line:
+        return BEFORE, line
+    if line < start_line + num_lines:
+        return INSIDE, line - start_line
+    return AFTER, line - num_lines
+
+
+def alert_keys(csv_path):
+    """
+    Key the alerts of one results CSV
+    :return: Counter of (dataset id, rule, region, line) -> number of alerts
+    """
+    keys = Counter()
+    for row in read_csv_rows(csv_path):
+        meta = parse_scenario_name(row[4])
+        if meta is None:
+            continue
+        dataset_id, num_lines, start_line, _ = meta
+        keys[(dataset_id, row[0]) + normalized_location(int(row[5]), start_line, num_lines)] += 1
+    return keys
+
+
+def load_groups(root):
+    """
+    Key the alerts of every group below root
+    :return: dict of group ('tool/group') -> Counter of alert keys
+    """
+    groups = {}
+    for csv_path in find_result_csvs(root):
+        tool, group = tool_and_group(root, csv_path)
+        label = f"{tool}/{group}" if tool else group
+        groups.setdefault(label, Counter()).update(alert_keys(csv_path))
+    return groups
+
+
+def diff_alerts(before, after):
+    """
+    Join the alert keys of two groups
+    :return: (added, removed, persisting) Counters of alert keys
+    """
+    return after - before, before - after, before & after
+
+
+def count_by(keys, position):
+    """
+    Sum a Counter of alert keys by one key component (0 = dataset id, 1 = rule)
+    """
+    totals = Counter()
+    for key, count in keys.items():
+        totals[key[position]] += count
+    return totals
+
+
+def diff_summary(before, after, position=0):
+    """
+    Added, removed and persisting alerts per dataset id (position 0) or rule (position 1)
+    :return: dict of id or rule -> (added, removed, persisting)
+    """
+    added, removed, persisting = (count_by(keys, position) for keys in diff_alerts(before, after))
+    return {item: (added[item], removed[item], persisting[item])
+            for item in sorted(set(added) | set(removed) | set(persisting))}
+
+
+def write_pair_summaries(groups, output_csv, pairs=None):
+    """
+    Write the per-id differences of every pair of groups
+    :param pairs: list of (group a, group b); default every pair of groups
+    """
+    pairs = pairs or list(itertools.combinations(sorted(groups), 2))
+    with open(output_csv, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['group_a', 'group_b', 'dataset_id', 'added', 'removed', 'persisting'])
+        for group_a, group_b in pairs:
+            for dataset_id, counts in diff_summary(groups[group_a], groups[group_b]).items():
+                writer.writerow([group_a, group_b, dataset_id, *counts])
+    return pairs
+
+
+def print_rule_changes(groups, group_a, group_b, top=10):
+    """
+    Print the rules whose alerts changed most from group_a to group_b
+    """
+    summary = diff_summary(groups[group_a], groups[group_b], position=1)
+    print(f"{group_a} -> {group_b}: rule (added, removed, persisting)")
+    for rule, counts in sorted(summary.items(), key=lambda item: -(item[1][0] + item[1][1]))[:top]:
+        print(f"  {rule}: {counts}")
+
+
+if __name__ == "__main__":
+    generate_root = sys.argv[1] if len(sys.argv) > 1 else r'your path to the generate folder' # Replace with your directory path
+    output_csv = sys.argv[2] if len(sys.argv) > 2 else 'alert_diff.csv'
+    if not os.path.exists(generate_root):
+        print(f"Directory {generate_root} does not exist.")
+        exit(1)
+
+    groups = load_groups(generate_root)
+    pairs = write_pair_summaries(groups, output_csv)
+    for group_a, group_b in pairs:
+        print_rule_changes(groups, group_a, group_b)
+    print(f"Differences of {len(pairs)} group pairs saved to {output_csv}")
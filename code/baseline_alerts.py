@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    This script subtracts the alerts that generated files inherit from their original dataset file, so only
+    the alerts that the generation introduced are reported.
+    It performs the following tasks:
+    - Analyzes the original `dataset/dataset` once and caches its alert fingerprints, keyed by the query
+      suite, the CodeQL version and the digest of the dataset folder (a changed dataset is re-analyzed).
+    - Fingerprints every alert by its rule and its normalized code context (the stripped source lines of
+      the alert, whitespace collapsed, plus optionally `context` lines around it), not by its line number,
+      so alerts survive line shifts caused by inserted or deleted lines.
+    - For every generated variant, subtracts the fingerprints of its dataset file (same dataset id) with
+      multiset (Counter) operations and writes the remaining alerts to `codeql_new_alerts.csv`.
+USAGE:
+    - Update `dataset_folder`, `generate_root`, `cache_dir`, `codeqldb_path` and `qls_path` in the
+      `__main__` section and run the script after the variants were analyzed.
+DEPENDENCIES:
+    - Python 3.x
+    - CodeQL CLI
+    - codeql_analyze.py, codeql_scheduler.py, records.py, rollup_cache.py and scenario_meta.py in the same folder
+NOTES:
+    - Two identical statements of the same file share a fingerprint; multiset subtraction keeps the surplus
+      occurrences, so duplicated defects are still reported.
+    - Context lines make fingerprints more specific but also sensitive to code inserted right next to an
+      inherited alert, so the default is no context.
+"""
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+from collections import Counter
+
+import codeql_analyze
+import rollup_cache
+from codeql_scheduler import find_group_folders
+from records import read_csv_rows, write_csv_rows
+from scenario_meta import parse_scenario_name
+
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalized_lines(file_path):
+    """
+    Read a file as a list of stripped lines with collapsed whitespace
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
+            return [WHITESPACE.sub(' ', line).strip() for line in file]
+    except OSError:
+        return []
+
+
+def fingerprint(rule, lines, start_line, end_line, context=0):
+    """
+    Fingerprint an alert by its rule and the normalized source lines around it
+    """
+    first = max(start_line - 1 - context, 0)
+    last = min(end_line + context, len(lines))
+    text = '\n'.join([rule] + lines[first:last])
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:20]
+
+
+def fingerprint_rows(rows, source_root, context=0):
+    """
+    Fingerprint results CSV rows against the sources they refer to
+    :return: list of (dataset id or None, fingerprint, row)
+    """
+    sources = {}
+    fingerprints = []
+    for row in rows:
+        path = row[4]
+        if path not in sources:
+            sources[path] = normalized_lines(os.path.join(source_root, path.lstrip('/')))
+        meta = parse_scenario_name(path)
+        fingerprints.append((meta[0] if meta else None,
+                             fingerprint(row[0], sources[path], int(row[5]), int(row[7]), context), row))
+    return fingerprints
+
+
+def baseline_cache_path(cache_dir, dataset_folder, qls_path):
+    """
+    Cache file of the baseline fingerprints for this dataset, suite and CodeQL version
+    """
+    key = f"{codeql_analyze.suite_digest(qls_path)}:{codeql_analyze.codeql_version()}:" \
+          f"{rollup_cache.directory_digest(dataset_folder)}"
+    return os.path.join(cache_dir, 'baseline_' + hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+
+def load_baseline(dataset_folder, cache_dir, codeqldb_path, qls_path, context=0, threads=None, ram=None, timeout=25):
+    """
+    Fingerprints of the alerts of the original dataset, analyzed once and cached
+    A failed analysis is not cached: a partial baseline would report inherited alerts as new.
+    :return: dict of dataset id -> Counter of fingerprints, or None on error
+    """
+    cache_path = baseline_cache_path(cache_dir, dataset_folder, qls_path)
+    if os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as file:
+            cached = json.load(file)
+        if cached['context'] == context:
+            return {int(dataset_id): Counter(counts) for dataset_id, counts in cached['baseline'].items()}
+
+    os.makedirs(cache_dir, exist_ok=True)
+    output_csv = cache_path[:-len('.json')] + '.csv'
+    if os.path.exists(output_csv):
+        os.remove(output_csv)
+    codeql_analyze.ensure_database(dataset_folder, codeqldb_path, threads, ram)
+    try:
+        codeql_analyze.analyze_database(codeqldb_path, qls_path, output_csv, threads, ram, timeout)
+    except subprocess.CalledProcessError as e:
+        print(f"Error running CodeQL analysis of the dataset, no baseline: {e}")
+        return None
+
+    baseline = {}
+    for dataset_id, key, _ in fingerprint_rows(read_csv_rows(output_csv), dataset_folder, context):
+        if dataset_id is not None:
+            baseline.setdefault(dataset_id, Counter())[key] += 1
+    with open(cache_path + '.tmp', 'w', encoding='utf-8') as file:
+        json.dump({'context': context, 'baseline': baseline}, file)
+    os.replace(cache_path + '.tmp', cache_path)
+    print(f"Baseline of {len(baseline)} dataset files cached in {cache_path}")
+    return baseline
+
+
+def new_alerts(python_folder, baseline, context=0):
+    """
+    The alerts of an analyzed variant folder that its dataset files do not have
+    :return: list of CSV rows
+    """
+    remaining = {}
+    rows = []
+    for dataset_id, key, row in fingerprint_rows(
+            read_csv_rows(os.path.join(python_folder, 'codeql_analysis_results.csv')), python_folder, context):
+        # Every baseline occurrence cancels one variant occurrence
+        inherited = remaining.setdefault((dataset_id, row[4]), Counter(baseline.get(dataset_id, {})))
+        if inherited[key] > 0:
+            inherited[key] -= 1
+        else:
+            rows.append(row)
+    return rows
+
+
+def write_new_alerts(folders, baseline, context=0):
+    """
+    Write codeql_new_alerts.csv for every analyzed folder
+    :return: dict of folder -> (number of alerts, number of new alerts)
+    """
+    counts = {}
+    for folder in folders:
+        results_csv = os.path.join(folder, 'codeql_analysis_results.csv')
+        if not os.path.exists(results_csv):
+            continue
+        rows = new_alerts(folder, baseline, context)
+        write_csv_rows(os.path.join(folder, 'codeql_new_alerts.csv'), rows)
+        total = sum(1 for _ in read_csv_rows(results_csv))
+        counts[folder] = (total, len(rows))
+        print(f"'{folder}': {len(rows)} new of {total} alerts")
+    return counts
+
+
+if __name__ == "__main__":
+    dataset_folder = r'your path to dataset/dataset' # Replace with your directory path
+    generate_root = r'your path to the generate folder' # Replace with your directory path
+    cache_dir = r'your path to the baseline cache folder' # Replace with your directory path
+    codeqldb_path = r'your path to the CodeQL database' # Replace with your directory path
+    qls_path = r'your path to the CodeQL query file' # Replace with your directory path
+
+    baseline = load_baseline(dataset_folder, cache_dir, codeqldb_path, qls_path)
+    if baseline is not None:
+        write_new_alerts(find_group_folders(generate_root), baseline)
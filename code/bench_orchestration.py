@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    Offline benchmark of the CodeQL orchestration, run against the stand-in `codeql` of `mock_codeql/`.
+    For 1 to 10k synthetic group folders it measures:
+    - orchestration overhead: wall time of sequential `run_codeql_analysis` calls, of the concurrent
+      scheduler (`codeql_scheduler.py`), of the scheduler through CLI servers (`codeql_server.py`) and of one
+      combined database (`codeql_combined.py`), against the latency simulated by the mock;
+    - concurrency: simulated CodeQL seconds per wall second of the scheduler;
+    - query partitioning (`codeql_partitioned.py`) of one folder against one analysis, and whether their
+      results are equal;
+    - result-merging throughput: rows per second of `merge_csv_rows`, of the SQLite results store
+      (`results_store.py`) and of the differential join (`alert_diff.py`).
+USAGE:
+    python bench_orchestration.py [folder counts, e.g. 1,10,100,1000,10000] [files per folder]
+    The mock latencies are set with the MOCK_CODEQL_* environment variables (see `mock_codeql/codeql`);
+    by default every create and analyze takes 50 ms.
+DEPENDENCIES:
+    - Python 3.x
+    - codeql_analyze.py, codeql_combined.py, codeql_partitioned.py, codeql_scheduler.py, codeql_server.py,
+      records.py, results_store.py and alert_diff.py in the same folder
+NOTES:
+    - The sequential and CLI server strategies are skipped above 1000 folders, where they take minutes.
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import alert_diff
+import codeql_analyze
+import codeql_combined
+import codeql_scheduler
+import codeql_server
+import results_store
+from records import merge_csv_rows, read_csv_rows
+
+MOCK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mock_codeql')
+GROUPS = ('raw', 'del', 'fix', 'ran', 'blank')
+SOURCE = '''import os
+import sys
+# print(sys.argv)
+def main():
+    try:
+        return os.getcwd()
+    except Exception:
+        pass
+'''
+
+
+def make_folders(root, count, files_per_folder):
+    """
+    Create count group folders <root>/m<k>/<group> with scenario-named .py files
+    """
+    folders = []
+    for i in range(count):
+        folder = os.path.join(root, f"m{i // len(GROUPS):04d}", GROUPS[i % len(GROUPS)])
+        os.makedirs(folder)
+        for j in range(files_per_folder):
+            with open(os.path.join(folder, f"{j}_0_{3 + j % 5}_27.py"), 'w', encoding='utf-8') as file:
+                file.write(SOURCE)
+        folders.append(folder)
+    return folders
+
+
+def clear_results(folders):
+    for folder in folders:
+        output_csv = os.path.join(folder, 'codeql_analysis_results.csv')
+        if os.path.exists(output_csv):
+            os.remove(output_csv)
+
+
+def timed(function, *args, **kwargs):
+    """
+    Run a function with its output discarded
+    :return: (wall seconds, result)
+    """
+    start = time.time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = function(*args, **kwargs)
+    return time.time() - start, result
+
+
+def run_sequential(folders, db_root, qls_path):
+    return {folder: codeql_analyze.run_codeql_analysis(folder, codeql_scheduler.database_path(db_root, folder),
+                                                       qls_path)
+            for folder in folders}
+
+
+def run_cli_server(folders, db_root, qls_path):
+    codeql_server.install()
+    try:
+        return codeql_scheduler.schedule_codeql_analysis(folders, db_root, qls_path)
+    finally:
+        codeql_server.uninstall()
+
+
+def bench_strategies(folders, work_dir, qls_path, simulated):
+    """
+    Time every orchestration strategy over the folders
+    :param simulated: CodeQL latency of one folder (create + analyze) in seconds
+    """
+    strategies = [
+        ('scheduler', lambda db_root: codeql_scheduler.schedule_codeql_analysis(folders, db_root, qls_path)),
+        ('combined database', lambda db_root: codeql_combined.run_combined_analysis(
+            folders, os.path.join(work_dir, 'staging'), db_root, qls_path)),
+    ]
+    if len(folders) <= 1000:
+        strategies = [('sequential', lambda db_root: run_sequential(folders, db_root, qls_path)),
+                      ('scheduler + CLI server', lambda db_root: run_cli_server(folders, db_root, qls_path))] \
+            + strategies
+    for name, strategy in strategies:
+        clear_results(folders)
+        db_root = os.path.join(work_dir, 'db_' + name.replace(' ', '_').replace('+', ''))
+        seconds, results = timed(strategy, db_root)
+        failed = sum(1 for result in results.values() if result == -1) if isinstance(results, dict) else 0
+        total = simulated * len(folders)
+        print(f"  {name:24} {seconds:8.2f}s  {seconds / len(folders) * 1000:8.1f} ms/folder  "
+              f"simulated {total:7.2f}s  ({total / max(seconds, 1e-9):5.1f} simulated s per wall s)"
+              + (f"  {failed} failed" if failed else ''))
+
+
+def bench_partitioning(folder, work_dir, qls_path, partitions=3):
+    """
+    Time one folder analyzed with the whole suite and with query partitions, and check that the merged
+    results of the partitions equal the results of the single analysis
+    :return: True if the results match
+    """
+    output_csv = os.path.join(folder, 'codeql_analysis_results.csv')
+    db_path = os.path.join(work_dir, 'db_partitioning')
+    results = {}
+    for name, options in (('single analysis', {}), (f"{partitions} query partitions",
+                                                    {'query_partitions': partitions,
+                                                     'query_cache_root': os.path.join(work_dir, 'query_cache')})):
+        seconds, _ = timed(codeql_analyze.run_codeql_analysis, folder, db_path, qls_path, **options)
+        results[name] = sorted(read_csv_rows(output_csv))
+        print(f"  {name:24} {seconds:8.2f}s  {len(results[name])} rows")
+    single, merged = results.values()
+    if merged != single:
+        print(f"  MISMATCH: the merged partitions differ from the single analysis "
+              f"({len(merged)} vs {len(single)} rows)")
+    return merged == single
+
+
+def bench_merging(root, folders):
+    """
+    Time result ingestion over the CSVs of the last strategy
+    """
+    csv_paths = [os.path.join(folder, 'codeql_analysis_results.csv') for folder in folders]
+    csv_paths = [path for path in csv_paths if os.path.exists(path)]
+    seconds, rows = timed(merge_csv_rows, csv_paths)
+    print(f"  {'merge_csv_rows':24} {seconds:8.2f}s  {len(rows) / max(seconds, 1e-9):10.0f} rows/s")
+    db_path = os.path.join(os.path.dirname(root), 'results.db')
+    seconds, _ = timed(results_store.ingest_tree, root, db_path)
+    print(f"  {'results_store ingest':24} {seconds:8.2f}s  {len(rows) / max(seconds, 1e-9):10.0f} rows/s")
+    seconds, _ = timed(results_store.ingest_tree, root, db_path)
+    print(f"  {'results_store unchanged':24} {seconds:8.2f}s")
+    seconds, groups = timed(alert_diff.load_groups, root)
+    print(f"  {'alert_diff load':24} {seconds:8.2f}s  {len(rows) / max(seconds, 1e-9):10.0f} rows/s")
+
+
+def run_benchmark(counts, files_per_folder=4):
+    os.environ['PATH'] = MOCK_DIR + os.pathsep + os.environ.get('PATH', '')
+    os.environ.setdefault('MOCK_CODEQL_CREATE', '0.05')
+    os.environ.setdefault('MOCK_CODEQL_ANALYZE', '0.05')
+    os.environ.setdefault('MOCK_CODEQL_QUIET', '1')
+    simulated = sum(float(os.environ.get(name, 0)) for name in
+                    ('MOCK_CODEQL_CREATE', 'MOCK_CODEQL_ANALYZE')) \
+        + 2 * float(os.environ.get('MOCK_CODEQL_STARTUP', 0)) \
+        + files_per_folder * float(os.environ.get('MOCK_CODEQL_CREATE_PER_FILE', 0))
+    for count in counts:
+        work_dir = tempfile.mkdtemp(prefix='bench_orchestration_')
+        try:
+            root = os.path.join(work_dir, 'generate')
+            folders = make_folders(root, count, files_per_folder)
+            qls_path = os.path.join(work_dir, 'mock.qls')
+            with open(qls_path, 'w', encoding='utf-8') as file:
+                file.write("- description: Mock suite\n")
+            print(f"{count} folders x {files_per_folder} files:")
+            bench_strategies(folders, work_dir, qls_path, simulated)
+            bench_partitioning(folders[0], work_dir, qls_path)
+            bench_merging(root, folders)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    counts = [int(count) for count in sys.argv[1].split(',')] if len(sys.argv) > 1 else [1, 10, 100, 1000]
+    files_per_folder = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    run_benchmark(counts, files_per_folder)
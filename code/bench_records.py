@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    Memory benchmark of the record types in `records.py` against the ad-hoc structures used so far.
+    For a number of CodeQL alert rows (synthetic, or read from a real `codeql_analysis_results.csv`),
+    it measures the memory held after loading them as:
+    - a list of dicts,
+    - a list of tuples,
+    - a list of `AlertRecord` objects (`__slots__`),
+    - one `AlertTable` (array columns and string pools).
+    It also times a full pass over one column of each container.
+USAGE:
+    python bench_records.py [number of rows] [path to codeql_analysis_results.csv]
+DEPENDENCIES:
+    - Python 3.x
+    - records.py in the same folder
+"""
+
+import sys
+import time
+import tracemalloc
+
+from records import CODEQL_CSV_COLUMNS, AlertRecord, AlertTable, read_csv_rows
+
+RULES = [
+    ('Unused import', 'Import is not required as it is not used', 'recommendation'),
+    ('Commented-out code', 'Commented-out code makes the remaining code more difficult to read.', 'recommendation'),
+    ('Empty except', "Except doesn't do anything and has no comment", 'recommendation'),
+    ("'import *' may pollute namespace", 'Importing a module using import * may unintentionally pollute the global namespace.', 'recommendation'),
+    ('Use of insecure SSL/TLS version', 'Using an insecure SSL/TLS version may leave the connection vulnerable to attacks.', 'warning'),
+]
+
+
+def synthetic_rows(n):
+    """
+    Generate n rows shaped like a CodeQL results CSV of a generate folder
+    """
+    for i in range(n):
+        name, description, severity = RULES[i % len(RULES)]
+        file_id = i // 4
+        line = 1 + i % 40
+        yield [name, description, severity, f"Import of 'module{i % 97}' is not used.",
+               f"/{file_id}_0_{line}_27_gpt4_0.py", str(line), '1', str(line), str(20 + i % 30)]
+
+
+def measure(label, build, scan):
+    """
+    Build a container while tracing allocations, then time a scan over it
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    container = build()
+    build_time = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    scan(container)
+    scan_time = time.perf_counter() - start
+    print(f"{label:<22} {current / 2 ** 20:>10.1f} MiB {build_time:>9.2f} s {scan_time:>9.3f} s")
+    return current
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    csv_path = sys.argv[2] if len(sys.argv) > 2 else None
+
+    if csv_path:
+        rows = list(read_csv_rows(csv_path))
+        rows = (rows * (n // max(len(rows), 1) + 1))[:n]
+    else:
+        rows = list(synthetic_rows(n))
+
+    def converted_rows():
+        # CSV readers return fresh strings for every cell, so the baseline structures do not share them
+        for row in rows:
+            yield [''.join(cell) for cell in row]
+
+    print(f"{n} alert rows")
+    print(f"{'container':<22} {'memory':>14} {'build':>11} {'scan':>11}")
+    results = {
+        'list of dicts': measure(
+            'list of dicts',
+            lambda: [dict(zip(CODEQL_CSV_COLUMNS, row[:5] + [int(v) for v in row[5:]])) for row in converted_rows()],
+            lambda alerts: sum(alert['start_line'] for alert in alerts)),
+        'list of tuples': measure(
+            'list of tuples',
+            lambda: [tuple(row[:5] + [int(v) for v in row[5:]]) for row in converted_rows()],
+            lambda alerts: sum(alert[5] for alert in alerts)),
+        'list of AlertRecord': measure(
+            'list of AlertRecord',
+            lambda: [AlertRecord(*row) for row in converted_rows()],
+            lambda alerts: sum(alert.start_line for alert in alerts)),
+        'AlertTable': measure(
+            'AlertTable',
+            lambda: AlertTable().extend(converted_rows()),
+            lambda table: sum(table.codes('start_line'))),
+    }
+    baseline = results['list of dicts']
+    for label, current in results.items():
+        print(f"{label:<22} {current / baseline:>8.2%} of list of dicts")
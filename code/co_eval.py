@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    This script evaluates the CO code classifier of `search_COcode.py` against the known CO insertion windows
+    encoded in scenario filenames (`<id>_<numlines>_<startline>_<tag>.py`).
+    It performs the following tasks:
+    - Parses every scenario filename below a root folder into NumPy arrays once (see `scenario_meta.py`).
+    - Runs the classifier over every file (optionally in parallel) and collects its per-line labels.
+    - Joins the per-line labels against the insertion windows with vectorized interval logic.
+    - Reports line-level precision, recall and F1, plus the share of files whose window was detected,
+      grouped by tag and by scenario group (raw, del, fix, ran, blank, ...).
+DEFINITIONS:
+    - A line is predicted as CO code if the classifier labels it as a code-related comment.
+    - A line is a true CO line if it is a comment line inside the window, widened by `slack` lines on each side.
+    - Groups without inserted CO code (e.g. blank) only have false positives, so their recall is undefined.
+USAGE:
+    - Update `scenario_root` in the `__main__` section, or pass it on the command line, and run the script.
+DEPENDENCIES:
+    - Python 3.x
+    - numpy
+    - search_COcode.py and scenario_meta.py in the same folder
+"""
+
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import search_COcode
+from scenario_meta import scan_scenarios
+
+
+def file_line_flags(file_path):
+    """
+    Read a file and return the per-line labels of the classifier
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
+            return search_COcode.comment_line_flags(file.read())
+    except (OSError, MemoryError, RecursionError) as e:
+        print(f"Error processing file: {file_path}", e)
+        return np.zeros(0, dtype=np.int8)
+
+
+def collect_line_flags(paths, workers=None):
+    """
+    Classify every file and concatenate the per-line labels
+    :return: (flags, file_index, line_number), three arrays with one entry per source line
+    """
+    if workers == 1:
+        per_file = [file_line_flags(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            per_file = list(executor.map(file_line_flags, paths, chunksize=64))
+
+    lengths = np.fromiter((len(flags) for flags in per_file), dtype=np.int64, count=len(per_file))
+    flags = np.concatenate(per_file) if per_file else np.zeros(0, dtype=np.int8)
+    file_index = np.repeat(np.arange(len(per_file)), lengths)
+    offsets = np.cumsum(lengths) - lengths
+    line_number = np.arange(len(flags)) - np.repeat(offsets, lengths) + 1
+    return flags, file_index, line_number
+
+
+def safe_ratio(numerator, denominator):
+    """
+    Element-wise ratio that is NaN where the denominator is zero
+    """
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / np.maximum(denominator, 1), np.nan)
+
+
+def window_metrics(meta, flags, file_index, line_number, by, slack=0):
+    """
+    Join per-line labels against the insertion windows and aggregate the confusion counts
+    :param by: name of the metadata column to group by ('tag' or 'group')
+    :return: list of dicts, one per distinct value of the column
+    """
+    lo = meta['start_line'][file_index] - slack
+    hi = meta['end_line'][file_index] + slack
+    in_window = (line_number >= lo) & (line_number <= hi)
+    predicted = flags == search_COcode.LINE_CODE
+    is_comment = flags != search_COcode.LINE_OTHER
+
+    keys, file_key = np.unique(meta[by].astype(str), return_inverse=True)
+    line_key = file_key[file_index]
+    n_keys = len(keys)
+    tp = np.bincount(line_key, weights=predicted & in_window, minlength=n_keys)
+    fp = np.bincount(line_key, weights=predicted & ~in_window, minlength=n_keys)
+    fn = np.bincount(line_key, weights=is_comment & in_window & ~predicted, minlength=n_keys)
+
+    n_files = len(meta['path'])
+    detected = np.bincount(file_index, weights=predicted & in_window, minlength=n_files) > 0
+    files = np.bincount(file_key, minlength=n_keys)
+    files_detected = np.bincount(file_key, weights=detected, minlength=n_keys)
+
+    precision = safe_ratio(tp, tp + fp)
+    recall = safe_ratio(tp, tp + fn)
+    f1 = safe_ratio(2 * precision * recall, precision + recall)
+    return [
+        {
+            by: keys[i],
+            'files': int(files[i]),
+            'tp': int(tp[i]),
+            'fp': int(fp[i]),
+            'fn': int(fn[i]),
+            'precision': float(precision[i]),
+            'recall': float(recall[i]),
+            'f1': float(f1[i]),
+            'window_detection_rate': float(files_detected[i] / files[i]),
+        }
+        for i in range(n_keys)
+    ]
+
+
+def evaluate_scenarios(scenario_root, groups=None, slack=0, workers=None):
+    """
+    Evaluate the CO classifier on every scenario file below scenario_root
+    :return: (metrics by tag, metrics by group)
+    """
+    meta = scan_scenarios(scenario_root, groups)
+    flags, file_index, line_number = collect_line_flags(list(meta['path']), workers)
+    by_tag = window_metrics(meta, flags, file_index, line_number, 'tag', slack)
+    by_group = window_metrics(meta, flags, file_index, line_number, 'group', slack)
+    return by_tag, by_group
+
+
+def write_metrics(rows, output_csv):
+    """
+    Write metric rows to a CSV file
+    """
+    with open(output_csv, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def print_metrics(rows):
+    """
+    Print metric rows as a table
+    """
+    key = next(iter(rows[0]))
+    print(f"{key:>10} {'files':>7} {'tp':>7} {'fp':>7} {'fn':>7} {'prec':>7} {'recall':>7} {'f1':>7} {'detect':>7}")
+    for row in rows:
+        print(f"{row[key]:>10} {row['files']:>7} {row['tp']:>7} {row['fp']:>7} {row['fn']:>7} "
+              f"{row['precision']:>7.3f} {row['recall']:>7.3f} {row['f1']:>7.3f} {row['window_detection_rate']:>7.3f}")
+
+
+if __name__ == "__main__":
+    scenario_root = sys.argv[1] if len(sys.argv) > 1 else r'your path to the extracted scenarios'  # Replace with your directory path
+    if not os.path.exists(scenario_root):
+        print(f"Directory {scenario_root} does not exist.")
+        exit(1)
+
+    by_tag, by_group = evaluate_scenarios(scenario_root)
+    if not by_tag:
+        print("No scenario files found.")
+        exit(1)
+    print("CO detection by group:")
+    print_metrics(by_group)
+    print("CO detection by tag:")
+    print_metrics(by_tag)
+    write_metrics(by_group, os.path.join(scenario_root, 'co_eval_by_group.csv'))
+    write_metrics(by_tag, os.path.join(scenario_root, 'co_eval_by_tag.csv'))
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    This script runs the CO code classifier of `search_COcode.py` as a long-running service, so that the
+    generation loop and downstream tools do not pay interpreter startup and imports for every call.
+    It performs the following tasks:
+    - Imports and warms up the classifier once and keeps it resident in memory.
+    - Reads JSONL requests from stdin or from a local UNIX socket, one request per line.
+    - Classifies files, raw Python source or raw comment text and streams back one JSONL verdict per request.
+    - Caches verdicts of files (keyed by path, size and mtime) and of raw text, so repeated requests are free.
+PROTOCOL:
+    Each request is one line. It is either a JSON object or a bare file path:
+        {"id": 1, "path": "dataset/dataset/0_3_12_57.py"}
+        {"id": 2, "text": "x = compute(y)\\nprint(x)"}       # raw comment text, with or without '#'
+        {"id": 3, "source": "# x = 1\\nprint(2)\\n"}          # raw Python source
+        dataset/dataset/0_3_12_57.py
+    Each verdict is one JSON line echoing the request id:
+        {"id": 1, "total_comment_lines": 5, "natural_language_comment_lines": 4,
+         "code_related_comment_lines": 1, "is_co": true, "node_types": {"Call": 1}}
+    A request that cannot be served gets {"id": ..., "error": "..."}.
+USAGE:
+    python co_service.py                       # serve on stdin/stdout
+    python co_service.py --socket /tmp/co.sock # serve on a UNIX socket
+DEPENDENCIES:
+    - Python 3.x
+    - numpy
+    - search_COcode.py in the same folder
+NOTES:
+    - The classifier keeps module-level state (`search_COcode.white`), so requests are classified one at a
+      time; socket clients are accepted concurrently but serialized around the classifier.
+    - UNIX sockets are not available on Windows; use the stdin mode there.
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+from collections import OrderedDict
+
+import search_COcode
+
+# Serializes access to the classifier, which is not thread-safe
+classifier_lock = threading.Lock()
+
+
+class VerdictCache:
+    """
+    A small LRU cache of verdicts
+    """
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        # Socket clients are served by concurrent threads
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            verdict = self.entries.get(key)
+            if verdict is not None:
+                self.entries.move_to_end(key)
+            return verdict
+
+    def put(self, key, verdict):
+        with self.lock:
+            self.entries[key] = verdict
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+file_cache = VerdictCache()
+text_cache = VerdictCache()
+
+
+def make_verdict(result, counts):
+    """
+    Build the JSON verdict of a classification result and its node type histogram
+    """
+    total_comment_lines, natural_language_comment_lines, code_related_comment_lines = result
+    by_type, _ = search_COcode.summarize_node_counts(counts)
+    return {
+        'total_comment_lines': total_comment_lines,
+        'natural_language_comment_lines': natural_language_comment_lines,
+        'code_related_comment_lines': code_related_comment_lines,
+        'is_co': code_related_comment_lines > 0,
+        'node_types': by_type,
+    }
+
+
+def classify_source(code):
+    """
+    Classify the comments of Python source code, using the text cache
+    """
+    verdict = text_cache.get(code)
+    if verdict is None:
+        counts = search_COcode.new_node_counts()
+        with classifier_lock:
+            result = search_COcode.process_python_source(code, counts)
+        verdict = make_verdict(result, counts)
+        text_cache.put(code, verdict)
+    return verdict
+
+
+def classify_comment_text(text):
+    """
+    Classify raw comment text; lines without a leading '#' are treated as comment lines
+    """
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith('#'):
+            line = line[1:].strip()
+        lines.append('# ' + line)
+    return classify_source('\n'.join(lines) + '\n')
+
+
+def classify_path(path):
+    """
+    Classify the comments of a Python file, using the file cache
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    verdict = file_cache.get(key)
+    if verdict is None:
+        with open(path, 'r', encoding='utf-8', errors='replace') as file:
+            code = file.read()
+        verdict = classify_source(code)
+        file_cache.put(key, verdict)
+    return verdict
+
+
+def validate_request(request):
+    """
+    Check the fields of a request, raising ValueError if it cannot be served
+    """
+    if isinstance(request.get('id'), (dict, list)):
+        raise ValueError("'id' must be a string, a number or null")
+    fields = [field for field in ('path', 'text', 'source') if field in request]
+    if not fields:
+        raise ValueError("request needs one of 'path', 'text' or 'source'")
+    if not isinstance(request[fields[0]], str):
+        raise ValueError(f"'{fields[0]}' must be a string")
+
+
+def handle_request(line):
+    """
+    Serve one request line and return the verdict as a JSON line, or None for blank lines
+    """
+    line = line.strip()
+    if not line:
+        return None
+    request_id = None
+    try:
+        if line.startswith('{'):
+            request = json.loads(line)
+            request_id = request.get('id')
+        else:
+            request = {'path': line}
+        validate_request(request)
+
+        if 'path' in request:
+            verdict = classify_path(request['path'])
+        elif 'text' in request:
+            verdict = classify_comment_text(request['text'])
+        elif 'source' in request:
+            verdict = classify_source(request['source'])
+        verdict = dict(verdict)
+    except (OSError, ValueError) as e:
+        verdict = {'error': str(e)}
+    if request_id is not None:
+        verdict = {'id': request_id, **verdict}
+    return json.dumps(verdict) + '\n'
+
+
+def warm_up():
+    """
+    Run the classifier once so that imports and lazy initialization are paid before the first request
+    """
+    classify_comment_text('x = compute(y)\nthis is a sentence')
+    text_cache.clear()
+
+
+def serve_stdin():
+    """
+    Serve JSONL requests from stdin, writing verdicts to stdout
+    """
+    for line in sys.stdin:
+        response = handle_request(line)
+        if response is not None:
+            sys.stdout.write(response)
+            sys.stdout.flush()
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """
+    Serve JSONL requests from one socket client
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            response = handle_request(line.decode('utf-8', errors='replace'))
+            if response is not None:
+                self.wfile.write(response.encode('utf-8'))
+                self.wfile.flush()
+
+
+def serve_socket(socket_path):
+    """
+    Serve JSONL requests on a local UNIX socket until interrupted
+    """
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = socketserver.ThreadingUnixStreamServer(socket_path, RequestHandler)
+    server.daemon_threads = True
+    print(f"CO classifier listening on {socket_path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(socket_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resident CO code classifier service")
+    parser.add_argument('--socket', help="path of a UNIX socket to listen on instead of stdin")
+    args = parser.parse_args()
+
+    warm_up()
+    if args.socket:
+        serve_socket(args.socket)
+    else:
+        serve_stdin()
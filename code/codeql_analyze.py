@@ -5,11 +5,21 @@ DESCRIPTION:
     It performs the following tasks:
     - Verifies if CodeQL is installed and accessible via the system PATH.
     - Checks if the specified folder exists and contains Python files.
-    - Initializes a CodeQL database for the given Python source folder.
+    - Initializes a CodeQL database for the given Python source folder, unless the database was created from
+      the same sources (a source fingerprint is kept next to the database); then only the analysis is re-run.
     - Executes CodeQL queries to analyze the code for potential issues (e.g., CWE errors).
     - Outputs the analysis results in CSV format.
     - Counts the number of lines in the output CSV file and the number of Python files in the folder.
     - Prints the analysis results and statistics.
+    - Optionally skips folders whose sources and query suite are unchanged since the last run, using a
+      Merkle-style rollup cache (see `rollup_cache.py`); cached totals are reported instead.
+    - Optionally resolves and compiles the query suite once into a shared cache (see `query_cache.py`)
+      and reports compile-vs-evaluate time.
+    - Optionally writes the `lists.npy` defect labels of the folder (see `defect_labels.py`).
+    - Optionally captures the evaluator log and writes a per-query timing table (see `evaluator_log.py`).
+    - Optionally re-runs timed-out queries with larger, learned per-query budgets (see `adaptive_timeout.py`).
+    - Every CodeQL command goes through `run_codeql`, which can be routed through long-lived CLI servers
+      (see `codeql_server.py`).
 USAGE:
     - Update the `python_folder`, `codeqldb_path`, and `qls_path` variables in the `__main__` section 
       with the appropriate paths before running the script.
@@ -17,7 +27,10 @@ USAGE:
 DEPENDENCIES:
     - Python 3.x
     - CodeQL CLI
-    - Standard Python libraries: subprocess, os, csv, shutil
+    - Standard Python libraries: subprocess, os, shutil, hashlib, json, time
+    - numpy
+    - rollup_cache.py, query_cache.py, defect_labels.py, evaluator_log.py, adaptive_timeout.py and records.py
+      in the same folder
 NOTES:
     - The script assumes that the CodeQL CLI is installed and accessible.
     - The `codeql database create` and `codeql database analyze` commands are used for database initialization 
@@ -28,63 +41,354 @@ NOTES:
 
 import subprocess
 import os
-import csv, shutil
+import shutil
+import hashlib, json, time
 
-# run CodeQL analysis on a folder containing Python code
-def run_codeql_analysis(python_folder, codeqldb_path='', qls_path=''):
-    
+import adaptive_timeout
+import codeql_partitioned
+import codeql_progress
+import defect_labels
+import evaluator_log
+import query_cache
+import rollup_cache
+from records import read_csv_rows
+
+# Optional execution backend with a run(args, capture) method, e.g. the CLI servers of codeql_server.py
+backend = None
+
+# Resolved queries of the suites of this process, keyed by (suite path, size, mtime)
+_suite_queries = {}
+
+PACK_FILES = ('codeql-pack.lock.yml', 'qlpack.yml', 'codeql-pack.yml')
+
+def pack_files(query_path):
+    """
+    Return the pack definition and lock files of the pack containing a query
+    """
+    directory = os.path.dirname(os.path.abspath(query_path))
+    while True:
+        found = [os.path.join(directory, name) for name in PACK_FILES if os.path.exists(os.path.join(directory, name))]
+        parent = os.path.dirname(directory)
+        if found or parent == directory:
+            return found
+        directory = parent
+
+def suite_digest(qls_path):
+    """
+    Hash the content of a query suite, of every query it resolves to (`codeql resolve queries`) and of the
+    pack and lock files of those queries, so edits to selectors, queries or pack dependencies change it
+    The resolution is done once per suite file version in a process; the files are hashed on every call.
+    """
+    digest = hashlib.sha1()
+    if not qls_path or not os.path.exists(qls_path):
+        return digest.hexdigest()
+    stat = os.stat(qls_path)
+    key = (os.path.abspath(qls_path), stat.st_size, stat.st_mtime_ns)
+    with open(qls_path, 'rb') as file:
+        digest.update(file.read())
+    if key not in _suite_queries:
+        try:
+            _suite_queries[key] = sorted(json.loads(
+                run_codeql(['resolve', 'queries', qls_path, '--format=json'], capture=True).stdout))
+        except (OSError, ValueError, subprocess.CalledProcessError) as e:
+            print(f"Could not resolve the queries of {qls_path}, hashing the suite file only: {e}")
+            return digest.hexdigest()
+    hashed = set()
+    for query in _suite_queries[key]:
+        digest.update(f"Q {query}\n".encode('utf-8'))
+        for path in ([query] + pack_files(query) if os.path.isfile(query) else []):
+            if path not in hashed:
+                hashed.add(path)
+                with open(path, 'rb') as file:
+                    digest.update(file.read())
+    return digest.hexdigest()
+
+
+def run_codeql(args, capture=False):
+    """
+    Run one CodeQL CLI command, raising subprocess.CalledProcessError on failure
+    If capture is set, stdout and stderr are returned as text in the CompletedProcess.
+    """
+    if backend is not None:
+        return backend.run(args, capture)
+    return subprocess.run(['codeql'] + list(args), check=True, capture_output=capture, text=capture or None)
+
+def codeql_version():
+    """
+    Return the version of the installed CodeQL CLI
+    """
+    return run_codeql(['version', '--format=terse'], capture=True).stdout.strip()
+
+# The CLI version of the database re-creation checks, asked once per process
+_fingerprint_version = []
+
+def fingerprint_version():
+    """
+    Return the CodeQL version recorded in source fingerprints, asking the CLI only once per process
+    """
+    if not _fingerprint_version:
+        _fingerprint_version.append(codeql_version())
+    return _fingerprint_version[0]
+
+def resource_args(threads=None, ram=None):
+    """
+    Build the --threads/--ram options of a CodeQL command; ram is in MB
+    """
+    args = []
+    if threads is not None:
+        args.append(f'--threads={threads}')
+    if ram is not None:
+        args.append(f'--ram={ram}')
+    return args
+
+def create_database(python_folder, codeqldb_path, threads=None, ram=None):
+    """
+    Initialize a CodeQL database for a folder containing Python code
+    The source fingerprint of an earlier database at that path is removed first, so a failed or direct
+    re-creation is never taken for the database of the fingerprinted sources (see ensure_database).
+    """
+    fingerprint_path = source_fingerprint_path(codeqldb_path)
+    if os.path.exists(fingerprint_path):
+        os.remove(fingerprint_path)
+    run_codeql(['database', 'create', codeqldb_path, '--language=python', '--overwrite', '--source-root', python_folder]
+               + resource_args(threads, ram))
+
+def analyze_database(codeqldb_path, qls_path, output_csv, threads=None, ram=None, timeout=25, compilation_cache=None,
+                     extra_args=()):
+    """
+    Run the query suite against a CodeQL database and write the results in CSV format
+    If compilation_cache is given, precompiled queries are taken from it (see query_cache.py).
+    """
+    args = ['database', 'analyze', codeqldb_path, qls_path, f'--timeout={timeout}', '--format=csv', '--output', output_csv]
+    if compilation_cache:
+        args.append(f'--compilation-cache={compilation_cache}')
+    run_codeql(args + resource_args(threads, ram) + list(extra_args))
+
+def source_fingerprint_path(codeqldb_path):
+    """
+    The source fingerprint is kept next to the database, since `--overwrite` replaces the database directory
+    """
+    return os.path.normpath(codeqldb_path) + '.source.json'
+
+def source_fingerprint(python_folder):
+    """
+    Fingerprint of the extracted sources: the folder, its .py files (rollup digest) and the CodeQL version
+    """
+    return {
+        'source_root': os.path.abspath(python_folder),
+        'digest': rollup_cache.directory_digest(python_folder),
+        'codeql_version': fingerprint_version(),
+    }
+
+def database_is_current(python_folder, codeqldb_path):
+    """
+    Check whether the database was created from the current sources of the folder
+    """
+    fingerprint_path = source_fingerprint_path(codeqldb_path)
+    if not os.path.exists(os.path.join(codeqldb_path, 'codeql-database.yml')) or not os.path.exists(fingerprint_path):
+        return False
+    try:
+        with open(fingerprint_path, 'r', encoding='utf-8') as file:
+            recorded = json.load(file)
+    except (OSError, ValueError):
+        return False
+    return recorded == source_fingerprint(python_folder)
+
+def ensure_database(python_folder, codeqldb_path, threads=None, ram=None):
+    """
+    Create the database of a folder unless it was already created from the same sources
+    :return: True if the database was (re)created, False if extraction was skipped
+    """
+    if database_is_current(python_folder, codeqldb_path):
+        print(f"Sources of '{python_folder}' are unchanged; re-using the database {codeqldb_path}")
+        return False
+    fingerprint = source_fingerprint(python_folder)
+    create_database(python_folder, codeqldb_path, threads, ram)
+    with open(source_fingerprint_path(codeqldb_path), 'w', encoding='utf-8') as file:
+        json.dump(fingerprint, file)
+    return True
+
+def list_python_files(python_folder):
+    """
+    List the .py files of a folder as paths relative to it, in a stable order
+    """
+    files = []
+    for root, dirs, names in os.walk(python_folder):
+        dirs.sort()
+        for name in sorted(names):
+            if name.endswith('.py'):
+                files.append(os.path.relpath(os.path.join(root, name), python_folder))
+    return files
+
+def count_python_files(python_folder):
     """
-    Run CodeQL analysis on a folder containing Python code."
+    Count the number of .py files in a folder and its subfolders
     """
+    py_file_count = 0
+    for root, dirs, files in os.walk(python_folder):
+        for file in files:
+            if file.endswith('.py'):
+                py_file_count += 1
+    return py_file_count
+
+def report_results(python_folder, output_csv):
+    """
+    Count and print the lines of the output CSV file and the .py files of the folder
+    """
+    # Count the number of lines in the output CSV file
+    line_count = sum(1 for row in read_csv_rows(output_csv))
+    # Count the number of .py files in the python_folder
+    py_file_count = count_python_files(python_folder)
+
+    # Print the counts and the ratio
+    print(f"Number of lines in output CSV: {line_count}")
+    print(f"Number of .py files in '{python_folder}': {py_file_count}")
+    return line_count, py_file_count
+
+def cached_analysis(cache, python_folder, qls_path):
+    """
+    Look up a folder in the analysis rollup cache
+    :return: (cache key, current digest, cached totals or None if the folder or suite changed)
+    """
+    key = 'codeql:' + os.path.abspath(python_folder)
+    digest = rollup_cache.directory_digest(python_folder) + ':' + suite_digest(qls_path)
+    cached = cache.get(key)
+    output_csv = os.path.join(python_folder, 'codeql_analysis_results.csv')
+    if cached and cached['digest'] == digest and os.path.exists(output_csv):
+        return key, digest, tuple(cached['totals'])
+    return key, digest, None
 
+def check_codeql_folder(python_folder):
+    """
+    Check that CodeQL is installed and that the folder can be analyzed
+    """
     # Check if CodeQL is installed
     if not shutil.which('codeql'):
         print("CodeQL is not installed or not found in the system PATH.")
-        return -1
-    
+        return False
+    # Ensure the raw folder exists
+    if not os.path.exists(python_folder):
+        print(f"The folder '{python_folder}' does not exist.")
+        return False
     if not os.listdir(python_folder):
         print(f"The folder '{python_folder}' is empty.")
+        return False
+    return True
+
+# run CodeQL analysis on a folder containing Python code
+def run_codeql_analysis(python_folder, codeqldb_path='', qls_path='', cache_path=None, threads=None, ram=None,
+                        query_cache_root=None, write_labels=False, evaluator_logs=False, timeout=25,
+                        timeout_history=None, query_partitions=None, isolate_partitions=False, progress=None,
+                        run_log=None):
+    
+    """
+    Run CodeQL analysis on a folder containing Python code.
+    If cache_path is given, the analysis is skipped when neither the .py files of the folder
+    nor the query suite changed since the cached run.
+    If query_cache_root is given, the suite is resolved and compiled once into that folder and re-used.
+    If write_labels is set, lists.npy and its sidecar files are written from the results (see defect_labels.py).
+    If evaluator_logs is set, the evaluator log is captured and a per-query timing table is written
+    to codeql_query_timings.csv beside the results (see evaluator_log.py); with timeout_history or
+    query_partitions, the table is built from the logs of their separate analyses.
+    timeout is the per-query --timeout in seconds. If timeout_history (a JSON file) is given, queries that
+    time out are re-run with larger budgets and the budgets are learned across runs (see adaptive_timeout.py).
+    If query_partitions is given, the suite is split into that many cost-balanced query groups that are
+    analyzed concurrently, with the costs taken from timeout_history if given (see codeql_partitioned.py);
+    isolate_partitions runs each partition on its own copy of the database.
+    If the analysis fails after writing partial results, or queries still time out at the largest budget,
+    the results are reported as incomplete and not cached.
+    If progress (a callback, e.g. codeql_progress.print_progress) or run_log (a JSON lines file) is given,
+    the CodeQL output is streamed into progress events and the wall time and peak RSS of each phase are
+    appended to run_log (see codeql_progress.py).
+    :return: (number of lines in the output CSV, number of .py files), or -1 on error
+    """
+    if (progress or run_log) and not isinstance(backend, codeql_progress.ProgressBackend):
+        return codeql_progress.run_tracked(
+            run_codeql_analysis, run_log, progress or codeql_progress.print_progress, python_folder=python_folder,
+            codeqldb_path=codeqldb_path, qls_path=qls_path, cache_path=cache_path, threads=threads, ram=ram,
+            query_cache_root=query_cache_root, write_labels=write_labels, evaluator_logs=evaluator_logs,
+            timeout=timeout, timeout_history=timeout_history, query_partitions=query_partitions,
+            isolate_partitions=isolate_partitions)
+    if not check_codeql_folder(python_folder):
         return -1
     output_csv = os.path.join(python_folder, 'codeql_analysis_results.csv')
-    # Delete the output CSV file if it exists
-    if os.path.exists(output_csv):
-        os.remove(output_csv)
-    
-    # Ensure the raw folder exists
-    if not os.path.exists(python_folder):
-        print(f"The folder '{python_folder}' does not exist.")
-        return
+
+    if cache_path:
+        cache = rollup_cache.load_cache(cache_path)
+        key, digest, totals = cached_analysis(cache, python_folder, qls_path)
+        if totals:
+            print(f"'{python_folder}' is unchanged since the last analysis. Results are in {output_csv}")
+            print(f"Number of lines in output CSV: {totals[0]}")
+            print(f"Number of .py files in '{python_folder}': {totals[1]}")
+            if write_labels and os.path.exists(output_csv):
+                defect_labels.write_defect_labels(python_folder, output_csv)
+            return totals
+
+    # Delete the output CSV file and the evaluator log of an earlier run if they exist
+    log_path = os.path.join(python_folder, 'codeql_evaluator_log.json')
+    timings_csv = os.path.join(python_folder, 'codeql_query_timings.csv')
+    for path in (output_csv, log_path, timings_csv):
+        if os.path.exists(path):
+            os.remove(path)
     
-    # Initialize CodeQL database
-    subprocess.run(['codeql', 'database', 'create', codeqldb_path, '--language=python', '--overwrite', '--source-root', python_folder], check=True)
+    suite = {'qls_path': qls_path, 'compilation_cache': None, 'compile_seconds': 0.0, 'queries': None}
+    if query_cache_root:
+        suite = query_cache.warm_up_suite(qls_path, query_cache_root, threads)
+    extra_args = [f'--evaluator-log={log_path}'] if evaluator_logs else []
+
+    # Initialize CodeQL database, unless it was created from the same sources
+    ensure_database(python_folder, codeqldb_path, threads, ram)
+    start = time.time()
+    complete = True
     try:
         # Run CodeQL query for CWE errors
         # csv format
-        subprocess.run(['codeql', 'database', 'analyze', codeqldb_path, qls_path, '--timeout=25', '--format=csv', '--output', output_csv], check=True)
+        if query_partitions:
+            failed = codeql_partitioned.analyze_partitioned(
+                codeqldb_path, qls_path, output_csv, query_cache_root or os.path.dirname(os.path.abspath(codeqldb_path)),
+                query_partitions, timeout_history, threads, ram, timeout, isolate=isolate_partitions,
+                compilation_cache=suite['compilation_cache'], report_csv=timings_csv if evaluator_logs else None)
+            complete = failed == 0
+        elif timeout_history:
+            gave_up = adaptive_timeout.analyze_with_adaptive_timeout(
+                codeqldb_path, qls_path, output_csv, timeout_history,
+                query_cache_root or os.path.dirname(os.path.abspath(timeout_history)), timeout,
+                threads=threads, ram=ram, compilation_cache=suite['compilation_cache'],
+                report_csv=timings_csv if evaluator_logs else None)
+            complete = not gave_up
+        else:
+            analyze_database(codeqldb_path, suite['qls_path'], output_csv, threads, ram, timeout,
+                             compilation_cache=suite['compilation_cache'], extra_args=extra_args)
     except subprocess.CalledProcessError as e:
         print(f"Error running CodeQL analysis: {e}")
+        if not os.path.exists(output_csv):
+            return -1
+        complete = False
+    finally:
+        # Only a log written by this run is reported
+        if evaluator_logs and os.path.exists(log_path):
+            evaluator_log.report_query_timings(log_path, timings_csv, suite['queries'])
+    if query_cache_root:
+        print(f"Query compile time: {suite['compile_seconds']:.1f}s, evaluation time: {time.time() - start:.1f}s")
 
-    print(f"Analysis complete. Results saved to {output_csv}")
-    # Count the number of lines in the output CSV file
-    with open(output_csv, 'r', newline='', encoding='utf-8') as csvfile:
-        csv_reader = csv.reader(csvfile)
-        line_count = sum(1 for row in csv_reader)
+    if complete:
+        print(f"Analysis complete. Results saved to {output_csv}")
+    else:
+        print(f"Analysis incomplete. Partial results saved to {output_csv}")
+    line_count, py_file_count = report_results(python_folder, output_csv)
+    if write_labels:
+        defect_labels.write_defect_labels(python_folder, output_csv)
 
-    # Count the number of .py files in the python_folder
-    py_file_count = 0
-    for root, dirs, files in os.walk(python_folder):
-        for file in files:
-            if file.endswith('.py'):
-                py_file_count += 1
-    
-    # Print the counts and the ratio
-    print(f"Number of lines in output CSV: {line_count}")
-    print(f"Number of .py files in '{python_folder}': {py_file_count}")
+    if cache_path and complete:
+        cache[key] = {'digest': digest, 'totals': [line_count, py_file_count]}
+        rollup_cache.save_cache(cache_path, cache)
+    return line_count, py_file_count
     
 
 if __name__ == "__main__":
     python_folder = r'your path to the folder containing Python code' # Replace with your directory path
     codeqldb_path = r'your path to the CodeQL database' # Replace with your directory path
     qls_path = r'your path to the CodeQL query file' # Replace with your directory path
-    run_codeql_analysis(python_folder)
+    cache_path = None # Optionally, a JSON file to skip unchanged folders on re-runs
+    run_codeql_analysis(python_folder, codeqldb_path, qls_path, cache_path)
     print("Analysis done")
\ No newline at end of file
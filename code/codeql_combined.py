@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    This script analyzes many folders (e.g. every tool/group folder of the generate tree) with a single CodeQL
+    database instead of one database per folder, so JVM startup, extractor warmup and library loading are
+    paid once.
+    It performs the following tasks:
+    - Stages every folder below one staging root, each under its own prefix directory (hard links where
+      possible, copies otherwise).
+    - Creates one database over the staging root and runs the query suite once.
+    - Splits the rows of the combined CSV back into each folder's `codeql_analysis_results.csv` by path
+      prefix, rewriting the paths so that they match the output of a per-folder run.
+USAGE:
+    - Update `generate_root`, `staging_root`, `codeqldb_path` and `qls_path` in the `__main__` section.
+    - Or call `run_combined_analysis(folders, staging_root, codeqldb_path, qls_path)`.
+DEPENDENCIES:
+    - Python 3.x
+    - CodeQL CLI
+    - codeql_analyze.py, codeql_scheduler.py and records.py in the same folder
+NOTES:
+    - Only .py files are staged, into a `.codeql_staging` folder below the staging root that is recreated
+      on every run.
+    - A group folder nested in another one is staged once, under its own prefix only.
+    - Queries that look across files (e.g. duplicate code, cyclic imports) can see files of other folders
+      in the combined database. The suite's queries are per-file for our purposes.
+"""
+
+import os
+import shutil
+import subprocess
+
+import codeql_analyze
+from codeql_scheduler import find_group_folders
+from records import read_csv_rows, rewrite_message_links, write_csv_rows
+
+# Folder created below the staging root for the staged files
+STAGING_DIR = '.codeql_staging'
+
+
+def link_or_copy(source, target):
+    """
+    Hard-link a file, falling back to a copy across file systems
+    """
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def stage_files(pairs, staging_root):
+    """
+    Stage files into a fresh STAGING_DIR folder below the staging root
+    Only that folder is deleted and recreated, never the staging root itself.
+    :param pairs: iterable of (source path, path relative to the staging folder)
+    :return: the staging folder
+    """
+    staging_dir = os.path.join(staging_root, STAGING_DIR)
+    if os.path.exists(staging_dir):
+        shutil.rmtree(staging_dir)
+    os.makedirs(staging_dir)
+    for source, relative in pairs:
+        target = os.path.join(staging_dir, relative)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        link_or_copy(source, target)
+    return staging_dir
+
+
+def own_python_files(folder, group_folders):
+    """
+    List the .py files of a folder without the files of the other group folders nested in it
+    """
+    root = os.path.abspath(folder)
+    nested = [os.path.relpath(other, root) + os.sep for other in map(os.path.abspath, group_folders)
+              if other.startswith(root + os.sep)]
+    return [relative for relative in codeql_analyze.list_python_files(folder)
+            if not any(relative.startswith(prefix) for prefix in nested)]
+
+
+def split_rows_by_prefix(rows, prefixes):
+    """
+    Split result rows by the first component of their path
+    :param prefixes: dict of prefix -> key
+    :return: dict of key -> list of rows with the prefix removed from the path and from the location links
+             of the message
+    """
+    split = {key: [] for key in prefixes.values()}
+    for row in rows:
+        path = row[4].lstrip('/')
+        prefix, _, rest = path.partition('/')
+        key = prefixes.get(prefix)
+        if key is None:
+            print(f"Result outside every staged folder: {row[4]}")
+            continue
+        message = rewrite_message_links(row[3], lambda link: link[len(prefix) + 1:]
+                                        if link.startswith(prefix + '/') else None)
+        split[key].append(row[:3] + [message, '/' + rest] + row[5:])
+    return split
+
+
+def run_combined_analysis(folders, staging_root, codeqldb_path, qls_path, threads=None, ram=None, timeout=25):
+    """
+    Analyze many folders with one CodeQL database and write each folder's codeql_analysis_results.csv
+    :return: dict of folder -> (number of lines in the output CSV, number of .py files), or -1 on error
+    """
+    prefixes = {}
+    pairs = []
+    for index, folder in enumerate(folders):
+        if not codeql_analyze.check_codeql_folder(folder):
+            continue
+        prefix = f"f{index:05d}"
+        prefixes[prefix] = folder
+        for relative in own_python_files(folder, folders):
+            pairs.append((os.path.join(folder, relative), os.path.join(prefix, relative)))
+    if not pairs:
+        print("No Python files to analyze.")
+        return {folder: -1 for folder in folders}
+
+    staging_dir = stage_files(pairs, staging_root)
+    combined_csv = os.path.join(staging_dir, 'codeql_analysis_results.csv')
+    codeql_analyze.create_database(staging_dir, codeqldb_path, threads, ram)
+    try:
+        codeql_analyze.analyze_database(codeqldb_path, qls_path, combined_csv, threads, ram, timeout)
+    except subprocess.CalledProcessError as e:
+        print(f"Error running CodeQL analysis: {e}")
+        if not os.path.exists(combined_csv):
+            return {folder: -1 for folder in folders}
+
+    split = split_rows_by_prefix(read_csv_rows(combined_csv), prefixes)
+    results = {folder: -1 for folder in folders}
+    for folder, rows in split.items():
+        output_csv = os.path.join(folder, 'codeql_analysis_results.csv')
+        write_csv_rows(output_csv, rows)
+        results[folder] = codeql_analyze.report_results(folder, output_csv)
+    return results
+
+
+if __name__ == "__main__":
+    generate_root = r'your path to the generate folder' # Replace with your directory path
+    staging_root = r'your path to a staging folder' # Replace with your directory path
+    codeqldb_path = r'your path to the CodeQL database' # Replace with your directory path
+    qls_path = r'your path to the CodeQL query file' # Replace with your directory path
+
+    results = run_combined_analysis(find_group_folders(generate_root), staging_root, codeqldb_path, qls_path)
+    print(f"Analyzed {sum(1 for result in results.values() if result != -1)} of {len(results)} folders")
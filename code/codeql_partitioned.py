@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    This script runs the query suite against one database as K concurrent `codeql database analyze` processes,
+    so all cores are used even when there is a single folder to analyze.
+    It performs the following tasks:
+    - Resolves the suite into its queries (cached by `query_cache.py`).
+    - Estimates the cost of every query from the timing history of `adaptive_timeout.py` where available
+      (queries without history get the median cost).
+    - Partitions the queries into K groups of balanced total cost (most expensive first, each into the
+      currently cheapest group) and writes one query list suite per group.
+    - Runs the K analyses concurrently against the same finalized database, each with its own output file
+      and its share of `--threads`/`--ram`, and records their timings in the history.
+    - Merges the partial results into one results CSV without duplicate rows.
+USAGE:
+    analyze_partitioned(codeqldb_path, qls_path, output_csv, cache_root, partitions=4)
+    Or pass `query_partitions` to `run_codeql_analysis` of `codeql_analyze.py`.
+DEPENDENCIES:
+    - Python 3.x
+    - CodeQL CLI
+    - adaptive_timeout.py, codeql_analyze.py, codeql_scheduler.py, evaluator_log.py, query_cache.py,
+      records.py and rollup_cache.py in the same folder
+NOTES:
+    - Queries are partitioned like the files of `codeql_sharded.py`, with evaluation time as the size.
+    - If the CLI refuses concurrent evaluations on one database, pass `isolate=True`: every partition after
+      the first then runs on its own copy of the database.
+"""
+
+import heapq
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import adaptive_timeout
+import codeql_analyze
+import codeql_scheduler
+import evaluator_log
+import query_cache
+import rollup_cache
+from records import merge_csv_rows, write_csv_rows
+
+
+def query_costs(queries, history):
+    """
+    Estimated evaluation time of every query in milliseconds, from the timing history
+    """
+    known = {query: history[query]['millis'] for query in queries if history.get(query, {}).get('millis')}
+    default = statistics.median(known.values()) if known else 1
+    return {query: known.get(query, default) for query in queries}
+
+
+def partition_queries(costs, partitions):
+    """
+    Split queries into partitions of balanced total cost
+    :param costs: dict of query -> estimated cost
+    :return: list of partitions, each a sorted list of queries
+    """
+    partitions = max(1, min(partitions, len(costs)))
+    heap = [(0, index) for index in range(partitions)]
+    members = [[] for _ in range(partitions)]
+    for query in sorted(costs, key=lambda query: (-costs[query], query)):
+        total, index = heapq.heappop(heap)
+        members[index].append(query)
+        heapq.heappush(heap, (total + costs[query], index))
+    return [sorted(queries) for queries in members]
+
+
+def analyze_partition(codeqldb_path, queries, index, work_dir, threads, ram, timeout, compilation_cache=None):
+    """
+    Analyze the database with one group of queries
+    :return: (part CSV path or None, timing rows of the run, True if the analysis completed)
+    """
+    suite_path = query_cache.write_query_list_suite(queries, os.path.join(work_dir, f"part{index}.qls"),
+                                                    f"Query partition {index}")
+    part_csv = os.path.join(work_dir, f"part{index}.csv")
+    log_path = os.path.join(work_dir, f"part{index}_evaluator_log.json")
+    complete = True
+    try:
+        codeql_analyze.analyze_database(codeqldb_path, suite_path, part_csv, threads, ram, timeout, compilation_cache,
+                                        extra_args=[f'--evaluator-log={log_path}'])
+    except subprocess.CalledProcessError as e:
+        print(f"Error running CodeQL analysis of query partition {index}: {e}")
+        complete = False
+    rows = []
+    if os.path.exists(log_path):
+        summary_path = evaluator_log.summarize_evaluator_log(log_path)
+        rows = evaluator_log.query_timing_table(summary_path, log_path, queries)
+    return (part_csv if os.path.exists(part_csv) else None), rows, complete
+
+
+def analyze_partitioned(codeqldb_path, qls_path, output_csv, cache_root, partitions=None, history_path=None,
+                        total_threads=None, total_ram=None, timeout=25, max_timeout=600, isolate=False,
+                        compilation_cache=None, report_csv=None):
+    """
+    Analyze a database with the suite split into cost-balanced query partitions run concurrently
+    :param history_path: timing history JSON of adaptive_timeout.py, read for costs and updated afterwards
+    :param report_csv: optional per-query timing report of all partitions (see evaluator_log.py)
+    :return: number of partitions that failed, with or without partial results
+    """
+    cache_dir = query_cache.suite_cache_dir(qls_path, cache_root)
+    queries = query_cache.resolve_suite(qls_path, cache_dir)
+    history = rollup_cache.load_cache(history_path) if history_path else {}
+    total_threads = total_threads or os.cpu_count() or 1
+    total_ram = total_ram or codeql_scheduler.total_memory_mb() * 3 // 4
+    groups = partition_queries(query_costs(queries, history), partitions or total_threads)
+    threads = max(1, total_threads // len(groups))
+    ram = max(512, total_ram // len(groups))
+
+    with tempfile.TemporaryDirectory(prefix='codeql_partitions_') as work_dir:
+        databases = [codeqldb_path]
+        for index in range(1, len(groups)):
+            if isolate:
+                copy_path = os.path.join(work_dir, f"db{index}")
+                shutil.copytree(codeqldb_path, copy_path)
+                databases.append(copy_path)
+            else:
+                databases.append(codeqldb_path)
+        for index, group in enumerate(groups):
+            print(f"Query partition {index}: {len(group)} queries")
+        with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+            futures = [executor.submit(analyze_partition, database, group, index, work_dir, threads, ram, timeout,
+                                       compilation_cache)
+                       for index, (database, group) in enumerate(zip(databases, groups))]
+            results = [future.result() for future in futures]
+
+        part_csvs = [part_csv for part_csv, _, _ in results if part_csv]
+        write_csv_rows(output_csv, merge_csv_rows(part_csvs))
+    if history_path:
+        for _, rows, _ in results:
+            adaptive_timeout.update_history(history, rows, timeout, timeout, max_timeout)
+        rollup_cache.save_cache(history_path, history)
+    if report_csv:
+        evaluator_log.save_timing_report([row for _, rows, _ in results for row in rows], report_csv)
+    failed = sum(1 for part_csv, _, complete in results if not (part_csv and complete))
+    if failed:
+        print(f"{failed} of {len(groups)} query partitions failed or produced partial results")
+    return failed
+
+
+if __name__ == "__main__":
+    codeqldb_path = r'your path to the CodeQL database' # Replace with your directory path
+    qls_path = r'your path to the CodeQL query file' # Replace with your directory path
+    output_csv = r'your path to the output CSV file' # Replace with your file path
+    cache_root = r'your path to the query cache folder' # Replace with your directory path
+    history_path = None # Optionally, the timing history JSON file of adaptive_timeout.py
+
+    analyze_partitioned(codeqldb_path, qls_path, output_csv, cache_root, history_path=history_path)
@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    Execution backend that streams the output of every CodeQL command and reports its progress, instead of
+    blocking silently until the command ends.
+    It performs the following tasks:
+    - Starts each `codeql ...` subprocess with piped stdout/stderr and reads both line by line while it runs.
+    - Parses extraction progress (`[i/N] Extracted file ...`) and evaluation progress
+      (`[i/N eval 1.2s] Evaluation done; ...`, timed-out and cached queries) and emits structured progress
+      events: phase, files extracted or queries done out of total, elapsed seconds and ETA.
+    - Measures the wall time and the peak RSS of every child process (from `os.wait4`).
+    - Appends a metrics record per analysis (wall time and peak RSS per phase) to a JSON lines run log,
+      for capacity planning.
+USAGE:
+    run_codeql_analysis(python_folder, codeqldb_path, qls_path, progress=print_progress, run_log='runs.jsonl')
+    Or, around any orchestration (e.g. codeql_scheduler.py):
+        tracker = codeql_progress.install()
+        ...
+        codeql_progress.uninstall()
+        codeql_progress.append_run_log('runs.jsonl', tracker.metrics_record())
+DEPENDENCIES:
+    - Python 3.x
+    - CodeQL CLI
+    - codeql_analyze.py in the same folder
+NOTES:
+    - Lines that are not progress lines are echoed unchanged; progress lines are replaced by the events.
+    - `os.wait4` is not available on Windows; peak RSS is then taken from `resource` where available, or
+      left empty.
+    - An installed backend such as the CLI servers of `codeql_server.py` is wrapped: its commands are timed
+      and their progress lines are parsed when they end, but their peak RSS is not measured.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+import codeql_analyze
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+EXTRACTED = re.compile(r'(?:\[(\d+)/(\d+)\] )?Extracted file')
+EVALUATED = re.compile(r'\[(\d+)/(\d+)(?: eval [^\]]*)?\] (?:Evaluation done|Evaluation of .* timed out|'
+                       r'Loaded cached results|Found in cache)')
+PHASES = {('database', 'create'): 'create', ('database', 'analyze'): 'analyze'}
+
+
+def command_phase(args):
+    """
+    Name of the phase of a CodeQL command, e.g. 'create' for `database create`
+    """
+    words = tuple(arg for arg in args[:2] if not arg.startswith('-'))
+    return PHASES.get(words, ' '.join(words))
+
+
+def print_progress(event):
+    """
+    Default progress callback: one line per event
+    """
+    total = f"/{event['total']}" if event['total'] else ''
+    eta = f", ETA {event['eta']:.1f}s" if event['eta'] is not None else ''
+    print(f"[{event['phase']}] {event['done']}{total} {event['unit']}, {event['elapsed']:.1f}s elapsed{eta}",
+          flush=True)
+
+
+class CommandProgress:
+    """
+    Progress of one running CodeQL command, fed with its output lines
+    """
+    def __init__(self, phase, callback, start):
+        self.phase = phase
+        self.callback = callback
+        self.start = start
+        self.files = 0
+        self.queries = 0
+        self.total = None
+        self.lock = threading.Lock()
+
+    def feed(self, line):
+        """
+        Parse one output line
+        :return: True if the line was a progress line
+        """
+        match = EVALUATED.search(line)
+        if match:
+            with self.lock:
+                self.queries = max(self.queries + 1, int(match.group(1)))
+                self.total = int(match.group(2))
+                self.emit('queries', self.queries)
+            return True
+        match = EXTRACTED.search(line)
+        if match:
+            with self.lock:
+                self.files = max(self.files + 1, int(match.group(1) or 0))
+                self.total = int(match.group(2)) if match.group(2) else None
+                self.emit('files', self.files)
+            return True
+        return False
+
+    def emit(self, unit, done):
+        elapsed = time.time() - self.start
+        eta = elapsed / done * (self.total - done) if self.total else None
+        self.callback({'phase': self.phase, 'unit': unit, 'done': done, 'total': self.total,
+                       'elapsed': elapsed, 'eta': eta})
+
+
+def as_text(output):
+    """
+    Command output as text, whether the backend returned str, bytes or None
+    """
+    if output is None:
+        return ''
+    return output.decode('utf-8', errors='replace') if isinstance(output, bytes) else output
+
+
+def peak_rss_mb(usage):
+    """
+    Peak RSS in MB from a resource usage (ru_maxrss is in KB on Linux and in bytes on macOS)
+    """
+    return round(usage.ru_maxrss / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10), 1)
+
+
+def wait_with_usage(process):
+    """
+    Wait for a child process
+    :return: peak RSS of the child in MB, or None if it cannot be measured
+    """
+    if hasattr(os, 'wait4'):
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        return peak_rss_mb(usage)
+    process.wait()
+    # The largest child so far, which is this one unless an earlier child was larger
+    return peak_rss_mb(resource.getrusage(resource.RUSAGE_CHILDREN)) if resource else None
+
+
+class ProgressBackend:
+    """
+    Runs CodeQL commands as streamed subprocesses, emitting progress events and recording metrics
+    """
+    def __init__(self, callback=print_progress, codeql='codeql', inner=None):
+        """
+        :param inner: optional backend to wrap (e.g. a codeql_server.ServerPool); its commands are timed
+                      and their output is parsed when they end, without peak RSS
+        """
+        self.callback = callback
+        self.codeql = codeql
+        self.inner = inner
+        self.commands = []
+        self.lock = threading.Lock()
+        self.start = time.time()
+
+    def pump(self, stream, progress, output, collected):
+        for line in iter(stream.readline, ''):
+            if collected is not None:
+                collected.append(line)
+            elif not progress.feed(line):
+                output.write(line)
+                output.flush()
+
+    def run(self, args, capture=False):
+        """
+        Run one CodeQL command with streamed output
+        :return: subprocess.CompletedProcess; raises subprocess.CalledProcessError on failure
+        """
+        args = list(args)
+        start = time.time()
+        progress = CommandProgress(command_phase(args), self.callback, start)
+        if self.inner is not None:
+            return self.run_inner(args, capture, progress)
+        process = subprocess.Popen([self.codeql] + args, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True, errors='replace')
+        stdout_lines = [] if capture else None
+        stderr_lines = []
+        stdout_thread = threading.Thread(target=self.pump,
+                                         args=(process.stdout, progress, sys.stdout, stdout_lines), daemon=True)
+        stdout_thread.start()
+        for line in iter(process.stderr.readline, ''):
+            stderr_lines.append(line)
+            if not progress.feed(line) and not capture:
+                sys.stderr.write(line)
+                sys.stderr.flush()
+        stdout_thread.join()
+        peak = wait_with_usage(process)
+
+        self.record(progress, peak, process.returncode)
+        stdout = ''.join(stdout_lines) if capture else None
+        stderr = ''.join(stderr_lines)
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, [self.codeql] + args, stdout, stderr)
+        return subprocess.CompletedProcess([self.codeql] + args, 0, stdout, stderr if capture else None)
+
+    def run_inner(self, args, capture, progress):
+        """
+        Run one CodeQL command through the wrapped backend and parse its output once it ends
+        """
+        try:
+            result = self.inner.run(args, True)
+            returncode, command, stdout, stderr = 0, result.args, result.stdout, result.stderr
+        except subprocess.CalledProcessError as e:
+            returncode, command, stdout, stderr = e.returncode, e.cmd, e.stdout, e.stderr
+        stdout, stderr = as_text(stdout), as_text(stderr)
+        for line in stderr.splitlines(keepends=True):
+            if not progress.feed(line) and not capture:
+                sys.stderr.write(line)
+        if not capture:
+            sys.stdout.write(stdout)
+        self.record(progress, None, returncode)
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, command, stdout if capture else None, stderr)
+        return subprocess.CompletedProcess(command, 0, stdout if capture else None, stderr if capture else None)
+
+    def record(self, progress, peak, returncode):
+        with self.lock:
+            self.commands.append({'phase': progress.phase, 'wall': round(time.time() - progress.start, 3),
+                                  'peak_rss_mb': peak, 'files': progress.files, 'queries': progress.queries,
+                                  'returncode': returncode})
+
+    def metrics_record(self, **fields):
+        """
+        Metrics of every command run so far: wall time, peak RSS and counts per phase
+        The wall time of a phase is summed over its commands, so concurrent commands can exceed the total.
+        """
+        phases = {}
+        with self.lock:
+            commands = list(self.commands)
+        for command in commands:
+            phase = phases.setdefault(command['phase'], {'commands': 0, 'wall': 0.0, 'peak_rss_mb': None,
+                                                         'files': 0, 'queries': 0, 'failed': 0})
+            phase['commands'] += 1
+            phase['wall'] = round(phase['wall'] + command['wall'], 3)
+            if command['peak_rss_mb'] is not None:
+                phase['peak_rss_mb'] = max(phase['peak_rss_mb'] or 0, command['peak_rss_mb'])
+            phase['files'] += command['files']
+            phase['queries'] += command['queries']
+            phase['failed'] += int(command['returncode'] != 0)
+        peaks = [phase['peak_rss_mb'] for phase in phases.values() if phase['peak_rss_mb'] is not None]
+        record = {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'wall': round(time.time() - self.start, 3),
+                  'peak_rss_mb': max(peaks) if peaks else None, 'phases': phases}
+        record.update(fields)
+        return record
+
+
+def append_run_log(run_log, record):
+    """
+    Append one metrics record to a JSON lines run log
+    """
+    directory = os.path.dirname(os.path.abspath(run_log))
+    os.makedirs(directory, exist_ok=True)
+    with open(run_log, 'a', encoding='utf-8') as file:
+        file.write(json.dumps(record) + '\n')
+
+
+def install(callback=print_progress, codeql='codeql'):
+    """
+    Route every run_codeql call of codeql_analyze.py through a progress backend
+    An installed backend (e.g. CLI servers of codeql_server.py) is wrapped, not replaced.
+    """
+    inner = codeql_analyze.backend
+    if isinstance(inner, ProgressBackend):
+        inner = inner.inner
+    codeql_analyze.backend = ProgressBackend(callback, codeql, inner)
+    return codeql_analyze.backend
+
+
+def uninstall():
+    """
+    Go back to the wrapped backend, or to plain subprocesses
+    """
+    tracker = codeql_analyze.backend
+    codeql_analyze.backend = tracker.inner if isinstance(tracker, ProgressBackend) else tracker
+
+
+def run_tracked(analysis, run_log=None, callback=print_progress, **kwargs):
+    """
+    Run an analysis function with progress events, restoring the previous backend afterwards
+    The metrics record is appended to run_log even if the analysis raises; its error is recorded.
+    :return: the result of the analysis
+    """
+    previous = codeql_analyze.backend
+    tracker = install(callback)
+    result, error = None, None
+    try:
+        result = analysis(**kwargs)
+        return result
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        codeql_analyze.backend = previous
+        record = tracker.metrics_record(folder=kwargs.get('python_folder'),
+                                        result=list(result) if isinstance(result, tuple) else result)
+        if error:
+            record['error'] = error
+        print(f"Wall time {record['wall']:.1f}s: " + ', '.join(
+            f"{name} {phase['wall']:.1f}s" + (f" (peak RSS {phase['peak_rss_mb']:.0f} MB)"
+                                              if phase['peak_rss_mb'] is not None else '')
+            for name, phase in record['phases'].items()))
+        if run_log:
+            append_run_log(run_log, record)
+
+
+if __name__ == "__main__":
+    python_folder = r'your path to the folder containing Python code' # Replace with your directory path
+    codeqldb_path = r'your path to the CodeQL database' # Replace with your directory path
+    qls_path = r'your path to the CodeQL query file' # Replace with your directory path
+    run_log = r'your path to the run log' # Replace with your file path, e.g. codeql_runs.jsonl
+
+    run_tracked(codeql_analyze.run_codeql_analysis, run_log, python_folder=python_folder,
+                codeqldb_path=codeqldb_path, qls_path=qls_path)
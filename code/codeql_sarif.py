@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    SARIF output of the CodeQL analysis and a streaming parser that turns it into per-file defect labels.
+    It performs the following tasks:
+    - Runs `codeql database analyze` with SARIF output (`codeql_analysis_results.sarif` in the folder).
+    - Reads the SARIF document incrementally: each result object is decoded on its own from a sliding
+      buffer, so the whole document is never loaded into memory.
+    - Counts hits per file and per rule (keyed by query name, like the CSV results) and builds the binary
+      label vector (1 = defective, 0 = not) aligned to a stable file ordering (`list_python_files` of
+      `codeql_analyze.py`) with `hit_arrays` of `defect_labels.py`.
+USAGE:
+    - Update `python_folder`, `codeqldb_path` and `qls_path` in the `__main__` section and run the script.
+DEPENDENCIES:
+    - Python 3.x
+    - numpy
+    - CodeQL CLI
+    - codeql_analyze.py and defect_labels.py in the same folder
+"""
+
+import json
+import os
+import re
+import subprocess
+from collections import Counter
+
+import numpy as np
+
+import codeql_analyze
+import defect_labels
+
+RESULTS_KEY = re.compile(r'(?<!\\)"results"\s*:\s*\[')
+RULES_KEY = re.compile(r'(?<!\\)"rules"\s*:\s*\[')
+
+
+def analyze_database_sarif(codeqldb_path, qls_path, output_sarif, threads=None, ram=None, timeout=25,
+                           compilation_cache=None):
+    """
+    Run the query suite against a CodeQL database and write the results in SARIF format
+    """
+    args = ['database', 'analyze', codeqldb_path, qls_path, f'--timeout={timeout}', '--format=sarif-latest',
+            '--output', output_sarif]
+    if compilation_cache:
+        args.append(f'--compilation-cache={compilation_cache}')
+    codeql_analyze.run_codeql(args + codeql_analyze.resource_args(threads, ram))
+
+
+def iter_sarif_results(sarif_path, chunk_size=1 << 16):
+    """
+    Stream the result objects of every run of a SARIF file
+    Only the result currently being decoded is held in memory.
+    """
+    return iter_sarif_array(sarif_path, RESULTS_KEY, chunk_size)
+
+
+def iter_sarif_array(sarif_path, key, chunk_size=1 << 16):
+    """
+    Stream the objects of every array of a SARIF file whose key matches the key pattern
+    """
+    decoder = json.JSONDecoder()
+    with open(sarif_path, 'r', encoding='utf-8') as file:
+        buffer = ''
+        in_results = False
+        eof = False
+        while True:
+            if not in_results:
+                match = key.search(buffer)
+                if match:
+                    buffer = buffer[match.end():]
+                    in_results = True
+                    continue
+                if eof:
+                    return
+                # Keep a tail in case the key is split between two chunks
+                buffer = buffer[-32:]
+            else:
+                stripped = buffer.lstrip(' \t\r\n,')
+                if stripped.startswith(']'):
+                    buffer = stripped[1:]
+                    in_results = False
+                    continue
+                if stripped:
+                    try:
+                        result, end = decoder.raw_decode(stripped)
+                    except ValueError:
+                        if eof:
+                            raise
+                    else:
+                        buffer = stripped[end:]
+                        yield result
+                        continue
+                buffer = stripped
+                if eof:
+                    return
+            chunk = file.read(chunk_size)
+            if not chunk:
+                eof = True
+            buffer += chunk
+
+
+def result_location(result):
+    """
+    Return the (uri, start line) of the primary location of a SARIF result
+    """
+    locations = result.get('locations') or [{}]
+    physical = locations[0].get('physicalLocation', {})
+    uri = physical.get('artifactLocation', {}).get('uri', '')
+    line = physical.get('region', {}).get('startLine', 0)
+    return uri, line
+
+
+def sarif_rule_names(sarif_path):
+    """
+    Map the rule ids of a SARIF file to their query names, the rule key of the CSV results
+    :return: dict of rule id -> query name
+    """
+    names = {}
+    for rule in iter_sarif_array(sarif_path, RULES_KEY):
+        if isinstance(rule, dict) and 'id' in rule:
+            names[rule['id']] = (rule.get('shortDescription') or {}).get('text') or rule.get('name') or rule['id']
+    return names
+
+
+def sarif_hit_counts(sarif_path):
+    """
+    Count SARIF results per (file, rule)
+    :return: Counter of (uri relative to the source root, query name) -> hits
+    """
+    names = sarif_rule_names(sarif_path)
+    counts = Counter()
+    for result in iter_sarif_results(sarif_path):
+        uri, _ = result_location(result)
+        rule = result.get('ruleId') or result.get('rule', {}).get('id', '')
+        counts[uri, names.get(rule, rule)] += 1
+    return counts
+
+
+def sarif_labels(sarif_path, file_order):
+    """
+    Build per-file labels from a SARIF file, with the same labels and rule columns as defect_labels.py
+    :param file_order: list of file paths relative to the source root, defining the label order
+    :return: (labels, hits, rules): labels is a 0/1 array aligned to file_order, hits a dense
+             (files x rules) count array and rules the sorted query names of its columns
+    """
+    counts = sarif_hit_counts(sarif_path)
+    hits_iter = ((uri, rule) for (uri, rule), count in counts.items() for _ in range(count))
+    labels, (rows, cols, values), rules = defect_labels.hit_arrays(hits_iter, file_order)
+    hits = np.zeros((len(file_order), len(rules)), dtype=np.int32)
+    hits[rows, cols] = values
+    return labels, hits, rules
+
+
+def run_sarif_analysis(python_folder, codeqldb_path, qls_path, threads=None, ram=None, timeout=25):
+    """
+    Analyze a folder with SARIF output and return its per-file labels
+    :return: (file order, labels, hits, rules) as in sarif_labels, or -1 on error
+    """
+    if not codeql_analyze.check_codeql_folder(python_folder):
+        return -1
+    output_sarif = os.path.join(python_folder, 'codeql_analysis_results.sarif')
+    codeql_analyze.ensure_database(python_folder, codeqldb_path, threads, ram)
+    try:
+        analyze_database_sarif(codeqldb_path, qls_path, output_sarif, threads, ram, timeout)
+    except subprocess.CalledProcessError as e:
+        print(f"Error running CodeQL analysis: {e}")
+        if not os.path.exists(output_sarif):
+            return -1
+    file_order = codeql_analyze.list_python_files(python_folder)
+    labels, hits, rules = sarif_labels(output_sarif, file_order)
+    return file_order, labels, hits, rules
+
+
+if __name__ == "__main__":
+    python_folder = r'your path to the folder containing Python code' # Replace with your directory path
+    codeqldb_path = r'your path to the CodeQL database' # Replace with your directory path
+    qls_path = r'your path to the CodeQL query file' # Replace with your directory path
+
+    result = run_sarif_analysis(python_folder, codeqldb_path, qls_path)
+    if result != -1:
+        file_order, labels, hits, rules = result
+        print(f"Defective files: {int(labels.sum())} of {len(file_order)}")
+        for rule, total in sorted(zip(rules, hits.sum(axis=0)), key=lambda item: -item[1]):
+            print(f"  {rule}: {total}")
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    This script runs the CodeQL analysis of `codeql_analyze.py` over many folders at once (e.g. every
+    tool/group folder of the generate tree) within a CPU-thread and RAM budget.
+    It performs the following tasks:
+    - Splits the work of every folder into an extraction job (`database create`) and an analysis job
+      (`database analyze`), so that one folder's extraction overlaps with another folder's query evaluation.
+    - Runs jobs concurrently while the sum of their `--threads` and `--ram` stays within the budget.
+    - Passes each job its share of the budget as `--threads`/`--ram`.
+    - Prefers analysis jobs over new extractions, so finished folders are reported early.
+    - Optionally skips folders that are unchanged since the last run (rollup cache of `codeql_analyze.py`).
+    - Optionally resolves and compiles the query suite once before the first analysis (`query_cache.py`).
+USAGE:
+    - Update `generate_root`, `db_root` and `qls_path` in the `__main__` section and run the script.
+    - Or call `schedule_codeql_analysis(folders, db_root, qls_path, total_threads, total_ram)`.
+DEPENDENCIES:
+    - Python 3.x
+    - CodeQL CLI
+    - codeql_analyze.py in the same folder
+NOTES:
+    - Extraction of Python code is mostly sequential, so extraction jobs get fewer threads than analysis jobs.
+    - Every folder gets its own database below `db_root`.
+"""
+
+import hashlib
+import itertools
+import os
+import subprocess
+import threading
+import time
+
+import codeql_analyze
+import defect_labels
+import evaluator_log
+import query_cache
+import rollup_cache
+
+CREATE, ANALYZE = 'create', 'analyze'
+
+
+class ResourceBudget:
+    """
+    A pool of CPU threads and RAM (MB) that jobs take before running and give back afterwards
+    Callers hold `condition` while using it.
+    """
+
+    def __init__(self, threads, ram):
+        self.threads = threads
+        self.ram = ram
+        self.free_threads = threads
+        self.free_ram = ram
+        self.condition = threading.Condition()
+
+    def fits(self, threads, ram):
+        return threads <= self.free_threads and ram <= self.free_ram
+
+    def take(self, threads, ram):
+        self.free_threads -= threads
+        self.free_ram -= ram
+
+    def give_back(self, threads, ram):
+        self.free_threads += threads
+        self.free_ram += ram
+
+
+def total_memory_mb():
+    """
+    Physical memory of the machine in MB, or 8192 if it cannot be determined
+    """
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // 2 ** 20
+    except (AttributeError, ValueError, OSError):
+        return 8192
+
+
+def database_path(db_root, python_folder):
+    """
+    A database directory below db_root that is unique for the folder
+    """
+    folder = os.path.abspath(python_folder)
+    suffix = hashlib.sha1(folder.encode('utf-8')).hexdigest()[:8]
+    return os.path.join(db_root, f"{os.path.basename(folder)}-{suffix}")
+
+
+def find_group_folders(root):
+    """
+    Find every folder below root that directly contains .py files
+    """
+    folders = []
+    for folder, dirs, files in os.walk(root):
+        dirs.sort()
+        if any(file.endswith('.py') for file in files):
+            folders.append(folder)
+    return folders
+
+
+def job_shares(total_threads, total_ram, max_jobs):
+    """
+    Split the budget into per-job --threads/--ram values
+    :return: dict of job kind -> (threads, ram)
+    """
+    max_jobs = max(1, max_jobs)
+    analyze_threads = max(1, total_threads // max_jobs)
+    create_threads = max(1, analyze_threads // 2)
+    ram = max(512, total_ram // max_jobs)
+    return {CREATE: (create_threads, ram), ANALYZE: (analyze_threads, ram)}
+
+
+def schedule_codeql_analysis(folders, db_root, qls_path, total_threads=None, total_ram=None, max_jobs=None,
+                             cache_path=None, timeout=25, query_cache_root=None, write_labels=False,
+                             evaluator_logs=False, incomplete=None):
+    """
+    Run CodeQL extraction and analysis of many folders concurrently within a thread and RAM budget
+    If query_cache_root is given, the suite is resolved and compiled once before any analysis job starts.
+    If write_labels is set, every analyzed folder gets its lists.npy defect labels.
+    If evaluator_logs is set, every analyzed folder gets its codeql_query_timings.csv.
+    If incomplete (a set) is given, folders whose analysis failed after writing partial results are added
+    to it; their results are reported but not cached.
+    :param total_threads: CPU threads available to all jobs together (default: all cores)
+    :param total_ram: RAM in MB available to all jobs together (default: three quarters of physical memory)
+    :param max_jobs: number of jobs that may share the budget (default: half the threads)
+    :return: dict of folder -> (number of lines in the output CSV, number of .py files), or -1 on error
+    """
+    total_threads = total_threads or os.cpu_count() or 1
+    total_ram = total_ram or total_memory_mb() * 3 // 4
+    max_jobs = max_jobs or max(1, total_threads // 2)
+    shares = job_shares(total_threads, total_ram, max_jobs)
+    budget = ResourceBudget(total_threads, total_ram)
+    cache = rollup_cache.load_cache(cache_path) if cache_path else None
+    os.makedirs(db_root, exist_ok=True)
+    suite = {'qls_path': qls_path, 'compilation_cache': None, 'compile_seconds': 0.0, 'queries': None}
+    if query_cache_root:
+        suite = query_cache.warm_up_suite(qls_path, query_cache_root, total_threads)
+    evaluate_seconds = [0.0]
+
+    results = {}
+    cache_keys = {}
+    # Ready jobs ordered by (priority, sequence): analysis jobs (0) before extraction jobs (1)
+    ready = []
+    sequence = itertools.count()
+    running = [0]
+    done = threading.Event()
+
+    for folder in folders:
+        if not codeql_analyze.check_codeql_folder(folder):
+            results[folder] = -1
+            continue
+        if cache is not None:
+            key, digest, totals = codeql_analyze.cached_analysis(cache, folder, qls_path)
+            if totals:
+                print(f"'{folder}' is unchanged since the last analysis.")
+                results[folder] = totals
+                output_csv = os.path.join(folder, 'codeql_analysis_results.csv')
+                if write_labels and os.path.exists(output_csv):
+                    defect_labels.write_defect_labels(folder, output_csv)
+                continue
+            cache_keys[folder] = (key, digest)
+        ready.append((1, next(sequence), CREATE, folder))
+
+    def run_job(kind, folder, threads, ram):
+        db_path = database_path(db_root, folder)
+        output_csv = os.path.join(folder, 'codeql_analysis_results.csv')
+        next_job = None
+        start = time.time()
+        try:
+            if kind == CREATE:
+                if os.path.exists(output_csv):
+                    os.remove(output_csv)
+                codeql_analyze.ensure_database(folder, db_path, threads, ram)
+                next_job = (0, next(sequence), ANALYZE, folder)
+            else:
+                log_path = os.path.join(folder, 'codeql_evaluator_log.json')
+                extra_args = [f'--evaluator-log={log_path}'] if evaluator_logs else []
+                # Only a log written by this run is reported
+                if os.path.exists(log_path):
+                    os.remove(log_path)
+                complete = True
+                try:
+                    codeql_analyze.analyze_database(db_path, suite['qls_path'], output_csv, threads, ram, timeout,
+                                                    suite['compilation_cache'], extra_args)
+                except subprocess.CalledProcessError as e:
+                    print(f"Error running CodeQL analysis: {e}")
+                    complete = False
+                if evaluator_logs and os.path.exists(log_path):
+                    evaluator_log.report_query_timings(log_path, os.path.join(folder, 'codeql_query_timings.csv'),
+                                                       suite['queries'])
+                evaluate_seconds[0] += time.time() - start
+                if os.path.exists(output_csv):
+                    if not complete:
+                        print(f"Analysis of '{folder}' incomplete. Partial results saved to {output_csv}")
+                        if incomplete is not None:
+                            incomplete.add(folder)
+                    results[folder] = codeql_analyze.report_results(folder, output_csv)
+                    if write_labels:
+                        defect_labels.write_defect_labels(folder, output_csv)
+                    if complete and folder in cache_keys:
+                        key, digest = cache_keys[folder]
+                        cache[key] = {'digest': digest, 'totals': list(results[folder])}
+                else:
+                    results[folder] = -1
+            print(f"{kind} of '{folder}' finished in {time.time() - start:.1f}s "
+                  f"(--threads={threads} --ram={ram})")
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"Error running CodeQL {kind} for '{folder}': {e}")
+            results[folder] = -1
+        finally:
+            with budget.condition:
+                if next_job:
+                    ready.append(next_job)
+                running[0] -= 1
+                budget.give_back(threads, ram)
+                if not ready and running[0] == 0:
+                    done.set()
+                budget.condition.notify_all()
+
+    with budget.condition:
+        if not ready:
+            done.set()
+        while not done.is_set():
+            # Start every ready job that fits into the remaining budget, best priority first
+            started = False
+            for job in sorted(ready):
+                _, _, kind, folder = job
+                threads, ram = shares[kind]
+                # A job larger than the whole budget still runs alone
+                threads, ram = min(threads, budget.threads), min(ram, budget.ram)
+                if budget.fits(threads, ram):
+                    ready.remove(job)
+                    budget.take(threads, ram)
+                    running[0] += 1
+                    threading.Thread(target=run_job, args=(kind, folder, threads, ram), daemon=True).start()
+                    started = True
+            if not started:
+                budget.condition.wait()
+
+    if cache_path:
+        rollup_cache.save_cache(cache_path, cache)
+    if query_cache_root:
+        print(f"Query compile time: {suite['compile_seconds']:.1f}s, "
+              f"evaluation time (sum over jobs): {evaluate_seconds[0]:.1f}s")
+    return results
+
+
+if __name__ == "__main__":
+    generate_root = r'your path to the generate folder' # Replace with your directory path
+    db_root = r'your path to a folder for the CodeQL databases' # Replace with your directory path
+    qls_path = r'your path to the CodeQL query file' # Replace with your directory path
+
+    folders = find_group_folders(generate_root)
+    incomplete = set()
+    results = schedule_codeql_analysis(folders, db_root, qls_path, incomplete=incomplete)
+    failed = [folder for folder, result in results.items() if result == -1]
+    print(f"Analyzed {len(results) - len(failed)} of {len(results)} folders")
+    for folder in failed:
+        print(f"Failed: {folder}")
+    for folder in sorted(incomplete):
+        print(f"Incomplete: {folder}")
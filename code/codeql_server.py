@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    Execution backend that keeps CodeQL CLI server processes (`codeql execute cli-server`) alive and sends
+    every CodeQL command through them, instead of starting a new JVM for each `codeql ...` subprocess.
+    It performs the following tasks:
+    - Keeps a pool of CLI servers: each command takes an idle server, so the concurrent scheduler
+      (`codeql_scheduler.py`) keeps running commands in parallel.
+    - Sends each command as a JSON array of arguments terminated by a NUL byte and reads its stdout up to
+      the NUL byte that marks the end of the command.
+    - Collects the stderr of each command, and reports stdout, stderr and failures per command as a
+      `subprocess.CompletedProcess` / `subprocess.CalledProcessError`, like `run_codeql` does.
+    - Restarts a server that died (a failed command ends the server process).
+USAGE:
+    import codeql_server
+    codeql_server.install()     # route run_codeql of codeql_analyze.py through CLI servers
+    ... run_codeql_analysis / schedule_codeql_analysis as usual ...
+    codeql_server.uninstall()   # stop the servers and go back to one subprocess per command
+DEPENDENCIES:
+    - Python 3.x
+    - CodeQL CLI
+    - codeql_analyze.py in the same folder
+NOTES:
+    - `execute cli-server` is an internal CodeQL command used by the VS Code extension; its protocol is not
+      documented and may change between CLI versions. Run `python codeql_server.py` to compare the
+      per-command overhead of both backends on the installed CLI.
+    - The server cannot report an exit code for a command, so a command is treated as failed when the
+      server exits before answering.
+    - stderr is read by a background thread, so the last stderr lines of a successful command may be
+      reported with the next command.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import codeql_analyze
+
+
+class CodeQLServer:
+    """
+    One `codeql execute cli-server` process running one command at a time
+    """
+    def __init__(self, codeql='codeql'):
+        self.codeql = codeql
+        self.process = None
+        self.stderr_thread = None
+        self.stderr_lines = []
+        self.stderr_lock = threading.Lock()
+
+    def start(self):
+        self.process = subprocess.Popen([self.codeql, 'execute', 'cli-server'], stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.stderr_thread = threading.Thread(target=self.read_stderr, args=(self.process,), daemon=True)
+        self.stderr_thread.start()
+
+    def read_stderr(self, process):
+        for line in iter(process.stderr.readline, b''):
+            with self.stderr_lock:
+                self.stderr_lines.append(line)
+
+    def take_stderr(self):
+        with self.stderr_lock:
+            lines, self.stderr_lines = self.stderr_lines, []
+        return b''.join(lines).decode('utf-8', errors='replace')
+
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def run(self, args, capture=False):
+        """
+        Run one CodeQL command in the server
+        :return: subprocess.CompletedProcess; raises subprocess.CalledProcessError if the server died
+        """
+        if not self.alive():
+            self.start()
+        self.take_stderr()
+        command = ['codeql'] + list(args)
+        try:
+            self.process.stdin.write(json.dumps(list(args)).encode('utf-8') + b'\0')
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            pass
+        output = bytearray()
+        completed = False
+        fd = self.process.stdout.fileno()
+        while True:
+            chunk = os.read(fd, 1 << 16)
+            if not chunk:
+                break
+            end = chunk.find(b'\0')
+            if end >= 0:
+                output += chunk[:end]
+                completed = True
+                break
+            output += chunk
+        if not completed:
+            self.process.wait()
+            self.stderr_thread.join(timeout=5)
+        stdout = output.decode('utf-8', errors='replace')
+        stderr = self.take_stderr()
+        if not capture:
+            sys.stdout.write(stdout)
+            sys.stderr.write(stderr)
+            stdout = stderr = None
+        if not completed:
+            returncode = self.process.returncode or 1
+            self.process = None
+            raise subprocess.CalledProcessError(returncode, command, stdout, stderr)
+        return subprocess.CompletedProcess(command, 0, stdout, stderr)
+
+    def close(self):
+        if self.alive():
+            try:
+                self.process.stdin.write(json.dumps(['shutdown']).encode('utf-8') + b'\0')
+                self.process.stdin.close()
+                self.process.wait(timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+        self.process = None
+
+
+class ServerPool:
+    """
+    CodeQL CLI servers shared by all threads: each command takes an idle server (or starts a new one),
+    so there are as many servers as commands ever ran at the same time
+    """
+    def __init__(self, codeql='codeql'):
+        self.codeql = codeql
+        self.idle = []
+        self.servers = []
+        self.lock = threading.Lock()
+
+    def run(self, args, capture=False):
+        with self.lock:
+            if self.idle:
+                server = self.idle.pop()
+            else:
+                server = CodeQLServer(self.codeql)
+                self.servers.append(server)
+        try:
+            return server.run(args, capture)
+        finally:
+            with self.lock:
+                if server in self.servers:
+                    self.idle.append(server)
+
+    def close(self):
+        with self.lock:
+            servers, self.servers, self.idle = self.servers, [], []
+        for server in servers:
+            server.close()
+
+
+def install(codeql='codeql'):
+    """
+    Route every run_codeql call of codeql_analyze.py through a pool of CLI servers
+    """
+    uninstall()
+    codeql_analyze.backend = ServerPool(codeql)
+    return codeql_analyze.backend
+
+
+def uninstall():
+    """
+    Stop the CLI servers and go back to one subprocess per CodeQL command
+    """
+    pool, codeql_analyze.backend = codeql_analyze.backend, None
+    if pool is not None:
+        pool.close()
+
+
+def compare_overhead(runs=10):
+    """
+    Time a trivial command through subprocesses and through a CLI server
+    """
+    start = time.time()
+    for _ in range(runs):
+        codeql_analyze.codeql_version()
+    subprocess_seconds = (time.time() - start) / runs
+    install()
+    try:
+        codeql_analyze.codeql_version()
+        start = time.time()
+        for _ in range(runs):
+            codeql_analyze.codeql_version()
+        server_seconds = (time.time() - start) / runs
+    finally:
+        uninstall()
+    print(f"Per-command overhead: subprocess {subprocess_seconds:.3f}s, CLI server {server_seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    compare_overhead()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    This script analyzes one large folder (e.g. a generate tree with tens of thousands of files) by splitting
+    it into shards, because a single `codeql database create` extracts with limited parallelism.
+    It performs the following tasks:
+    - Splits the .py files of the folder into N shards of balanced size in bytes (largest files first,
+      each into the currently smallest shard).
+    - Stages every shard below a staging root (hard links where possible, copies otherwise), keeping the
+      paths relative to the folder.
+    - Creates and analyzes the shard databases concurrently with the scheduler of `codeql_scheduler.py`.
+    - Merges the shard results into one `codeql_analysis_results.csv` in the folder, without duplicate
+      rows and ordered by path and location, so the output does not depend on the shard layout.
+USAGE:
+    - Update `python_folder`, `staging_root`, `db_root` and `qls_path` in the `__main__` section.
+    - Or call `run_sharded_analysis(python_folder, staging_root, db_root, qls_path, shards)`.
+DEPENDENCIES:
+    - Python 3.x
+    - CodeQL CLI
+    - codeql_analyze.py, codeql_combined.py, codeql_scheduler.py and records.py in the same folder
+NOTES:
+    - Queries that look across files (e.g. cyclic imports, duplicate code) only see the files of their own
+      shard. The suite's queries are per-file for our purposes.
+"""
+
+import heapq
+import os
+
+import codeql_analyze
+from codeql_combined import stage_files
+from codeql_scheduler import schedule_codeql_analysis
+from records import merge_csv_rows, write_csv_rows
+
+
+def balanced_shards(sizes, shards):
+    """
+    Split files into shards of balanced total size
+    :param sizes: dict of relative path -> size in bytes
+    :return: list of shards, each a sorted list of relative paths
+    """
+    shards = max(1, min(shards, len(sizes)))
+    heap = [(0, index) for index in range(shards)]
+    members = [[] for _ in range(shards)]
+    for path in sorted(sizes, key=lambda path: (-sizes[path], path)):
+        total, index = heapq.heappop(heap)
+        members[index].append(path)
+        heapq.heappush(heap, (total + sizes[path], index))
+    return [sorted(paths) for paths in members]
+
+
+def run_sharded_analysis(python_folder, staging_root, db_root, qls_path, shards=None, total_threads=None,
+                         total_ram=None, timeout=25, incomplete=None):
+    """
+    Analyze a folder as N concurrently built and analyzed shards and merge the results
+    If a shard analysis fails after writing partial results, the merged results are reported as incomplete
+    and the folder is added to incomplete (a set), if given.
+    :param shards: number of shards (default: one per scheduler job, i.e. half the CPU threads)
+    :return: (number of lines in the output CSV, number of .py files), or -1 on error
+    """
+    if not codeql_analyze.check_codeql_folder(python_folder):
+        return -1
+    files = codeql_analyze.list_python_files(python_folder)
+    if not files:
+        print(f"No Python files in '{python_folder}'.")
+        return -1
+    total_threads = total_threads or os.cpu_count() or 1
+    shards = shards or max(1, total_threads // 2)
+    sizes = {path: os.path.getsize(os.path.join(python_folder, path)) for path in files}
+    members = balanced_shards(sizes, shards)
+
+    shard_names = [f"s{index:03d}" for index in range(len(members))]
+    staging_dir = stage_files(((os.path.join(python_folder, path), os.path.join(shard_name, path))
+                               for shard_name, paths in zip(shard_names, members) for path in paths), staging_root)
+    shard_folders = [os.path.join(staging_dir, shard_name) for shard_name in shard_names]
+    for shard_folder, paths in zip(shard_folders, members):
+        print(f"Shard '{shard_folder}': {len(paths)} files, {sum(sizes[path] for path in paths)} bytes")
+
+    incomplete_shards = set()
+    results = schedule_codeql_analysis(shard_folders, db_root, qls_path, total_threads, total_ram,
+                                       max_jobs=len(shard_folders), timeout=timeout, incomplete=incomplete_shards)
+    failed = [folder for folder in shard_folders if results.get(folder, -1) == -1]
+    if failed:
+        print(f"CodeQL analysis failed for {len(failed)} of {len(shard_folders)} shards: {', '.join(failed)}")
+        return -1
+
+    output_csv = os.path.join(python_folder, 'codeql_analysis_results.csv')
+    write_csv_rows(output_csv, merge_csv_rows(os.path.join(folder, 'codeql_analysis_results.csv')
+                                              for folder in shard_folders))
+    if incomplete_shards:
+        print(f"Analysis incomplete ({len(incomplete_shards)} of {len(shard_folders)} shards). "
+              f"Partial results saved to {output_csv}")
+        if incomplete is not None:
+            incomplete.add(python_folder)
+    else:
+        print(f"Analysis complete. Results saved to {output_csv}")
+    return codeql_analyze.report_results(python_folder, output_csv)
+
+
+if __name__ == "__main__":
+    python_folder = r'your path to the folder containing Python code' # Replace with your directory path
+    staging_root = r'your path to a staging folder' # Replace with your directory path
+    db_root = r'your path to a folder for the CodeQL databases' # Replace with your directory path
+    qls_path = r'your path to the CodeQL query file' # Replace with your directory path
+
+    run_sharded_analysis(python_folder, staging_root, db_root, qls_path)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    This script builds the `lists.npy` defect labels of a group folder from its `codeql_analysis_results.csv`.
+    It performs the following tasks:
+    - Builds the file index of the folder: every .py file in a stable order (`list_python_files`).
+    - Reads the CSV once and maps each row to a file index and a rule index with dictionary lookups
+      (`hit_arrays`, also used for SARIF results by `codeql_sarif.py`).
+    - Vectorizes the rows into a label array (1 = defective, 0 = non-defective) and a sparse
+      file x rule hit-count matrix.
+    - Writes `lists.npy`, the matrix as `lists_hits.npz` (COO arrays) and the sidecar index
+      `lists_index.json` holding the file order and the rule names.
+USAGE:
+    - Run it after `run_codeql_analysis` (or pass `write_labels=True` to it), or update `python_folder`
+      in the `__main__` section and run the script.
+DEPENDENCIES:
+    - Python 3.x
+    - numpy
+    - codeql_analyze.py and records.py in the same folder
+NOTES:
+    - Rules are identified by the query name, which is the first CSV column (the CSV has no query id).
+"""
+
+import json
+import os
+
+import numpy as np
+
+import codeql_analyze
+from records import read_csv_rows
+
+
+def hit_arrays(hits, file_order):
+    """
+    Turn the (path, rule) pairs of alerts into labels and a sparse hit-count matrix
+    Shared by the CSV and the SARIF results (codeql_sarif.py), so both give the same labels for the same alerts.
+    :param hits: iterable of (path relative to the analyzed folder, with or without a leading '/', query name)
+    :param file_order: list of .py paths relative to the analyzed folder
+    :return: (labels, (rows, cols, counts), rules), rules being the sorted query names of the columns
+    """
+    file_index = {path.replace(os.sep, '/'): i for i, path in enumerate(file_order)}
+    file_ids, rule_names = [], []
+    unknown = 0
+    for path, rule in hits:
+        i = file_index.get(path.lstrip('/'))
+        if i is None:
+            unknown += 1
+            continue
+        file_ids.append(i)
+        rule_names.append(rule)
+    if unknown:
+        print(f"{unknown} results refer to files outside the folder")
+
+    rules = sorted(set(rule_names))
+    rule_index = {rule: j for j, rule in enumerate(rules)}
+    n_files, n_rules = len(file_order), len(rules)
+    file_ids = np.asarray(file_ids, dtype=np.int64)
+    rule_ids = np.asarray([rule_index[rule] for rule in rule_names], dtype=np.int64)
+    keys, counts = np.unique(file_ids * max(n_rules, 1) + rule_ids, return_counts=True)
+    rows, cols = np.divmod(keys, max(n_rules, 1))
+
+    labels = np.zeros(n_files, dtype=np.int64)
+    labels[rows] = 1
+    return labels, (rows.astype(np.int32), cols.astype(np.int32), counts.astype(np.int32)), rules
+
+
+def vectorize_results(csv_path, file_order):
+    """
+    Turn the rows of a results CSV into labels and a sparse hit-count matrix
+    :param file_order: list of .py paths relative to the analyzed folder
+    :return: (labels, (rows, cols, counts), rules)
+    """
+    return hit_arrays(((row[4], row[0]) for row in read_csv_rows(csv_path)), file_order)
+
+
+def write_defect_labels(python_folder, csv_path=None):
+    """
+    Write lists.npy, lists_hits.npz and lists_index.json for an analyzed folder
+    :return: the label array
+    """
+    csv_path = csv_path or os.path.join(python_folder, 'codeql_analysis_results.csv')
+    file_order = codeql_analyze.list_python_files(python_folder)
+    labels, (rows, cols, counts), rules = vectorize_results(csv_path, file_order)
+
+    np.save(os.path.join(python_folder, 'lists.npy'), labels)
+    np.savez_compressed(os.path.join(python_folder, 'lists_hits.npz'), rows=rows, cols=cols, counts=counts,
+                        shape=np.array([len(file_order), len(rules)]))
+    with open(os.path.join(python_folder, 'lists_index.json'), 'w', encoding='utf-8') as file:
+        json.dump({'files': [path.replace(os.sep, '/') for path in file_order], 'rules': rules}, file, indent=1)
+    print(f"Defective files in '{python_folder}': {int(labels.sum())} of {len(labels)}")
+    return labels
+
+
+def load_hit_matrix(python_folder):
+    """
+    Load the hit-count matrix of a folder as a dense array together with its index
+    :return: (hits, files, rules)
+    """
+    with open(os.path.join(python_folder, 'lists_index.json'), 'r', encoding='utf-8') as file:
+        index = json.load(file)
+    data = np.load(os.path.join(python_folder, 'lists_hits.npz'))
+    hits = np.zeros(tuple(data['shape']), dtype=np.int32)
+    hits[data['rows'], data['cols']] = data['counts']
+    return hits, index['files'], index['rules']
+
+
+if __name__ == "__main__":
+    python_folder = r'your path to the folder containing Python code' # Replace with your directory path
+    if not os.path.exists(os.path.join(python_folder, 'codeql_analysis_results.csv')):
+        print(f"No codeql_analysis_results.csv in '{python_folder}'. Run codeql_analyze.py first.")
+        exit(1)
+    write_defect_labels(python_folder)
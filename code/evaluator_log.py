@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    Helpers to capture the CodeQL evaluator log of an analysis and to turn it into per-query timings.
+    It performs the following tasks:
+    - Runs `codeql database analyze` with `--evaluator-log` and summarizes the log with
+      `codeql generate log-summary`.
+    - Parses the summary (a stream of JSON objects, one per evaluated predicate) and attributes the time
+      and tuple counts of every predicate to the query that caused its evaluation.
+    - Reads the `@id` and `@name` metadata of .ql files, to join timings with CSV results (which carry names).
+    - Detects queries that did not complete (e.g. killed by `--timeout`) from the raw log events.
+    - Writes a sortable per-query table (wall time, tuple counts, timed-out flag) beside the results.
+DEPENDENCIES:
+    - Python 3.x
+    - CodeQL CLI
+    - codeql_analyze.py in the same folder
+"""
+
+import csv
+import json
+import os
+import re
+import subprocess
+
+import codeql_analyze
+
+METADATA_TAG = re.compile(r'@(id|name|kind|problem\.severity)\s+(.+)')
+NON_SPACE = re.compile(r'\S|\Z')
+
+
+def summarize_evaluator_log(log_path):
+    """
+    Summarize a raw evaluator log per predicate with `codeql generate log-summary`
+    :return: path of the summary file
+    """
+    summary_path = log_path + '.summary'
+    codeql_analyze.run_codeql(['generate', 'log-summary', log_path, summary_path, '--format=predicates'])
+    return summary_path
+
+
+def analyze_with_evaluator_log(codeqldb_path, qls_path, output_csv, log_path, threads=None, ram=None, timeout=25,
+                               compilation_cache=None):
+    """
+    Analyze a database while writing a structured evaluator log, then summarize the log
+    :return: path of the summary file
+    """
+    codeql_analyze.analyze_database(codeqldb_path, qls_path, output_csv, threads, ram, timeout, compilation_cache,
+                                    extra_args=[f'--evaluator-log={log_path}'])
+    return summarize_evaluator_log(log_path)
+
+
+def iter_json_objects(path, chunk_size=1 << 20):
+    """
+    Iterate over the JSON objects of a file holding a sequence of concatenated objects
+    The file is read in chunks, so evaluator logs of any size can be streamed.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as file:
+        buffer = ''
+        position = 0
+        eof = False
+        while True:
+            position = NON_SPACE.search(buffer, position).start()
+            if position < len(buffer):
+                try:
+                    item, position = decoder.raw_decode(buffer, position)
+                except ValueError:
+                    if eof:
+                        raise
+                else:
+                    yield item
+                    continue
+            elif eof:
+                return
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+
+
+def parse_log_summary(summary_path):
+    """
+    Aggregate an evaluator log summary per query
+    :return: dict of query path -> {'millis': evaluation time, 'tuples': result tuples, 'predicates': count}
+    """
+    queries = {}
+    for item in iter_json_objects(summary_path):
+        query = item.get('queryCausingWork')
+        if not query:
+            continue
+        entry = queries.setdefault(query, {'millis': 0, 'tuples': 0, 'predicates': 0})
+        entry['millis'] += item.get('millis', 0) or 0
+        entry['tuples'] += item.get('resultSize', 0) or 0
+        entry['predicates'] += 1
+    return queries
+
+
+def query_metadata(query_path):
+    """
+    Read the QLDoc metadata (@id, @name, @kind, @problem.severity) of a .ql file
+    """
+    metadata = {}
+    try:
+        with open(query_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                match = METADATA_TAG.search(line)
+                if match:
+                    metadata.setdefault(match.group(1), match.group(2).strip())
+                if line.strip().endswith('*/'):
+                    break
+    except OSError:
+        pass
+    metadata.setdefault('id', os.path.splitext(os.path.basename(query_path))[0])
+    metadata.setdefault('name', metadata['id'])
+    return metadata
+
+
+def is_timeout(value):
+    return isinstance(value, str) and 'timeout' in value.lower().replace('_', '').replace(' ', '')
+
+
+def parse_query_events(log_path):
+    """
+    Read the query start and completion events of a raw evaluator log
+    :return: dict of query path -> {'completed': bool, 'timed_out': bool}
+    """
+    queries = {}
+    for event in iter_json_objects(log_path):
+        kind = event.get('type')
+        if kind not in ('QUERY_STARTED', 'QUERY_COMPLETED'):
+            continue
+        query = event.get('queryName') or event.get('queryCausingWork')
+        if not query:
+            continue
+        entry = queries.setdefault(query, {'completed': False, 'timed_out': False})
+        if kind == 'QUERY_COMPLETED':
+            entry['completed'] = True
+            entry['timed_out'] = any(is_timeout(event.get(key)) for key in ('terminationType', 'completionType'))
+    return queries
+
+
+def timing_row(query, millis=0, tuples=0, predicates=0, timed_out=False):
+    """
+    One row of the per-query timing table, with the id and name taken from the query metadata
+    """
+    metadata = query_metadata(query)
+    return {'id': metadata['id'], 'name': metadata['name'], 'millis': millis, 'tuples': tuples,
+            'predicates': predicates, 'timed_out': int(timed_out), 'path': query}
+
+
+def query_timing_table(summary_path, log_path=None, queries=None):
+    """
+    Build the per-query timing table of an analysis
+    Queries are flagged as timed out from the termination and completion events of the logs only; a query
+    that completed close to the --timeout still counts as completed.
+    :param queries: optional list of every query of the suite, so that queries that never ran are listed too
+    :return: list of dicts sorted by wall time, slowest first
+    """
+    timings = parse_log_summary(summary_path)
+    timed_out_predicates = set()
+    for item in iter_json_objects(summary_path):
+        if is_timeout(item.get('completionType')) and item.get('queryCausingWork'):
+            timed_out_predicates.add(item['queryCausingWork'])
+    events = parse_query_events(log_path) if log_path and os.path.exists(log_path) else {}
+
+    rows = []
+    for query in sorted(set(queries or []) | set(timings) | set(events)):
+        timing = timings.get(query, {'millis': 0, 'tuples': 0, 'predicates': 0})
+        event = events.get(query)
+        timed_out = query in timed_out_predicates
+        if event is not None:
+            timed_out = timed_out or event['timed_out'] or not event['completed']
+        elif events and query not in timings:
+            # The log holds query events but this query never started
+            timed_out = True
+        rows.append(timing_row(query, timing['millis'], timing['tuples'], timing['predicates'], timed_out))
+    rows.sort(key=lambda row: -row['millis'])
+    return rows
+
+
+def write_timing_report(rows, report_csv):
+    """
+    Write the per-query timing table as CSV
+    """
+    with open(report_csv, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=['id', 'name', 'millis', 'tuples', 'predicates', 'timed_out', 'path'])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def report_query_timings(log_path, report_csv, queries=None):
+    """
+    Summarize an evaluator log, write the per-query timing table and print its highlights
+    :return: the table rows, or None if the log could not be summarized
+    """
+    try:
+        summary_path = summarize_evaluator_log(log_path)
+        rows = query_timing_table(summary_path, log_path, queries)
+    except (OSError, ValueError, subprocess.CalledProcessError) as e:
+        print(f"Error reading the evaluator log {log_path}: {e}")
+        return None
+    save_timing_report(rows, report_csv)
+    return rows
+
+
+def save_timing_report(rows, report_csv):
+    """
+    Write the per-query timing table and print its highlights
+    """
+    rows = sorted(rows, key=lambda row: -row['millis'])
+    write_timing_report(rows, report_csv)
+    print_timing_summary(rows)
+    print(f"Per-query timings saved to {report_csv}")
+
+
+def print_timing_summary(rows, top=5):
+    """
+    Print the slowest queries and every timed-out query
+    """
+    total = sum(row['millis'] for row in rows)
+    print(f"Query evaluation time: {total / 1000:.1f}s over {len(rows)} queries")
+    for row in rows[:top]:
+        print(f"  {row['id']}: {row['millis'] / 1000:.1f}s, {row['tuples']} tuples")
+    timed_out = [row['id'] for row in rows if row['timed_out']]
+    if timed_out:
+        print(f"Timed out or incomplete queries ({len(timed_out)}): {', '.join(timed_out)}")
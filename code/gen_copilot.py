@@ -4,6 +4,8 @@ import time
 import os
 import subprocess
 
+from scenario_meta import parse_scenario_name
+
 """
 DESCRIPTION:
 This script automates interactions with Visual Studio Code (VSCode) to generate code suggestions using GitHub Copilot. 
@@ -191,9 +193,11 @@ def automate_vscode_interaction(file_path, filename, fold, model='gpt4'):
     with open(file_path, 'r', encoding='utf-8') as file:
         script = file.read()
     
-    parts = filename.split('_')
-    num_lines = int(parts[1]) + 1
-    start_line = int(parts[2])
+    meta = parse_scenario_name(filename)
+    if meta is None:
+        print(f"Skipping {filename}: the name is not <id>_<numlines>_<startline>_<tag>.py")
+        return
+    _, num_lines, start_line, _ = meta
 
     copilot_call_attempt = 0
     
@@ -34,6 +34,8 @@ import time
 import os
 import subprocess
 
+from scenario_meta import parse_scenario_name
+
 def close_window():
     # Close the current cursor window
     ok = wait_for_image('accept.png', timeout=3, confidence=0.9)
@@ -105,9 +107,11 @@ def automate_cursor_interaction(file_path, filename, fold, model='gpt4'):
     with open(file_path, 'r', encoding='utf-8') as file:
         script = file.read()
     
-    parts = filename.split('_')
-    num_lines = int(parts[1]) + 1
-    start_line = int(parts[2])
+    meta = parse_scenario_name(filename)
+    if meta is None:
+        print(f"Skipping {filename}: the name is not <id>_<numlines>_<startline>_<tag>.py")
+        return
+    _, num_lines, start_line, _ = meta
 
     copilot_call_attempt = 0
     
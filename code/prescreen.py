@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    This script is a fast, pure-Python pre-screener for the cheap syntactic rules of
+    `all-security-selectors.yml`, for quick iteration (prompt tuning, checking a fresh batch of generations)
+    without building a CodeQL database.
+    It performs the following tasks:
+    - Parses every .py file of a folder with `ast` in parallel worker processes.
+    - Applies a set of syntactic rules that mirror CodeQL queries (see `RULES`), e.g. py/empty-except,
+      py/catch-base-exception, py/unused-import, py/commented-out-code, py/use-of-exec, py/insecure-protocol.
+    - Writes the alerts in the CodeQL CSV layout, with the CodeQL query names, so every consumer of
+      `codeql_analysis_results.csv` (defect labels, results store, ...) can read them.
+    - Compares the alerts with a real CodeQL results CSV and reports per-rule agreement.
+USAGE:
+    python prescreen.py <folder> [codeql_analysis_results.csv to compare with]
+    The alerts are written to `prescreen_results.csv` in the folder.
+DEPENDENCIES:
+    - Python 3.8+ (end positions of ast nodes)
+    - numpy
+    - search_COcode.py and records.py in the same folder
+NOTES:
+    - The rules approximate the CodeQL queries syntactically: there is no points-to or type information,
+      so e.g. py/flask-debug fires on any `.run(debug=True)` call. Use the agreement report to see how
+      closely each rule tracks CodeQL on your data.
+    - py/commented-out-code uses the CO code classifier of `search_COcode.py` on `#` comment blocks.
+"""
+
+import ast
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import search_COcode
+from codeql_analyze import list_python_files
+from records import read_csv_rows, write_csv_rows
+
+INSECURE_PROTOCOLS = {
+    'PROTOCOL_SSLv2': 'SSLv2', 'PROTOCOL_SSLv3': 'SSLv3', 'PROTOCOL_TLSv1': 'TLSv1', 'PROTOCOL_TLSv1_1': 'TLSv1_1',
+    'SSLv2_METHOD': 'SSLv2', 'SSLv3_METHOD': 'SSLv3', 'TLSv1_METHOD': 'TLSv1', 'TLSv1_1_METHOD': 'TLSv1_1',
+}
+ALL_INTERFACES = ('0.0.0.0', '', '::')
+
+
+def location(node):
+    """
+    CodeQL location columns (1-based, inclusive end column) of an ast node
+    """
+    return node.lineno, node.col_offset + 1, node.end_lineno, max(node.end_col_offset, 1)
+
+
+def dotted_name(node):
+    """
+    Return 'a.b.c' for a Name/Attribute chain, or None
+    """
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name):
+        parts.append(node.id)
+        return '.'.join(reversed(parts))
+    return None
+
+
+def has_comment(lines, start_line, end_line):
+    return any('#' in lines[i - 1] for i in range(start_line, min(end_line, len(lines)) + 1))
+
+
+def check_empty_except(tree, lines):
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Try) or node.orelse:
+            continue
+        for handler in node.handlers:
+            if all(isinstance(statement, ast.Pass) for statement in handler.body) \
+                    and not has_comment(lines, handler.lineno, handler.end_lineno) \
+                    and dotted_name(handler.type) not in ('StopIteration', 'GeneratorExit'):
+                yield "'except' clause does nothing but pass and there is no explanatory comment.", location(handler)
+
+
+def check_catch_base_exception(tree, lines):
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ExceptHandler) and (node.type is None or dotted_name(node.type) == 'BaseException'):
+            reraises = any(isinstance(child, ast.Raise) and child.exc is None
+                           for statement in node.body for child in ast.walk(statement))
+            if not reraises:
+                yield "Except block directly handles BaseException.", location(node)
+
+
+def check_unused_import(tree, lines):
+    used = set()
+    exported = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            used.add(node.id)
+        elif isinstance(node, ast.Assign) and any(dotted_name(target) == '__all__' for target in node.targets):
+            exported.update(item.value for item in ast.walk(node.value)
+                            if isinstance(item, ast.Constant) and isinstance(item.value, str))
+    guarded = set()
+    for node in ast.walk(tree):
+        # Imports inside try blocks are usually availability checks
+        if isinstance(node, ast.Try):
+            guarded.update(id(child) for statement in node.body for child in ast.walk(statement))
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.Import, ast.ImportFrom)) or id(node) in guarded:
+            continue
+        if isinstance(node, ast.ImportFrom) and node.module == '__future__':
+            continue
+        for alias in node.names:
+            if alias.name == '*':
+                continue
+            name = alias.asname or alias.name.split('.')[0]
+            if name not in used and name not in exported:
+                yield f"Import of '{name}' is not used.", location(node)
+
+
+def check_commented_out_code(tree, lines):
+    flags = search_COcode.comment_line_flags('\n'.join(lines))
+    block = []
+    for i, line in enumerate(lines + ['']):
+        if i < len(flags) and flags[i] == search_COcode.LINE_CODE and line.lstrip().startswith('#'):
+            block.append(i + 1)
+            continue
+        if block:
+            first, last = block[0], block[-1]
+            yield ("This comment appears to contain commented-out code.",
+                   (first, lines[first - 1].index('#') + 1, last, len(lines[last - 1].rstrip())))
+            block = []
+
+
+def check_use_of_exec(tree, lines):
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == 'exec':
+            yield "The 'exec' function is used.", location(node)
+
+
+def check_insecure_protocol(tree, lines):
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+        callee = dotted_name(node.func) or 'function'
+        for argument in list(node.args) + [keyword.value for keyword in node.keywords]:
+            if isinstance(argument, ast.Attribute) and argument.attr in INSECURE_PROTOCOLS:
+                yield (f"Insecure SSL/TLS protocol version {INSECURE_PROTOCOLS[argument.attr]} "
+                       f"specified by call to {callee}."), location(node)
+
+
+def check_flask_debug(tree, lines):
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == 'run' \
+                and any(keyword.arg == 'debug' and isinstance(keyword.value, ast.Constant) and keyword.value.value is True
+                        for keyword in node.keywords):
+            yield ("A Flask app appears to be run in debug mode. This may allow an attacker to run arbitrary code "
+                   "through the debugger."), location(node)
+
+
+def check_bind_all_interfaces(tree, lines):
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == 'bind' \
+                and node.args and isinstance(node.args[0], ast.Tuple) and node.args[0].elts:
+            host = node.args[0].elts[0]
+            if isinstance(host, ast.Constant) and host.value in ALL_INTERFACES:
+                yield f"'{host.value}' binds a socket to all interfaces.", location(node)
+
+
+def check_import_star(tree, lines):
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and any(alias.name == '*' for alias in node.names):
+            yield "Using 'from ... import *' pollutes the namespace.", location(node)
+
+
+def check_multiple_imports(tree, lines):
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import) and len(node.names) > 1:
+            yield "Multiple imports on one line.", location(node)
+
+
+def check_repeated_import(tree, lines):
+    seen = {}
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                key = (alias.name, alias.asname)
+                if key in seen:
+                    yield (f"This import of module {alias.name} is redundant, as it was previously imported "
+                           f"on line {seen[key]}."), location(node)
+                else:
+                    seen[key] = node.lineno
+
+
+def check_unnecessary_pass(tree, lines):
+    for node in ast.walk(tree):
+        for field in ('body', 'orelse', 'finalbody'):
+            body = getattr(node, field, None)
+            if not isinstance(body, list) or len(body) < 2:
+                continue
+            docstring_only = len(body) == 2 and isinstance(body[0], ast.Expr) \
+                and isinstance(body[0].value, ast.Constant) and isinstance(body[0].value.value, str)
+            if docstring_only:
+                continue
+            for statement in body:
+                if isinstance(statement, ast.Pass):
+                    yield "Unnecessary 'pass' statement.", location(statement)
+
+
+def check_exit_or_quit(tree, lines):
+    defined = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store)}
+    defined.update(alias.asname or alias.name for node in ast.walk(tree)
+                   if isinstance(node, ast.ImportFrom) for alias in node.names)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in ('exit', 'quit') \
+                and node.func.id not in defined:
+            yield (f"The '{node.func.id}' site.Quitter object may not exist if the 'site' module is not loaded "
+                   "or is modified."), location(node)
+
+
+# rule id -> (CodeQL query name, description, severity, check)
+RULES = {
+    'py/empty-except': ('Empty except', "Except doesn't do anything and has no comment",
+                        'recommendation', check_empty_except),
+    'py/catch-base-exception': ("Except block handles 'BaseException'",
+                                "Handling 'BaseException' means that system exits and keyboard interrupts may be "
+                                "mis-handled.", 'recommendation', check_catch_base_exception),
+    'py/unused-import': ('Unused import', 'Import is not required as it is not used',
+                         'recommendation', check_unused_import),
+    'py/commented-out-code': ('Commented-out code', 'Commented-out code makes the remaining code more difficult '
+                              'to read.', 'recommendation', check_commented_out_code),
+    'py/use-of-exec': ("'exec' used", "The 'exec' statement or function is used which could cause arbitrary code "
+                       "to be executed.", 'error', check_use_of_exec),
+    'py/insecure-protocol': ('Use of insecure SSL/TLS version', 'Using an insecure SSL/TLS version may leave the '
+                             'connection vulnerable to attacks.', 'warning', check_insecure_protocol),
+    'py/flask-debug': ('Flask app is run in debug mode', 'Running a Flask app in debug mode may allow an attacker '
+                       'to run arbitrary code through the Werkzeug debugger.', 'error', check_flask_debug),
+    'py/bind-socket-all-network-interfaces': ('Binding a socket to all network interfaces',
+                                              'Binding a socket to all interfaces opens it up to traffic from any '
+                                              'IPv4 address and is therefore associated with security risks.',
+                                              'warning', check_bind_all_interfaces),
+    'py/import-star-used': ("'import *' used", "Using import * prevents some analysis", 'recommendation',
+                            check_import_star),
+    'py/multiple-imports-on-line': ('Multiple imports on one line', 'Defining multiple imports on one line makes '
+                                    'code more difficult to read; PEP8 states that imports should usually be on '
+                                    'separate lines.', 'recommendation', check_multiple_imports),
+    'py/repeated-import': ('Module is imported more than once', 'Importing a module a second time has no effect '
+                           'and impairs readability', 'recommendation', check_repeated_import),
+    'py/unnecessary-pass': ('Unnecessary pass', "Unnecessary 'pass' statement", 'warning', check_unnecessary_pass),
+    'py/use-of-exit-or-quit': ('Use of exit() or quit()', 'exit() or quit() may fail if the interpreter is run '
+                               'with the -S option.', 'warning', check_exit_or_quit),
+}
+SYNTAX_ERROR = ('Syntax error', 'Syntax errors cause failures at runtime and prevent analysis of the code.', 'error')
+
+
+def prescreen_file(args):
+    """
+    Apply every rule to one file
+    :param args: (file path, path as written in the CSV)
+    :return: list of CSV rows in the CodeQL layout
+    """
+    file_path, csv_path = args
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            source = file.read()
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"Error reading file {file_path}: {e}")
+        return []
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError) as e:
+        line = getattr(e, 'lineno', None) or 1
+        column = getattr(e, 'offset', None) or 1
+        return [list(SYNTAX_ERROR) + ['Syntax Error (in Python 3).', csv_path, line, column, line, column]]
+    lines = source.splitlines()
+    rows = []
+    for name, description, severity, check in RULES.values():
+        for message, (start_line, start_column, end_line, end_column) in check(tree, lines):
+            rows.append([name, description, severity, message, csv_path, start_line, start_column, end_line, end_column])
+    return rows
+
+
+def prescreen_folder(python_folder, output_csv=None, workers=None):
+    """
+    Pre-screen every .py file of a folder and write the alerts in the CodeQL CSV layout
+    :return: the alert rows, ordered by file and location
+    """
+    files = list_python_files(python_folder)
+    jobs = [(os.path.join(python_folder, path), '/' + path.replace(os.sep, '/')) for path in files]
+    if workers == 1:
+        per_file = [prescreen_file(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            per_file = list(executor.map(prescreen_file, jobs, chunksize=64))
+    rows = [row for file_rows in per_file for row in sorted(file_rows, key=lambda row: (row[5], row[6], row[0]))]
+    output_csv = output_csv or os.path.join(python_folder, 'prescreen_results.csv')
+    write_csv_rows(output_csv, rows)
+    print(f"Pre-screened {len(files)} files: {len(rows)} alerts saved to {output_csv}")
+    return rows
+
+
+def agreement_report(prescreen_rows, codeql_csv):
+    """
+    Compare pre-screener alerts with CodeQL alerts of the rules the pre-screener implements
+    Alerts match on (query name, path, start line).
+    :return: dict of query name -> {'both', 'prescreen_only', 'codeql_only', 'precision', 'recall'}
+    """
+    names = {name for name, _, _, _ in RULES.values()} | {SYNTAX_ERROR[0]}
+    ours = Counter((row[0], row[4], int(row[5])) for row in prescreen_rows)
+    theirs = Counter((row[0], row[4], int(row[5])) for row in read_csv_rows(codeql_csv) if row[0] in names)
+    both = ours & theirs
+    report = {}
+    for name in sorted(names):
+        counts = {
+            'both': sum(n for key, n in both.items() if key[0] == name),
+            'prescreen_only': sum(n for key, n in (ours - theirs).items() if key[0] == name),
+            'codeql_only': sum(n for key, n in (theirs - ours).items() if key[0] == name),
+        }
+        if not any(counts.values()):
+            continue
+        counts['precision'] = counts['both'] / max(counts['both'] + counts['prescreen_only'], 1)
+        counts['recall'] = counts['both'] / max(counts['both'] + counts['codeql_only'], 1)
+        report[name] = counts
+    return report
+
+
+def print_agreement(report):
+    """
+    Print the agreement report as a table
+    """
+    print(f"{'Rule':45} {'both':>6} {'pre only':>9} {'CodeQL only':>12} {'precision':>10} {'recall':>7}")
+    for name, counts in report.items():
+        print(f"{name:45} {counts['both']:>6} {counts['prescreen_only']:>9} {counts['codeql_only']:>12} "
+              f"{counts['precision']:>10.2f} {counts['recall']:>7.2f}")
+
+
+if __name__ == "__main__":
+    python_folder = sys.argv[1] if len(sys.argv) > 1 else r'your path to the folder containing Python code' # Replace with your directory path
+    codeql_csv = sys.argv[2] if len(sys.argv) > 2 else None
+    if not os.path.exists(python_folder):
+        print(f"The folder '{python_folder}' does not exist.")
+        exit(1)
+
+    rows = prescreen_folder(python_folder)
+    if codeql_csv:
+        print_agreement(agreement_report(rows, codeql_csv))
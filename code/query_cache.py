@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    A persistent cache of the resolved query suite and of the compiled queries of `python-security-all.qls`.
+    Every `codeql database analyze` run otherwise re-resolves the suite and its selectors (more than 300 query
+    ids) and may recompile queries when the compilation caches are cold.
+    It performs the following tasks:
+    - Resolves the suite once (`codeql resolve queries`) and writes the query list as a flat suite file.
+    - Precompiles every query once (`codeql query compile`) into a shared compilation cache.
+    - Keys both by the suite content (including its selector files) and the CodeQL version, so a changed
+      suite or CLI gets a fresh cache.
+    - Records the compile time, so analyses can report compile-vs-evaluate time.
+USAGE:
+    suite = warm_up_suite(qls_path, cache_root)
+    analyze_database(db, suite['qls_path'], output_csv, compilation_cache=suite['compilation_cache'])
+DEPENDENCIES:
+    - Python 3.x
+    - CodeQL CLI
+    - codeql_analyze.py in the same folder
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import codeql_analyze
+
+
+def suite_cache_dir(qls_path, cache_root, version=None):
+    """
+    The cache directory of a query suite for the installed CodeQL version
+    """
+    version = version or codeql_analyze.codeql_version()
+    key = hashlib.sha1(f"{codeql_analyze.suite_digest(qls_path)}:{version}".encode('utf-8')).hexdigest()
+    return os.path.join(cache_root, key)
+
+
+def resolve_suite(qls_path, cache_dir):
+    """
+    Resolve the queries of a suite, re-using the resolved list cached in cache_dir
+    :return: list of absolute .ql paths
+    """
+    resolved_json = os.path.join(cache_dir, 'resolved.json')
+    if os.path.exists(resolved_json):
+        with open(resolved_json, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    result = codeql_analyze.run_codeql(['resolve', 'queries', qls_path, '--format=json'], capture=True)
+    queries = sorted(json.loads(result.stdout))
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(resolved_json + '.tmp', 'w', encoding='utf-8') as file:
+        json.dump(queries, file, indent=1)
+    os.replace(resolved_json + '.tmp', resolved_json)
+    return queries
+
+
+def write_query_list_suite(queries, suite_path, description='Resolved queries'):
+    """
+    Write a flat .qls file that lists queries explicitly, so it needs no selector resolution
+    """
+    with open(suite_path, 'w', encoding='utf-8') as file:
+        file.write(f"- description: {description}\n")
+        for query in queries:
+            file.write(f"- query: {json.dumps(query)}\n")
+    return suite_path
+
+
+def warm_up_suite(qls_path, cache_root, threads=None):
+    """
+    Resolve and precompile a query suite once into the shared cache
+    :return: dict with the flat suite ('qls_path'), the query list ('queries'), the compilation cache
+             directory ('compilation_cache') and the compile time of this call in seconds ('compile_seconds')
+    """
+    cache_dir = suite_cache_dir(qls_path, cache_root)
+    queries = resolve_suite(qls_path, cache_dir)
+    resolved_qls = os.path.join(cache_dir, 'resolved.qls')
+    if not os.path.exists(resolved_qls):
+        write_query_list_suite(queries, resolved_qls, f"Resolved {os.path.basename(qls_path)}")
+
+    compilation_cache = os.path.join(cache_dir, 'compiled')
+    marker = os.path.join(cache_dir, 'compiled.json')
+    compile_seconds = 0.0
+    if not os.path.exists(marker):
+        os.makedirs(compilation_cache, exist_ok=True)
+        start = time.time()
+        codeql_analyze.run_codeql(['query', 'compile', f'--compilation-cache={compilation_cache}', resolved_qls]
+                                  + codeql_analyze.resource_args(threads))
+        compile_seconds = time.time() - start
+        with open(marker, 'w', encoding='utf-8') as file:
+            json.dump({'queries': len(queries), 'compile_seconds': compile_seconds}, file)
+        print(f"Compiled {len(queries)} queries in {compile_seconds:.1f}s into {compilation_cache}")
+    return {
+        'qls_path': resolved_qls,
+        'queries': queries,
+        'compilation_cache': compilation_cache,
+        'compile_seconds': compile_seconds,
+    }
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    Compact record types shared by `search_COcode.py` and the CodeQL result handling.
+    Loading millions of comment verdicts, CodeQL alerts and scenario filenames as dicts and tuples costs
+    gigabytes, so this module offers two lighter representations:
+    - `__slots__` record classes (`CommentRecord`, `AlertRecord`, `ScenarioRecord`) for code that wants
+      one object per row.
+    - Column-oriented tables (`CommentTable`, `AlertTable`, `ScenarioTable`) that store integers in
+      `array` columns and strings as codes into shared string pools. Iterating a table yields one reusable
+      cursor object instead of materializing a record per row, and single columns can be read directly.
+    It also holds the CSV layout of `codeql database analyze --format=csv` and helpers to read and write it.
+USAGE:
+    table = AlertTable.from_csv('codeql_analysis_results.csv')
+    for alert in table:            # the same cursor object, moved from row to row
+        print(alert.path, alert.start_line)
+    rules = table.column('name')   # one column as a list
+    bench_records.py compares the memory use of these types against dicts and tuples.
+DEPENDENCIES:
+    - Python 3.x
+"""
+
+import csv
+import re
+from array import array
+
+# Columns of the CSV written by `codeql database analyze --format=csv` (the file has no header)
+CODEQL_CSV_COLUMNS = ('name', 'description', 'severity', 'message', 'path',
+                      'start_line', 'start_column', 'end_line', 'end_column')
+
+# Location link in a CSV message, e.g. [["call to open"|"relative:///src/a.py:5:1:5:20"]]
+MESSAGE_LINK = re.compile(r'"relative:///([^"|]*?)((?::\d+){4})?"')
+
+
+def read_csv_rows(csv_path):
+    """
+    Iterate over the rows of a CodeQL results CSV
+    """
+    with open(csv_path, 'r', newline='', encoding='utf-8') as csvfile:
+        for row in csv.reader(csvfile):
+            if row:
+                yield row
+
+
+def write_csv_rows(csv_path, rows):
+    """
+    Write rows in the CodeQL results CSV layout
+    """
+    with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
+        csv.writer(csvfile).writerows(rows)
+
+
+def rewrite_message_links(message, rewrite):
+    """
+    Rewrite the file paths of the location links in a CSV message
+    :param rewrite: function of a link path (relative, without a leading '/') returning the new path,
+                    or None to keep the link unchanged
+    """
+    def replace(match):
+        path = rewrite(match.group(1))
+        if path is None:
+            return match.group(0)
+        return f'"relative:///{path}{match.group(2) or ""}"'
+    return MESSAGE_LINK.sub(replace, message)
+
+
+def merge_csv_rows(csv_paths):
+    """
+    Merge results CSVs into one list of unique rows ordered by path, location, rule and message
+    """
+    rows = set()
+    for csv_path in csv_paths:
+        rows.update(tuple(row) for row in read_csv_rows(csv_path))
+    return [list(row) for row in sorted(rows, key=lambda row: (row[4], int(row[5]), int(row[6]), int(row[7]),
+                                                               int(row[8]), row[0], row[3]))]
+
+
+class CommentRecord:
+    """
+    Comment line counts of one Python file, as returned by process_python_file
+    """
+    __slots__ = ('path', 'total_comment_lines', 'natural_language_comment_lines', 'code_related_comment_lines')
+
+    def __init__(self, path, total_comment_lines, natural_language_comment_lines, code_related_comment_lines):
+        self.path = path
+        self.total_comment_lines = total_comment_lines
+        self.natural_language_comment_lines = natural_language_comment_lines
+        self.code_related_comment_lines = code_related_comment_lines
+
+
+class AlertRecord:
+    """
+    One row of a CodeQL results CSV
+    """
+    __slots__ = CODEQL_CSV_COLUMNS
+
+    def __init__(self, name, description, severity, message, path,
+                 start_line, start_column, end_line, end_column):
+        self.name = name
+        self.description = description
+        self.severity = severity
+        self.message = message
+        self.path = path
+        self.start_line = int(start_line)
+        self.start_column = int(start_column)
+        self.end_line = int(end_line)
+        self.end_column = int(end_column)
+
+    def to_row(self):
+        return [getattr(self, column) for column in CODEQL_CSV_COLUMNS]
+
+
+class ScenarioRecord:
+    """
+    The CO insertion metadata of one scenario or generated file (see scenario_meta.py)
+    """
+    __slots__ = ('path', 'group', 'dataset_id', 'num_lines', 'start_line', 'tag')
+
+    def __init__(self, path, group, dataset_id, num_lines, start_line, tag):
+        self.path = path
+        self.group = group
+        self.dataset_id = dataset_id
+        self.num_lines = num_lines
+        self.start_line = start_line
+        self.tag = tag
+
+
+class StringPool:
+    """
+    Interns strings and hands out small integer codes for them
+    """
+    __slots__ = ('codes', 'strings')
+
+    def __init__(self):
+        self.codes = {}
+        self.strings = []
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class TableCursor:
+    """
+    A movable view of one row of a ColumnTable; attribute access reads the columns at the current index
+    """
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table, index=0):
+        self._table = table
+        self._index = index
+
+    def __getattr__(self, name):
+        return self._table.value(name, self._index)
+
+    def to_record(self):
+        return self._table.record(self._index)
+
+
+class ColumnTable:
+    """
+    Column-oriented table; subclasses declare their string and integer columns and their record class
+    """
+    string_columns = ()
+    int_columns = ()
+    columns = ()
+    record_class = None
+
+    def __init__(self, pools=None):
+        # Pools can be shared between tables so that repeated strings are stored once
+        self.pools = pools if pools is not None else {}
+        self.data = {}
+        for name in self.string_columns:
+            self.pools.setdefault(name, StringPool())
+            self.data[name] = array('I')
+        for name in self.int_columns:
+            self.data[name] = array('i')
+
+    def __len__(self):
+        return len(self.data[self.columns[0]])
+
+    def append(self, row):
+        """
+        Append one row given as a sequence in `columns` order
+        """
+        for name, value in zip(self.columns, row):
+            if name in self.pools:
+                self.data[name].append(self.pools[name].encode(value))
+            else:
+                self.data[name].append(int(value))
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+        return self
+
+    def value(self, name, index):
+        """
+        Read one cell
+        """
+        if name not in self.data:
+            raise AttributeError(name)
+        if name in self.pools:
+            return self.pools[name].strings[self.data[name][index]]
+        return self.data[name][index]
+
+    def column(self, name):
+        """
+        Read a whole column as a list (strings are decoded)
+        """
+        if name in self.pools:
+            strings = self.pools[name].strings
+            return [strings[code] for code in self.data[name]]
+        return self.data[name].tolist()
+
+    def codes(self, name):
+        """
+        The raw array of a column: pool codes for string columns, values for integer columns
+        """
+        return self.data[name]
+
+    def record(self, index):
+        """
+        Materialize one row as a record object
+        """
+        return self.record_class(*(self.value(name, index) for name in self.columns))
+
+    def row(self, index):
+        return [self.value(name, index) for name in self.columns]
+
+    def __iter__(self):
+        cursor = TableCursor(self)
+        for index in range(len(self)):
+            cursor._index = index
+            yield cursor
+
+
+class CommentTable(ColumnTable):
+    """
+    Comment line counts of many Python files
+    """
+    string_columns = ('path',)
+    int_columns = ('total_comment_lines', 'natural_language_comment_lines', 'code_related_comment_lines')
+    columns = string_columns + int_columns
+    record_class = CommentRecord
+
+
+class AlertTable(ColumnTable):
+    """
+    Rows of one or more CodeQL results CSV files
+    """
+    string_columns = ('name', 'description', 'severity', 'message', 'path')
+    int_columns = ('start_line', 'start_column', 'end_line', 'end_column')
+    columns = CODEQL_CSV_COLUMNS
+    record_class = AlertRecord
+
+    @classmethod
+    def from_csv(cls, csv_path, pools=None):
+        return cls(pools).extend(read_csv_rows(csv_path))
+
+
+class ScenarioTable(ColumnTable):
+    """
+    CO insertion metadata of many scenario or generated files
+    """
+    string_columns = ('path', 'group', 'tag')
+    int_columns = ('dataset_id', 'num_lines', 'start_line')
+    columns = ('path', 'group', 'dataset_id', 'num_lines', 'start_line', 'tag')
+    record_class = ScenarioRecord
+
+    @classmethod
+    def from_meta(cls, meta, pools=None):
+        """
+        Build a table from the column arrays of scenario_meta.scan_scenarios
+        """
+        table = cls(pools)
+        for name in cls.columns:
+            values = meta[name]
+            if name in table.pools:
+                pool = table.pools[name]
+                table.data[name].extend(pool.encode(value) for value in values)
+            else:
+                table.data[name].extend(int(value) for value in values)
+        return table
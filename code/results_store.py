@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    This script consolidates every `codeql_analysis_results.csv` of the generate tree into one indexed
+    SQLite database, so cross-group questions ("which rules fire on fix-group Claude outputs but not on raw")
+    are single SQL queries instead of ad-hoc CSV scripts.
+    It performs the following tasks:
+    - Finds every `codeql_analysis_results.csv` below a root folder.
+    - Loads incrementally: a CSV is only (re)loaded when its mtime or size changed since the last ingestion,
+      and its old rows are replaced.
+    - Stores tool, group, file, dataset file id, rule, severity, message and line columns.
+    - Indexes the columns used for cross-group queries.
+TABLE:
+    alerts(csv_id, tool, grp, file, file_id, rule, severity, message, start_line, end_line)
+    - tool and grp are the two folder names above the CSV (e.g. `Claude` and `fix`).
+    - file_id is the dataset id, the filename prefix before the first `_` (NULL if it is not a number).
+USAGE:
+    python results_store.py <generate root> <database file>
+    Or call `ingest_tree(root, db_path)` and query with `open_store(db_path)`.
+DEPENDENCIES:
+    - Python 3.x
+    - records.py and scenario_meta.py in the same folder
+"""
+
+import os
+import sqlite3
+import sys
+
+from records import read_csv_rows
+from scenario_meta import parse_scenario_name
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sources (
+    csv_id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    tool TEXT NOT NULL,
+    grp TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS alerts (
+    csv_id INTEGER NOT NULL REFERENCES sources(csv_id),
+    tool TEXT NOT NULL,
+    grp TEXT NOT NULL,
+    file TEXT NOT NULL,
+    file_id INTEGER,
+    rule TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    message TEXT NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS alerts_csv ON alerts(csv_id);
+CREATE INDEX IF NOT EXISTS alerts_rule_group ON alerts(rule, tool, grp);
+CREATE INDEX IF NOT EXISTS alerts_group_file ON alerts(tool, grp, file_id);
+CREATE INDEX IF NOT EXISTS alerts_file_id ON alerts(file_id, rule);
+'''
+
+
+def open_store(db_path):
+    """
+    Open (and create if needed) the results database
+    """
+    connection = sqlite3.connect(db_path)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def find_result_csvs(root):
+    """
+    Find every codeql_analysis_results.csv below root
+    """
+    for folder, dirs, files in os.walk(root):
+        dirs.sort()
+        if 'codeql_analysis_results.csv' in files:
+            yield os.path.join(folder, 'codeql_analysis_results.csv')
+
+
+def tool_and_group(root, csv_path):
+    """
+    Derive (tool, group) from the two folder names above a CSV, e.g. GPT4/raw/codeql_analysis_results.csv
+    """
+    parts = os.path.relpath(os.path.dirname(csv_path), root).replace(os.sep, '/').split('/')
+    parts = [part for part in parts if part not in ('', '.')]
+    if not parts:
+        return '', ''
+    if len(parts) == 1:
+        return '', parts[0]
+    return '/'.join(parts[:-1]), parts[-1]
+
+
+def alert_rows(csv_id, tool, group, csv_path):
+    """
+    Convert the rows of one CSV into alerts table rows
+    """
+    for row in read_csv_rows(csv_path):
+        path = row[4].lstrip('/')
+        meta = parse_scenario_name(path)
+        file_id = meta[0] if meta else None
+        yield (csv_id, tool, group, path, file_id, row[0], row[2], row[3], int(row[5]), int(row[7]))
+
+
+def ingest_tree(root, db_path):
+    """
+    Load every changed codeql_analysis_results.csv below root into the results database
+    CSV files below root that were deleted or renamed since the last ingestion are removed with their alerts.
+    :return: (number of CSV files loaded, number of CSV files unchanged)
+    """
+    connection = open_store(db_path)
+    known = {path: (csv_id, mtime_ns, size)
+             for csv_id, path, mtime_ns, size in connection.execute('SELECT csv_id, path, mtime_ns, size FROM sources')}
+    loaded = unchanged = 0
+    seen = set()
+    with connection:
+        for csv_path in find_result_csvs(root):
+            path = os.path.abspath(csv_path)
+            seen.add(path)
+            stat = os.stat(path)
+            entry = known.get(path)
+            if entry and entry[1] == stat.st_mtime_ns and entry[2] == stat.st_size:
+                unchanged += 1
+                continue
+            tool, group = tool_and_group(root, csv_path)
+            if entry:
+                csv_id = entry[0]
+                connection.execute('DELETE FROM alerts WHERE csv_id = ?', (csv_id,))
+                connection.execute('UPDATE sources SET mtime_ns = ?, size = ?, tool = ?, grp = ? WHERE csv_id = ?',
+                                   (stat.st_mtime_ns, stat.st_size, tool, group, csv_id))
+            else:
+                csv_id = connection.execute('INSERT INTO sources (path, mtime_ns, size, tool, grp) VALUES (?, ?, ?, ?, ?)',
+                                            (path, stat.st_mtime_ns, stat.st_size, tool, group)).lastrowid
+            connection.executemany('INSERT INTO alerts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                   alert_rows(csv_id, tool, group, csv_path))
+            loaded += 1
+        prefix = os.path.join(os.path.abspath(root), '')
+        removed = [(csv_id,) for path, (csv_id, _, _) in known.items() if path.startswith(prefix) and path not in seen]
+        if removed:
+            connection.executemany('DELETE FROM alerts WHERE csv_id = ?', removed)
+            connection.executemany('DELETE FROM sources WHERE csv_id = ?', removed)
+            print(f"Removed {len(removed)} results CSV files that no longer exist below {root}")
+        connection.execute('ANALYZE')
+    connection.close()
+    return loaded, unchanged
+
+
+def rules_only_in(connection, tool, group, other_group, other_tool=None):
+    """
+    Rules that fire in one group but never in another, with their hit counts
+    e.g. rules_only_in(connection, 'Claude', 'fix', 'raw')
+    """
+    other_tool = tool if other_tool is None else other_tool
+    return connection.execute(
+        '''SELECT rule, COUNT(*) FROM alerts
+           WHERE tool = ? AND grp = ?
+             AND rule NOT IN (SELECT rule FROM alerts WHERE tool = ? AND grp = ?)
+           GROUP BY rule ORDER BY COUNT(*) DESC''',
+        (tool, group, other_tool, other_group)).fetchall()
+
+
+def rule_counts_by_group(connection, rule):
+    """
+    Hit counts and distinct dataset ids of one rule per tool and group
+    """
+    return connection.execute(
+        '''SELECT tool, grp, COUNT(*), COUNT(DISTINCT file_id) FROM alerts
+           WHERE rule = ? GROUP BY tool, grp ORDER BY tool, grp''', (rule,)).fetchall()
+
+
+if __name__ == "__main__":
+    generate_root = sys.argv[1] if len(sys.argv) > 1 else r'your path to the generate folder' # Replace with your directory path
+    db_path = sys.argv[2] if len(sys.argv) > 2 else r'your path to the results database' # Replace with your file path
+    if not os.path.exists(generate_root):
+        print(f"Directory {generate_root} does not exist.")
+        exit(1)
+
+    loaded, unchanged = ingest_tree(generate_root, db_path)
+    print(f"Loaded {loaded} result files, {unchanged} unchanged")
+    connection = open_store(db_path)
+    for tool, group, count in connection.execute('SELECT tool, grp, COUNT(*) FROM alerts GROUP BY tool, grp'):
+        print(f"{tool}/{group}: {count} alerts")
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    A hierarchical (Merkle-style) rollup cache for directory scans.
+    Every directory carries a digest combined from the stat signatures (name, size, mtime) of its files
+    and the digests of its subdirectories, together with the aggregated results of its whole subtree.
+    A re-scan only needs a stat walk: a directory whose digest is unchanged reuses its cached totals, and
+    inside a changed directory only the changed files are processed again.
+    Totals are tuples of numbers that are summed element-wise; the totals of any cached subtree are
+    available without a scan through `subtree_totals`.
+USAGE:
+    cache = load_cache('scan_cache.json')
+    digest, totals = rollup(directory, leaf_fn, cache)
+    save_cache('scan_cache.json', cache)
+DEPENDENCIES:
+    - Python 3.x
+"""
+
+import hashlib
+import json
+import os
+
+
+def load_cache(cache_path):
+    """
+    Load a rollup cache from a JSON file, or start an empty one
+    """
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable cache {cache_path}: {e}")
+    return {}
+
+
+def save_cache(cache_path, cache):
+    """
+    Write a rollup cache to a JSON file atomically
+    """
+    temp_path = cache_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(cache, file)
+    os.replace(temp_path, cache_path)
+
+
+def scan_entries(directory, suffix):
+    """
+    List the matching files and the subdirectories of a directory, sorted by name
+    :return: (list of (name, size, mtime_ns) for files, list of subdirectory paths)
+    """
+    files, subdirs = [], []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.is_file() and entry.name.endswith(suffix):
+                stat = entry.stat()
+                files.append((entry.name, stat.st_size, stat.st_mtime_ns))
+    files.sort()
+    subdirs.sort()
+    return files, subdirs
+
+
+def directory_digest(directory, suffix='.py'):
+    """
+    Compute the Merkle digest of a directory from a stat walk only
+    """
+    files, subdirs = scan_entries(directory, suffix)
+    digest = hashlib.sha1()
+    for name, size, mtime_ns in files:
+        digest.update(f"F {name} {size} {mtime_ns}\n".encode('utf-8'))
+    for subdir in subdirs:
+        digest.update(f"D {os.path.basename(subdir)} {directory_digest(subdir, suffix)}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def add_totals(totals, values):
+    """
+    Add values element-wise into totals, extending totals if needed
+    """
+    if len(totals) < len(values):
+        totals.extend([0] * (len(values) - len(totals)))
+    for i, value in enumerate(values):
+        totals[i] += value
+    return totals
+
+
+def rollup(directory, leaf_fn, cache, suffix='.py'):
+    """
+    Aggregate leaf_fn over every matching file below directory, reusing cached subtrees
+    :param leaf_fn: function of a file path returning a tuple of numbers
+    :param cache: dict loaded with load_cache; updated in place
+    :return: (digest, totals) of the directory
+    """
+    key = os.path.abspath(directory)
+    cached = cache.get(key, {})
+    files, subdirs = scan_entries(directory, suffix)
+
+    digest = hashlib.sha1()
+    child_totals = []
+    for subdir in subdirs:
+        child_digest, totals = rollup(subdir, leaf_fn, cache, suffix)
+        digest.update(f"D {os.path.basename(subdir)} {child_digest}\n".encode('utf-8'))
+        child_totals.append(totals)
+    for name, size, mtime_ns in files:
+        digest.update(f"F {name} {size} {mtime_ns}\n".encode('utf-8'))
+    digest = digest.hexdigest()
+    if cached.get('digest') == digest:
+        return digest, cached['totals']
+
+    # Something changed in this directory: reuse the unchanged files and process the rest
+    cached_files = cached.get('files', {})
+    file_results = {}
+    totals = []
+    for name, size, mtime_ns in files:
+        entry = cached_files.get(name)
+        if entry is not None and entry[0] == size and entry[1] == mtime_ns:
+            values = entry[2]
+        else:
+            values = list(leaf_fn(os.path.join(directory, name)))
+        file_results[name] = [size, mtime_ns, values]
+        add_totals(totals, values)
+    for values in child_totals:
+        add_totals(totals, values)
+
+    cache[key] = {'digest': digest, 'totals': totals, 'files': file_results}
+    return digest, totals
+
+
+def file_values(cache, directory, suffix='.py'):
+    """
+    Yield (path, values) of every matching file below a directory from a cache filled by rollup
+    """
+    files, subdirs = scan_entries(directory, suffix)
+    cached_files = cache.get(os.path.abspath(directory), {}).get('files', {})
+    for name, _, _ in files:
+        if name in cached_files:
+            yield os.path.join(directory, name), cached_files[name][2]
+    for subdir in subdirs:
+        yield from file_values(cache, subdir, suffix)
+
+
+def subtree_totals(cache, directory):
+    """
+    Return the cached totals of a directory subtree, or None if it has not been scanned
+    """
+    entry = cache.get(os.path.abspath(directory))
+    return entry['totals'] if entry else None
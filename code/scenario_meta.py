@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    Helpers for the metadata encoded in dataset and scenario filenames.
+    Every dataset file is named `<id>_<numlines>_<startline>_<tag>.py`, and generated files append
+    `_<model>_<attempt>` to the stem (see `automate_vscode_interaction` in `gen_copilot.py`).
+    The CO insertion window of a file starts at `<startline>` and spans `<numlines> + 1` lines.
+    This module parses a single filename, or every filename below a folder at once into NumPy arrays,
+    so that evaluators can join per-line or per-alert data against the windows with vectorized logic.
+DEPENDENCIES:
+    - Python 3.x
+    - numpy
+"""
+
+import os
+
+import numpy as np
+
+
+def parse_scenario_name(filename):
+    """
+    Parse the CO insertion metadata of a dataset, scenario or generated filename
+    :return: (dataset_id, num_lines, start_line, tag), where num_lines is the number of inserted lines,
+             or None if the filename does not follow the naming scheme
+    """
+    parts = os.path.basename(filename)[:-len('.py')].split('_') if filename.endswith('.py') else []
+    if len(parts) < 4:
+        return None
+    try:
+        return int(parts[0]), int(parts[1]) + 1, int(parts[2]), parts[3]
+    except ValueError:
+        return None
+
+
+def scan_scenarios(root, groups=None):
+    """
+    Parse every scenario filename below root into column arrays
+    :param groups: optional collection of group folder names (e.g. {'raw', 'fix'}) to keep
+    :return: dict of equally long np.ndarray columns:
+             path, group (name of the parent folder), dataset_id, num_lines, start_line, end_line, tag
+    """
+    paths, group_names, ids, num_lines, start_lines, tags = [], [], [], [], [], []
+    for folder, _, files in os.walk(root):
+        group = os.path.basename(folder)
+        if groups is not None and group not in groups:
+            continue
+        for file in sorted(files):
+            meta = parse_scenario_name(file)
+            if meta is None:
+                continue
+            paths.append(os.path.join(folder, file))
+            group_names.append(group)
+            ids.append(meta[0])
+            num_lines.append(meta[1])
+            start_lines.append(meta[2])
+            tags.append(meta[3])
+
+    num_lines = np.asarray(num_lines, dtype=np.int32)
+    # automate_vscode_interaction treats start line 0 as line 1
+    start_lines = np.maximum(np.asarray(start_lines, dtype=np.int32), 1)
+    return {
+        'path': np.asarray(paths, dtype=object),
+        'group': np.asarray(group_names, dtype=object),
+        'dataset_id': np.asarray(ids, dtype=np.int32),
+        'num_lines': num_lines,
+        'start_line': start_lines,
+        'end_line': start_lines + num_lines - 1,
+        'tag': np.asarray(tags, dtype=object),
+    }
@@ -7,7 +7,9 @@ Python files or entire directories containing Python files. The main features of
 3. Handling both single-line comments (starting with `#`) and multi-line comments (enclosed in triple quotes).
 4. Counting the total number of comment lines, natural language comment lines, and code-related comment lines.
 5. Calculating the ratio of code-related comment lines to the total number of comment lines.
-6. Supporting error handling for syntax errors, memory errors, and file processing errors.
+6. Building a histogram of the AST node types found in code-related comments, summed with NumPy
+   across the corpus into a CO code taxonomy (imports, calls, assignments, control flow, ...).
+7. Supporting error handling for syntax errors, memory errors, and file processing errors.
 The script is useful for analyzing the quality and purpose of comments in Python codebases, helping developers
 understand the balance between documentation and inline code explanations.
 """
@@ -15,53 +17,108 @@ import os
 import ast
 import re
 
+import numpy as np
+
+import rollup_cache
+
 white = 0
+
+# AST node types that mark a comment as code, in the order of the histogram vector
+CODE_NODE_TYPES = (
+    ast.FunctionDef,      # Function definition
+    ast.ClassDef,         # Class definition
+    ast.Assign,           # Assignment statement
+    ast.Return,           # Return statement
+    ast.If,               # If statement
+    ast.While,            # While loop
+    ast.For,              # For loop
+    ast.Try,              # Try-except statement
+    ast.Import,           # Import statement
+    ast.Call,             # Function call
+    ast.With,             # With statement
+    ast.AsyncFunctionDef, # Async function definition
+    ast.Await,            # Await expression
+    ast.AsyncFor,         # Async for loop
+    ast.AsyncWith,        # Async with statement
+    ast.Raise,            # Raise statement
+    ast.Assert,           # Assert statement
+    ast.Delete,           # Delete statement
+    ast.Global,           # Global statement
+    ast.Nonlocal,         # Nonlocal statement
+    ast.Pass,             # Pass statement
+    ast.Break,            # Break statement
+    ast.Continue,         # Continue statement
+    ast.Lambda,           # Lambda expression
+    ast.ListComp,         # List comprehension
+    ast.SetComp,          # Set comprehension
+    ast.DictComp,         # Dictionary comprehension
+    ast.GeneratorExp,     # Generator expression
+    ast.Yield,            # Yield expression
+    ast.YieldFrom,        # Yield from expression
+    ast.Attribute,        # Attribute access
+    ast.Subscript,        # Subscript access
+    ast.Starred,          # Starred expression
+    ast.comprehension,    # Comprehension
+    ast.ExceptHandler,    # Exception handler
+    ast.withitem,         # With statement item
+    ast.IfExp,            # If expression
+    ast.ImportFrom)       # Import from statement
+
+NODE_TYPE_NAMES = tuple(node_type.__name__ for node_type in CODE_NODE_TYPES)
+NODE_TYPE_INDEX = {node_type: i for i, node_type in enumerate(CODE_NODE_TYPES)}
+
+# Coarse categories used to summarize the node type histogram
+NODE_CATEGORIES = {
+    'Import': 'import', 'ImportFrom': 'import',
+    'Call': 'call',
+    'Assign': 'assignment', 'Delete': 'assignment', 'Global': 'assignment', 'Nonlocal': 'assignment',
+    'If': 'control flow', 'While': 'control flow', 'For': 'control flow', 'Try': 'control flow',
+    'With': 'control flow', 'AsyncFor': 'control flow', 'AsyncWith': 'control flow',
+    'Return': 'control flow', 'Raise': 'control flow', 'Assert': 'control flow', 'Pass': 'control flow',
+    'Break': 'control flow', 'Continue': 'control flow', 'ExceptHandler': 'control flow',
+    'withitem': 'control flow', 'Yield': 'control flow', 'YieldFrom': 'control flow', 'Await': 'control flow',
+    'FunctionDef': 'definition', 'AsyncFunctionDef': 'definition', 'ClassDef': 'definition',
+}
+
 def check_instance(node):
     """
     Check if the node is an instance of the specified types
     """
-    if isinstance(node, (ast.FunctionDef,      # Function definition
-        ast.ClassDef,         # Class definition
-        ast.Assign,           # Assignment statement
-        ast.Return,           # Return statement
-        ast.If,               # If statement
-        ast.While,            # While loop
-        ast.For,              # For loop
-        ast.Try,              # Try-except statement
-        ast.Import,           # Import statement
-        ast.Call,             # Function call
-        ast.With,             # With statement
-        ast.AsyncFunctionDef, # Async function definition
-        ast.Await,            # Await expression
-        ast.AsyncFor,         # Async for loop
-        ast.AsyncWith,        # Async with statement
-        ast.Raise,            # Raise statement
-        ast.Assert,           # Assert statement
-        ast.Delete,           # Delete statement
-        ast.Global,           # Global statement
-        ast.Nonlocal,         # Nonlocal statement
-        ast.Pass,             # Pass statement
-        ast.Break,            # Break statement
-        ast.Continue,         # Continue statement
-        ast.Lambda,           # Lambda expression
-        ast.ListComp,         # List comprehension
-        ast.SetComp,          # Set comprehension
-        ast.DictComp,         # Dictionary comprehension
-        ast.GeneratorExp,     # Generator expression
-        ast.Yield,            # Yield expression
-        ast.YieldFrom,        # Yield from expression
-        ast.Attribute,        # Attribute access
-        ast.Subscript,        # Subscript access
-        ast.Starred,          # Starred expression
-        ast.comprehension,    # Comprehension
-        ast.ExceptHandler,    # Exception handler
-        ast.withitem,         # With statement item
-        ast.IfExp,            # If expression
-        ast.ExceptHandler,    # Exception handler
-        ast.ImportFrom)):     # Import from statement
+    if isinstance(node, CODE_NODE_TYPES):
         return True
     return False
 
+def node_type_counts(tree):
+    """
+    Count the code node types of a comment block in one walk of its AST tree
+    :param tree: ast.AST, the return value of ast.parse(code)
+    :return: np.ndarray of length len(CODE_NODE_TYPES), aligned with NODE_TYPE_NAMES
+    """
+    indices = [NODE_TYPE_INDEX[type(node)] for node in ast.walk(tree) if type(node) in NODE_TYPE_INDEX]
+    return np.bincount(np.asarray(indices, dtype=np.intp), minlength=len(CODE_NODE_TYPES))
+
+def new_node_counts():
+    """
+    Create an empty corpus-level node type histogram
+    """
+    return np.zeros(len(CODE_NODE_TYPES), dtype=np.int64)
+
+def summarize_node_counts(counts):
+    """
+    Turn a node type histogram into per-type and per-category totals
+    :return: (dict of node type name -> count, dict of category -> count), both sorted by count
+    """
+    counts = np.asarray(counts)
+    categories = sorted(set(NODE_CATEGORIES.get(name, 'expression') for name in NODE_TYPE_NAMES))
+    category_index = np.array([categories.index(NODE_CATEGORIES.get(name, 'expression')) for name in NODE_TYPE_NAMES])
+    category_counts = np.bincount(category_index, weights=counts, minlength=len(categories)).astype(np.int64)
+
+    order = np.argsort(-counts, kind='stable')
+    by_type = {NODE_TYPE_NAMES[i]: int(counts[i]) for i in order if counts[i] > 0}
+    order = np.argsort(-category_counts, kind='stable')
+    by_category = {categories[i]: int(category_counts[i]) for i in order if category_counts[i] > 0}
+    return by_type, by_category
+
 def contains_valid_code(tree):
     """
     Check if the AST tree contains valid code structures
@@ -80,10 +137,11 @@ def contains_valid_code(tree):
 
     return False
 
-def is_code_related_comment(code: str) -> bool:
+def is_code_related_comment(code: str, counts=None) -> bool:
     """
     Determine if the code string contains AST node types related to code (i.e., valid code).
     If there are no related code nodes (only comments, etc.), it is considered to have no code.
+    If counts is given, the node type histogram of a code block is added to it in place.
     """
 
     code = "# -*- coding: utf-8 -*- \n" + code
@@ -93,6 +151,8 @@ def is_code_related_comment(code: str) -> bool:
         tree = ast.parse(code)
         
         if contains_valid_code(tree):
+            if counts is not None:
+                counts += node_type_counts(tree)
             return True  # Found nodes related to code, considered valid code
         
         # If no related code nodes are found, return False
@@ -102,10 +162,11 @@ def is_code_related_comment(code: str) -> bool:
         # If there is a syntax error in the code, it is also considered to have no valid code
         return False
 
-def is_mult_code_related_comment(code: str) -> bool:
+def is_mult_code_related_comment(code: str, counts=None) -> bool:
     """
     Determine if the code string contains AST node types related to code (i.e., valid code).
     If there are no related code nodes (only comments, etc.), it is considered to have no code.
+    If counts is given, the node type histogram of a code block is added to it in place.
     """
     codes = code
     global white
@@ -120,6 +181,8 @@ def is_mult_code_related_comment(code: str) -> bool:
             return 'error'
         
         if contains_valid_code(tree):
+            if counts is not None:
+                counts += node_type_counts(tree)
             return 'all'  # Found nodes related to code, considered valid code
         
         # If no related code nodes are found, return False
@@ -135,138 +198,250 @@ def is_mult_code_related_comment(code: str) -> bool:
             if line == '' or line.isspace():
                 white += 1
                 continue
-            if is_code_related_comment(line):
+            if is_code_related_comment(line, counts):
                 count += 1
 
         # If there is a syntax error in the code, it is also considered to have no valid code
         return count
 
-def process_python_file(file_path):
+def process_python_file(file_path, counts=None):
     """
     Process a single Python file and count the number of comment lines
+    If counts is given, the node type histograms of its code-related comments are added to it.
+    """
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
+        code = file.read()
+    return process_python_source(code, counts)
+
+def process_python_source(code, counts=None):
+    """
+    Count the number of comment lines in Python source code that has already been read
     """
     total_comment_lines = 0
     natural_language_comment_lines = 0
     code_related_comment_lines = 0
     comment_block = []
     
-    with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
-        code = file.read()
-        codes = code.splitlines()
-        nums = 0
-        for i, line in enumerate(codes):
-            line = line.strip()
-            if i == 0 and 'coding' in line:
-                continue
+    codes = code.splitlines()
+    nums = 0
+    for i, line in enumerate(codes):
+        line = line.strip()
+        if i == 0 and 'coding' in line:
+            continue
 
-            if line.startswith("#"):  # This line is a comment
-                comment_text = line[2:]
-                if comment_text == '' or comment_text.isspace():
-                    continue
-                total_comment_lines += 1
-                comment_block.append(comment_text)
-                nums += 1
+        if line.startswith("#"):  # This line is a comment
+            comment_text = line[2:]
+            if comment_text == '' or comment_text.isspace():
+                continue
+            total_comment_lines += 1
+            comment_block.append(comment_text)
+            nums += 1
 
-            else:
-                if comment_block:
-                    if nums == 1:
-                        sums = is_code_related_comment(comment_block[0])
-                        if sums:
-                            code_related_comment_lines +=1
-                        else:
-                            natural_language_comment_lines += 1
-                        comment_block = []  # Reset comment block
-                        nums = 0
+        else:
+            if comment_block:
+                if nums == 1:
+                    sums = is_code_related_comment(comment_block[0], counts)
+                    if sums:
+                        code_related_comment_lines +=1
                     else:
-                        # If there are multiple lines of comments, concatenate these lines
-                        full_comment_text = "\n".join(line for line in comment_block)
-                        sums = is_mult_code_related_comment(full_comment_text)
-                        global white
-                        lens = nums - white
-                        total_comment_lines -= white
-                        white = 0
-                        lens = nums
-                        if sums == "error":
-                            total_comment_lines -= lens
-                        elif sums == "all":
-                            code_related_comment_lines += lens
-                        elif sums > 0:
-                            code_related_comment_lines += sums
-                            natural_language_comment_lines += lens - sums
-                        else:
-                            natural_language_comment_lines += lens
-                        comment_block = []  # Reset comment block
-                        nums = 0
-                    
-        # Process any remaining comment blocks at the end of the file
-        if comment_block:
-            if nums == 1:
-                sums = is_code_related_comment(comment_block[0])
-                if sums:
-                    code_related_comment_lines +=1
+                        natural_language_comment_lines += 1
+                    comment_block = []  # Reset comment block
+                    nums = 0
                 else:
-                    natural_language_comment_lines += 1
+                    # If there are multiple lines of comments, concatenate these lines
+                    full_comment_text = "\n".join(line for line in comment_block)
+                    sums = is_mult_code_related_comment(full_comment_text, counts)
+                    global white
+                    lens = nums - white
+                    total_comment_lines -= white
+                    white = 0
+                    lens = nums
+                    if sums == "error":
+                        total_comment_lines -= lens
+                    elif sums == "all":
+                        code_related_comment_lines += lens
+                    elif sums > 0:
+                        code_related_comment_lines += sums
+                        natural_language_comment_lines += lens - sums
+                    else:
+                        natural_language_comment_lines += lens
+                    comment_block = []  # Reset comment block
+                    nums = 0
+                
+    # Process any remaining comment blocks at the end of the file
+    if comment_block:
+        if nums == 1:
+            sums = is_code_related_comment(comment_block[0], counts)
+            if sums:
+                code_related_comment_lines +=1
             else:
-                # If there are multiple lines of comments, concatenate these lines
-                full_comment_text = "\n".join(line for line in comment_block)
-                sums = is_mult_code_related_comment(full_comment_text)
-                lens = nums - white
-                total_comment_lines -= white
-                white = 0
-                if sums == "err":
-                    total_comment_lines -= lens
-                elif sums == "all":
-                    code_related_comment_lines += lens
-                    
-                elif sums > 0:
-                    code_related_comment_lines += sums
-                    natural_language_comment_lines += lens - sums
-                else:
-                    natural_language_comment_lines += lens
+                natural_language_comment_lines += 1
+        else:
+            # If there are multiple lines of comments, concatenate these lines
+            full_comment_text = "\n".join(line for line in comment_block)
+            sums = is_mult_code_related_comment(full_comment_text, counts)
+            lens = nums - white
+            total_comment_lines -= white
+            white = 0
+            if sums == "err":
+                total_comment_lines -= lens
+            elif sums == "all":
+                code_related_comment_lines += lens
+                
+            elif sums > 0:
+                code_related_comment_lines += sums
+                natural_language_comment_lines += lens - sums
+            else:
+                natural_language_comment_lines += lens
 
-        comment_block = []  # Reset comment block
-        nums = 0
-        
-        multiline_comment_pattern = r"(\'\'\'|\"\"\")(.+?)\1"
-        
-        # Find all matching comments
-        multiline_comments = re.findall(multiline_comment_pattern, code, re.DOTALL)
-        multiline_comments = [comment[1] for comment in multiline_comments]
-
-        if multiline_comments:
-            for codes in multiline_comments:
-                codes = codes.strip('"""').strip("'''")
-                # Remove extra blank lines
-                codes = codes.splitlines()
-                codes = [line for line in codes if line != '' and not line.isspace()]
-                codes = "\n".join(codes)
-                lens = len(codes.splitlines())
-                if lens == 0:
-                    continue
-                total_comment_lines += lens
-                sums = is_mult_code_related_comment(codes)
-
-                lens = lens - white
-                total_comment_lines -= white
-                white = 0
-                if sums == "err":
-                    total_comment_lines -= lens
-                    continue
-                elif sums == "all":
-                    code_related_comment_lines += lens
-                elif sums > 0:
-                    code_related_comment_lines += sums
-                    natural_language_comment_lines += lens - sums
-                else:
-                    natural_language_comment_lines += lens
+    comment_block = []  # Reset comment block
+    nums = 0
+    
+    multiline_comment_pattern = r"(\'\'\'|\"\"\")(.+?)\1"
+    
+    # Find all matching comments
+    multiline_comments = re.findall(multiline_comment_pattern, code, re.DOTALL)
+    multiline_comments = [comment[1] for comment in multiline_comments]
+
+    if multiline_comments:
+        for codes in multiline_comments:
+            codes = codes.strip('"""').strip("'''")
+            # Remove extra blank lines
+            codes = codes.splitlines()
+            codes = [line for line in codes if line != '' and not line.isspace()]
+            codes = "\n".join(codes)
+            lens = len(codes.splitlines())
+            if lens == 0:
+                continue
+            total_comment_lines += lens
+            sums = is_mult_code_related_comment(codes, counts)
+
+            lens = lens - white
+            total_comment_lines -= white
+            white = 0
+            if sums == "err":
+                total_comment_lines -= lens
+                continue
+            elif sums == "all":
+                code_related_comment_lines += lens
+            elif sums > 0:
+                code_related_comment_lines += sums
+                natural_language_comment_lines += lens - sums
+            else:
+                natural_language_comment_lines += lens
 
     return total_comment_lines, natural_language_comment_lines, code_related_comment_lines
 
 
-def process_directory(directory_path):
+# Per-line labels produced by comment_line_flags
+LINE_OTHER = 0    # Code, blank line or ignored comment
+LINE_NATURAL = 1  # Natural language comment line
+LINE_CODE = 2     # Code-related comment line
+
+def classify_block_lines(block):
+    """
+    Classify the lines of one comment block the same way process_python_source counts them
+    :param block: list of comment texts without their comment markers
+    :return: list of LINE_* labels, one per line of the block
+    """
+    global white
+    if len(block) == 1:
+        return [LINE_CODE if is_code_related_comment(block[0]) else LINE_NATURAL]
+    sums = is_mult_code_related_comment("\n".join(block))
+    white = 0
+    if sums == 'error':
+        return [LINE_OTHER] * len(block)
+    if sums == 'all':
+        return [LINE_CODE] * len(block)
+    if sums == 0:
+        return [LINE_NATURAL] * len(block)
+    labels = []
+    for line in block:
+        line = line.strip()
+        if line.startswith("#"):
+            line = line[1:].strip()
+        if line == '':
+            labels.append(LINE_OTHER)
+        elif is_code_related_comment(line):
+            labels.append(LINE_CODE)
+        else:
+            labels.append(LINE_NATURAL)
+    return labels
+
+def comment_line_flags(code):
+    """
+    Label every line of Python source code as code-related comment, natural language comment or other
+    :return: np.ndarray of LINE_* labels, where index i is line i + 1 of the source
+    """
+    codes = code.splitlines()
+    flags = np.zeros(len(codes), dtype=np.int8)
+    block, block_lines = [], []
+    for i, line in enumerate(codes + ['']):
+        line = line.strip()
+        if i == 0 and 'coding' in line:
+            continue
+        if line.startswith("#"):  # This line is a comment
+            comment_text = line[2:]
+            if comment_text == '' or comment_text.isspace():
+                continue
+            block.append(comment_text)
+            block_lines.append(i)
+        elif block:
+            flags[block_lines] = classify_block_lines(block)
+            block, block_lines = [], []
+
+    multiline_comment_pattern = r"(\'\'\'|\"\"\")(.+?)\1"
+    for match in re.finditer(multiline_comment_pattern, code, re.DOTALL):
+        first_line = code.count('\n', 0, match.start(2))
+        block, block_lines = [], []
+        for offset, line in enumerate(match.group(2).splitlines()):
+            if line != '' and not line.isspace():
+                block.append(line)
+                block_lines.append(first_line + offset)
+        if block:
+            flags[block_lines] = classify_block_lines(block)
+    return flags
+
+
+def process_file_totals(file_path):
+    """
+    Process a single Python file for the rollup cache
+    :return: (total, natural language, code-related comment lines, *node type histogram)
+    """
+    counts = new_node_counts()
+    try:
+        result = process_python_file(file_path, counts)
+    except OSError as e:
+        print(f"Error processing file: {file_path}", e)
+        return [0] * (3 + len(CODE_NODE_TYPES))
+    return list(result) + counts.tolist()
+
+def process_directory_cached(directory_path, cache_path, counts=None, table=None):
+    """
+    Process all Python files in the directory, skipping subtrees that are unchanged since the cached scan
+    If table is given, it is filled from the cached per-file totals.
+    """
+    cache = rollup_cache.load_cache(cache_path)
+    _, totals = rollup_cache.rollup(directory_path, process_file_totals, cache)
+    rollup_cache.save_cache(cache_path, cache)
+    totals = totals or [0] * (3 + len(CODE_NODE_TYPES))
+    if counts is not None:
+        counts += np.asarray(totals[3:], dtype=counts.dtype)
+    if table is not None:
+        for file_path, values in rollup_cache.file_values(cache, directory_path):
+            table.append((file_path, values[0], values[1], values[2]))
+    return totals[0], totals[1], totals[2]
+
+def process_directory(directory_path, counts=None, cache_path=None, table=None):
     """
     Process all Python files in the directory
+    If counts is given, the corpus-level node type histogram is accumulated into it.
+    If cache_path is given, results are kept in a rollup cache and unchanged subtrees are not re-scanned.
+    If table is given (a records.CommentTable), the counts of every file are appended to it.
     """
+    if cache_path:
+        return process_directory_cached(directory_path, cache_path, counts, table)
+
     lists = []
     count = 0
     total_comment_lines = 0
@@ -279,10 +454,12 @@ def process_directory(directory_path):
             count += 1
             if file_path.endswith('.py'):
                 try:
-                    file_comment_lines, file_natural_comment_lines, file_code_related_comment_lines = process_python_file(file_path)
+                    file_comment_lines, file_natural_comment_lines, file_code_related_comment_lines = process_python_file(file_path, counts)
                     total_comment_lines += file_comment_lines
                     natural_language_comment_lines += file_natural_comment_lines
                     code_related_comment_lines += file_code_related_comment_lines
+                    if table is not None:
+                        table.append((file_path, file_comment_lines, file_natural_comment_lines, file_code_related_comment_lines))
                     if file_code_related_comment_lines > 0:
                         lists.append(file_path)
                 except OSError as e:
@@ -296,9 +473,18 @@ if __name__ == "__main__":
         print(f"Directory {directory_path} does not exist.")
         exit(1)
     
-    total_comments, natural_comments, code_related_comments = process_directory(directory_path)
+    node_counts = new_node_counts()
+    total_comments, natural_comments, code_related_comments = process_directory(directory_path, node_counts)
 
     print(f"Total comment lines: {total_comments}")
     print(f"Natural language comment lines: {natural_comments}")
     print(f"Code-related comment lines: {code_related_comments}")
     print(f"Code-related comment line ratio: {code_related_comments / total_comments:.10f}")
+
+    by_type, by_category = summarize_node_counts(node_counts)
+    print("CO code node types by category:")
+    for category, count in by_category.items():
+        print(f"  {category}: {count}")
+    print("CO code node types:")
+    for name, count in by_type.items():
+        print(f"  {name}: {count}")
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+DESCRIPTION:
+    This script builds a fast query suite from `python-security-all.qls` / `all-security-selectors.yml`
+    by profiling the full suite on a calibration corpus such as `dataset/dataset`.
+    It performs the following tasks:
+    - Resolves the full suite into its query files (cached by `query_cache.py`).
+    - Analyzes the calibration corpus with the full suite while recording the evaluator log.
+    - Measures the evaluation time of every query and counts its hits in the results.
+    - Ranks queries by cost against hit count and writes the profile as CSV.
+    - Emits a fast suite that keeps every query with an observed detection, every query that timed out during
+      calibration (it never got to report its detections), plus optionally queries whose cost is below a
+      threshold, so day-to-day runs keep all observed detections at a fraction of the time.
+USAGE:
+    - Update `calibration_folder`, `codeqldb_path`, `qls_path`, `query_cache_root` and `fast_qls_path`
+      in the `__main__` section and run the script.
+DEPENDENCIES:
+    - Python 3.x
+    - CodeQL CLI
+    - codeql_analyze.py, evaluator_log.py, query_cache.py and records.py in the same folder
+NOTES:
+    - The fast suite lists query files explicitly, so it is tied to the installed CodeQL query packs.
+    - Queries with zero hits on the calibration corpus may still fire on other code; re-run the builder
+      when the corpus or the generation setup changes.
+"""
+
+import csv
+import os
+import subprocess
+from collections import Counter
+
+import codeql_analyze
+import evaluator_log
+import query_cache
+from records import read_csv_rows
+
+
+def profile_suite(calibration_folder, codeqldb_path, qls_path, query_cache_root, threads=None, ram=None, timeout=25):
+    """
+    Run the full suite on the calibration corpus and measure every query
+    :return: list of dicts with path, id, name, millis, tuples, hits and timed_out of every query in the suite
+    """
+    cache_dir = query_cache.suite_cache_dir(qls_path, query_cache_root)
+    queries = query_cache.resolve_suite(qls_path, cache_dir)
+
+    output_csv = os.path.join(cache_dir, 'calibration_results.csv')
+    log_path = os.path.join(cache_dir, 'calibration_evaluator_log.json')
+    for path in (output_csv, log_path, log_path + '.summary'):
+        if os.path.exists(path):
+            os.remove(path)
+    codeql_analyze.ensure_database(calibration_folder, codeqldb_path, threads, ram)
+    try:
+        summary_path = evaluator_log.analyze_with_evaluator_log(codeqldb_path, qls_path, output_csv, log_path,
+                                                                threads, ram, timeout)
+    except subprocess.CalledProcessError as e:
+        print(f"Error running CodeQL analysis: {e}")
+        summary_path = log_path + '.summary'
+        if not os.path.exists(summary_path):
+            codeql_analyze.run_codeql(['generate', 'log-summary', log_path, summary_path, '--format=predicates'])
+
+    timings = {row['path']: row for row in evaluator_log.query_timing_table(summary_path, log_path, queries)}
+    hits = Counter(row[0] for row in read_csv_rows(output_csv)) if os.path.exists(output_csv) else Counter()
+    profile = []
+    for query in queries:
+        timing = timings[query]
+        profile.append({
+            'path': query,
+            'id': timing['id'],
+            'name': timing['name'],
+            'millis': timing['millis'],
+            'tuples': timing['tuples'],
+            'hits': hits.get(timing['name'], 0),
+            'timed_out': timing['timed_out'],
+        })
+    # Most expensive per hit first; queries without hits rank by cost alone
+    profile.sort(key=lambda entry: (entry['hits'] > 0, -entry['millis'] / max(entry['hits'], 1)))
+    return profile
+
+
+def select_fast_queries(profile, keep_cheap_millis=0):
+    """
+    Keep every query with hits or that timed out during calibration, plus queries cheaper than keep_cheap_millis
+    """
+    return [entry for entry in profile
+            if entry['hits'] > 0 or entry['timed_out'] or entry['millis'] < keep_cheap_millis]
+
+
+def write_profile(profile, profile_csv):
+    """
+    Write the query profile as CSV
+    """
+    with open(profile_csv, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=['id', 'name', 'millis', 'tuples', 'hits', 'timed_out',
+                                                         'path'])
+        writer.writeheader()
+        writer.writerows(profile)
+
+
+def build_fast_suite(calibration_folder, codeqldb_path, qls_path, query_cache_root, fast_qls_path,
+                     keep_cheap_millis=0, threads=None, ram=None, timeout=25):
+    """
+    Profile the full suite and write a fast suite that keeps all observed detections
+    :return: the query profile
+    """
+    profile = profile_suite(calibration_folder, codeqldb_path, qls_path, query_cache_root, threads, ram, timeout)
+    selected = select_fast_queries(profile, keep_cheap_millis)
+    query_cache.write_query_list_suite(sorted(entry['path'] for entry in selected), fast_qls_path,
+                                       f"Fast subset of {os.path.basename(qls_path)}")
+    write_profile(profile, os.path.splitext(fast_qls_path)[0] + '_profile.csv')
+
+    total = sum(entry['millis'] for entry in profile)
+    kept = sum(entry['millis'] for entry in selected)
+    print(f"Kept {len(selected)} of {len(profile)} queries, "
+          f"{kept / 1000:.1f}s of {total / 1000:.1f}s evaluation time ({kept / max(total, 1):.1%})")
+    timed_out = [entry['id'] for entry in profile if entry['timed_out']]
+    if timed_out:
+        print(f"Kept {len(timed_out)} queries that timed out during calibration: {', '.join(timed_out)}")
+    print("Most expensive queries without hits:")
+    for entry in sorted((e for e in profile if e['hits'] == 0 and not e['timed_out']), key=lambda e: -e['millis'])[:10]:
+        print(f"  {entry['id']}: {entry['millis'] / 1000:.1f}s")
+    return profile
+
+
+if __name__ == "__main__":
+    calibration_folder = r'your path to dataset/dataset' # Replace with your directory path
+    codeqldb_path = r'your path to the CodeQL database' # Replace with your directory path
+    qls_path = r'your path to the CodeQL query file' # Replace with your directory path
+    query_cache_root = r'your path to the query cache folder' # Replace with your directory path
+    fast_qls_path = r'your path to the fast suite to write, e.g. python-security-fast.qls' # Replace with your path
+
+    build_fast_suite(calibration_folder, codeqldb_path, qls_path, query_cache_root, fast_qls_path)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Shared fixtures: the scripts of code/ are imported from their folder and `codeql` is the mock of mock_codeql/.
+"""
+
+import os
+import sys
+
+import pytest
+
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CODE_DIR)
+
+import codeql_analyze
+
+
+@pytest.fixture(autouse=True)
+def mock_codeql(monkeypatch):
+    """
+    Put the mock codeql first on PATH with quiet, instant defaults and no installed backend
+    """
+    monkeypatch.setenv('PATH', os.path.join(CODE_DIR, 'mock_codeql') + os.pathsep + os.environ.get('PATH', ''))
+    for name in list(os.environ):
+        if name.startswith('MOCK_CODEQL_'):
+            monkeypatch.delenv(name)
+    monkeypatch.setenv('MOCK_CODEQL_QUIET', '1')
+    monkeypatch.setattr(codeql_analyze, 'backend', None)
+
+
+@pytest.fixture
+def python_folder(tmp_path):
+    """
+    A folder of six small Python files with distinct contents
+    """
+    folder = tmp_path / 'src'
+    folder.mkdir()
+    for i in range(1, 7):
+        (folder / f"{i}_0_2_x.py").write_text(f"import os\nvalue = {i}\ntry:\n    pass\nexcept:\n    pass\n",
+                                               encoding='utf-8')
+    return str(folder)
+
+
+@pytest.fixture
+def qls_path(tmp_path):
+    """
+    A suite that the mock resolves to its canned queries
+    """
+    path = tmp_path / 'suite.qls'
+    path.write_text('- description: Test suite\n', encoding='utf-8')
+    return str(path)
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import os
+
+import adaptive_timeout
+import codeql_analyze
+import rollup_cache
+from records import read_csv_rows
+
+
+def test_update_history_keeps_a_lower_bound_until_a_retry_completes():
+    history = {}
+    adaptive_timeout.update_history(history, [{'path': 'q.ql', 'millis': 25000, 'timed_out': 1}], 25, 25, 600)
+    assert history['q.ql'] == {'millis': 25000, 'budget': 100, 'timeouts': 1}
+    adaptive_timeout.update_history(history, [{'path': 'q.ql', 'millis': 60000, 'timed_out': 0}], 100, 25, 600)
+    assert history['q.ql'] == {'millis': 60000, 'budget': 90, 'timeouts': 1}
+    adaptive_timeout.update_history(history, [{'path': 'q.ql', 'millis': 1000, 'timed_out': 0}], 90, 25, 600)
+    assert history['q.ql']['millis'] == 1000 and history['q.ql']['budget'] == 25
+
+
+def test_timed_out_query_is_retried_with_a_larger_budget(python_folder, qls_path, tmp_path, monkeypatch, capsys):
+    expected = codeql_analyze.run_codeql_analysis(python_folder, str(tmp_path / 'db'), qls_path)
+    rows = sorted(read_csv_rows(os.path.join(python_folder, 'codeql_analysis_results.csv')))
+
+    history_path = str(tmp_path / 'history.json')
+    monkeypatch.setenv('MOCK_CODEQL_QUERY_MILLIS', 'py/unused-import=60000')
+    result = codeql_analyze.run_codeql_analysis(python_folder, str(tmp_path / 'db'), qls_path,
+                                                timeout_history=history_path)
+    assert result == expected
+    assert sorted(read_csv_rows(os.path.join(python_folder, 'codeql_analysis_results.csv'))) == rows
+    assert '1 queries timed out with --timeout=25; retrying with --timeout=100' in capsys.readouterr().out
+    entry = rollup_cache.load_cache(history_path)['py/unused-import']
+    assert entry == {'millis': 60000, 'budget': 90, 'timeouts': 1}
+
+    # The learned budget lets the next run complete the query without a retry
+    codeql_analyze.run_codeql_analysis(python_folder, str(tmp_path / 'db'), qls_path, timeout_history=history_path)
+    assert 'retrying' not in capsys.readouterr().out
+
+
+def test_queries_that_never_complete_make_the_run_incomplete(python_folder, qls_path, tmp_path, monkeypatch,
+                                                             capsys):
+    cache_path = str(tmp_path / 'rollup.json')
+    monkeypatch.setenv('MOCK_CODEQL_QUERY_MILLIS', 'py/unused-import=10000000')
+    codeql_analyze.run_codeql_analysis(python_folder, str(tmp_path / 'db'), qls_path, cache_path=cache_path,
+                                       timeout_history=str(tmp_path / 'history.json'))
+    output = capsys.readouterr().out
+    assert 'Queries still timed out at --timeout=600 (1): py/unused-import' in output
+    assert 'Analysis incomplete' in output
+    assert rollup_cache.load_cache(cache_path) == {}
+
+
+def test_failed_runs_without_a_log_get_full_timing_rows(python_folder, qls_path, tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('MOCK_CODEQL_FAIL', 'timeout_')
+    codeql_analyze.run_codeql_analysis(python_folder, str(tmp_path / 'db'), qls_path, evaluator_logs=True,
+                                       timeout_history=str(tmp_path / 'history.json'))
+    assert 'Timed out or incomplete queries (5)' in capsys.readouterr().out
+    with open(os.path.join(python_folder, 'codeql_query_timings.csv'), 'r', encoding='utf-8') as file:
+        assert file.readline().strip() == 'id,name,millis,tuples,predicates,timed_out,path'
+        assert len(file.readlines()) == 5
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import os
+
+import alert_cache
+import codeql_analyze
+from records import read_csv_rows
+
+
+def run(python_folder, qls_path, tmp_path):
+    return alert_cache.run_cached_analysis([python_folder], str(tmp_path / 'staging'), str(tmp_path / 'db'),
+                                           qls_path, str(tmp_path / 'cache'))
+
+
+def results(python_folder):
+    return sorted(read_csv_rows(os.path.join(python_folder, 'codeql_analysis_results.csv')))
+
+
+def cached_entries(tmp_path):
+    return [name for _, _, names in os.walk(tmp_path / 'cache') for name in names if name.endswith('.json')]
+
+
+def test_cached_rerun_gives_the_same_alerts(python_folder, qls_path, tmp_path):
+    first = run(python_folder, qls_path, tmp_path)
+    rows = results(python_folder)
+    assert len(cached_entries(tmp_path)) == 6
+
+    second = run(python_folder, qls_path, tmp_path)
+    assert second == first
+    assert results(python_folder) == rows
+
+
+def test_failed_analysis_is_not_cached(python_folder, qls_path, tmp_path, monkeypatch):
+    monkeypatch.setenv('MOCK_CODEQL_TIMEOUT_QUERIES', 'py/unused-import')
+    partial = run(python_folder, qls_path, tmp_path)
+    assert partial[python_folder] != -1
+    assert cached_entries(tmp_path) == []
+
+    monkeypatch.delenv('MOCK_CODEQL_TIMEOUT_QUERIES')
+    complete = run(python_folder, qls_path, tmp_path)
+    assert complete[python_folder][0] > partial[python_folder][0]
+    assert len(cached_entries(tmp_path)) == 6
+
+
+
+def test_only_folders_with_fresh_files_are_incomplete(python_folder, qls_path, tmp_path, monkeypatch):
+    run(python_folder, qls_path, tmp_path)
+    other = tmp_path / 'other'
+    other.mkdir()
+    (other / '9_0_1_x.py').write_text('import sys\n', encoding='utf-8')
+
+    monkeypatch.setenv('MOCK_CODEQL_TIMEOUT_QUERIES', 'py/unused-import')
+    incomplete = set()
+    results = alert_cache.run_cached_analysis([python_folder, str(other)], str(tmp_path / 'staging'),
+                                              str(tmp_path / 'db'), qls_path, str(tmp_path / 'cache'),
+                                              incomplete=incomplete)
+    assert incomplete == {str(other)}
+    assert results[python_folder] != -1 and results[str(other)] != -1
+
+
+def test_message_links_point_into_the_folder(python_folder, qls_path, tmp_path, monkeypatch):
+    monkeypatch.setenv('MOCK_CODEQL_ALERTS', '6')
+    codeql_analyze.run_codeql_analysis(python_folder, str(tmp_path / 'plain_db'), qls_path)
+    expected = results(python_folder)
+    assert any('relative:///' in row[3] for row in expected)
+    for _ in range(2):
+        run(python_folder, qls_path, tmp_path)
+        assert results(python_folder) == expected
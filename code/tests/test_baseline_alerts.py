@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+
+import baseline_alerts
+from records import read_csv_rows, write_csv_rows
+
+
+def cached_baselines(cache_dir):
+    return [name for name in os.listdir(cache_dir) if name.endswith('.json')] if os.path.isdir(cache_dir) else []
+
+
+def test_failed_analysis_is_not_cached(python_folder, qls_path, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / 'cache')
+    monkeypatch.setenv('MOCK_CODEQL_TIMEOUT_QUERIES', 'py/empty-except')
+    assert baseline_alerts.load_baseline(python_folder, cache_dir, str(tmp_path / 'db'), qls_path) is None
+    assert cached_baselines(cache_dir) == []
+
+    monkeypatch.delenv('MOCK_CODEQL_TIMEOUT_QUERIES')
+    baseline = baseline_alerts.load_baseline(python_folder, cache_dir, str(tmp_path / 'db'), qls_path)
+    assert baseline and set(baseline) <= set(range(1, 7))
+    assert len(cached_baselines(cache_dir)) == 1
+    assert baseline_alerts.load_baseline(python_folder, cache_dir, str(tmp_path / 'db'), qls_path) == baseline
+
+
+def test_new_alerts_subtract_the_baseline_as_a_multiset(python_folder, qls_path, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    baseline = baseline_alerts.load_baseline(python_folder, cache_dir, str(tmp_path / 'db'), qls_path)
+    variant = str(tmp_path / 'variant')
+    shutil.copytree(python_folder, variant)
+    dataset_csv = baseline_alerts.baseline_cache_path(cache_dir, python_folder, qls_path)[:-len('.json')] + '.csv'
+    shutil.copy(dataset_csv, os.path.join(variant, 'codeql_analysis_results.csv'))
+    inherited = list(read_csv_rows(os.path.join(variant, 'codeql_analysis_results.csv')))
+    assert inherited
+    assert baseline_alerts.new_alerts(variant, baseline) == []
+
+    # A duplicated defect is reported once more than the dataset file has it
+    write_csv_rows(os.path.join(variant, 'codeql_analysis_results.csv'), inherited + inherited[:1])
+    assert baseline_alerts.new_alerts(variant, baseline) == inherited[:1]
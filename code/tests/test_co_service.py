@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+import json
+
+import co_service
+
+
+def test_service_verdicts_and_errors(tmp_path):
+    path = str(tmp_path / '1_0_2_x.py')
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('# result = compute(value)\n# This explains the next line\nvalue = 1\n')
+    verdict = json.loads(co_service.handle_request(json.dumps({'id': 7, 'path': path})))
+    assert verdict['id'] == 7 and verdict['is_co'] is True
+    assert json.loads(co_service.handle_request(path + '\n')) == {key: value for key, value in verdict.items()
+                                                                  if key != 'id'}
+    assert json.loads(co_service.handle_request('{"id": 2, "text": "This is a sentence"}'))['is_co'] is False
+
+    for request in ('{"id": 3}', '{"id": 6', '{"id": 4, "source": 5}', '{"id": {"a": 1}, "text": "x"}',
+                    '{"id": 5, "path": "%s"}' % (tmp_path / 'missing.py')):
+        reply = json.loads(co_service.handle_request(request))
+        assert 'error' in reply and 'is_co' not in reply
+    assert co_service.handle_request('   \n') is None
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import subprocess
+
+import codeql_analyze
+
+
+class RecordingBackend:
+    """
+    Backend that records the commands it is given and runs them as subprocesses
+    """
+    def __init__(self):
+        self.commands = []
+
+    def run(self, args, capture=False):
+        self.commands.append(list(args))
+        return subprocess.run(['codeql'] + list(args), check=True, capture_output=capture, text=capture or None)
+
+
+def test_codeql_version_asks_the_cli_every_time(monkeypatch):
+    recorder = RecordingBackend()
+    monkeypatch.setattr(codeql_analyze, 'backend', recorder)
+    assert codeql_analyze.codeql_version() == codeql_analyze.codeql_version()
+    assert recorder.commands == [['version', '--format=terse']] * 2
+
+
+def test_database_is_reused_for_unchanged_sources(python_folder, tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'db')
+    assert codeql_analyze.ensure_database(python_folder, db_path)
+    recorder = RecordingBackend()
+    monkeypatch.setattr(codeql_analyze, 'backend', recorder)
+    assert not codeql_analyze.ensure_database(python_folder, db_path)
+    assert not [args for args in recorder.commands if args[:2] == ['database', 'create']]
+
+    with open(tmp_path / 'src' / '1_0_2_x.py', 'a', encoding='utf-8') as file:
+        file.write('value = 0\n')
+    assert codeql_analyze.ensure_database(python_folder, db_path)
+    assert [args for args in recorder.commands if args[:2] == ['database', 'create']]
+
+
+def test_incomplete_analysis_is_not_cached(python_folder, qls_path, tmp_path, monkeypatch, capsys):
+    cache_path = str(tmp_path / 'rollup.json')
+    monkeypatch.setenv('MOCK_CODEQL_TIMEOUT_QUERIES', 'py/empty-except')
+    partial = codeql_analyze.run_codeql_analysis(python_folder, str(tmp_path / 'db'), qls_path, cache_path=cache_path)
+    assert 'Analysis incomplete' in capsys.readouterr().out
+
+    monkeypatch.delenv('MOCK_CODEQL_TIMEOUT_QUERIES')
+    complete = codeql_analyze.run_codeql_analysis(python_folder, str(tmp_path / 'db'), qls_path, cache_path=cache_path)
+    assert complete[0] > partial[0]
+    assert 'unchanged since the last analysis' not in capsys.readouterr().out
+    assert codeql_analyze.run_codeql_analysis(python_folder, str(tmp_path / 'db'), qls_path,
+                                              cache_path=cache_path) == complete
+    assert 'unchanged since the last analysis' in capsys.readouterr().out
+
+
+def test_direct_database_creation_invalidates_the_fingerprint(python_folder, qls_path, tmp_path, capsys):
+    db_path = str(tmp_path / 'db')
+    first = codeql_analyze.run_codeql_analysis(python_folder, db_path, qls_path)
+    other = tmp_path / 'other'
+    other.mkdir()
+    (other / '9_0_1_x.py').write_text('import sys\n', encoding='utf-8')
+    codeql_analyze.create_database(str(other), db_path)
+
+    capsys.readouterr()
+    assert codeql_analyze.run_codeql_analysis(python_folder, db_path, qls_path) == first
+    assert 're-using the database' not in capsys.readouterr().out
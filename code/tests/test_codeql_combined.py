@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+
+import codeql_analyze
+import codeql_combined
+from records import read_csv_rows
+
+
+def results(folder):
+    return sorted(read_csv_rows(os.path.join(folder, 'codeql_analysis_results.csv')))
+
+
+def test_combined_results_match_separate_analyses(python_folder, qls_path, tmp_path, monkeypatch):
+    monkeypatch.setenv('MOCK_CODEQL_ALERTS', '3')
+    inner = os.path.join(python_folder, 'fix')
+    os.makedirs(inner)
+    for name in ('1_0_2_x.py', '2_0_2_x.py'):
+        shutil.copy(os.path.join(python_folder, name), os.path.join(inner, name))
+    codeql_analyze.run_codeql_analysis(inner, str(tmp_path / 'inner_db'), qls_path)
+    expected = results(inner)
+    assert expected
+
+    staging_root = tmp_path / 'staging'
+    staging_root.mkdir()
+    (staging_root / 'user.txt').write_text('keep', encoding='utf-8')
+    combined = codeql_combined.run_combined_analysis([python_folder, inner], str(staging_root), str(tmp_path / 'db'),
+                                                     qls_path)
+    assert combined[inner] == (len(expected), 2)
+    assert results(inner) == expected
+    assert results(python_folder)
+    assert not [row for row in results(python_folder) if row[4].startswith('/fix/')]
+    assert (staging_root / 'user.txt').read_text(encoding='utf-8') == 'keep'
+
+
+def test_split_strips_the_prefix_from_message_links():
+    message = 'Call of [["open"|"relative:///f00001/sub/a.py:5:1:5:9"]] and [["x"|"relative:///other/b.py"]]'
+    row = ['Rule', 'd', 'warning', message, '/f00001/sub/a.py', '5', '1', '5', '9']
+    split = codeql_combined.split_rows_by_prefix([row], {'f00001': 'folder'})
+    assert split['folder'][0][3] == ('Call of [["open"|"relative:///sub/a.py:5:1:5:9"]] and '
+                                     '[["x"|"relative:///other/b.py"]]')
+    assert split['folder'][0][4] == '/sub/a.py'
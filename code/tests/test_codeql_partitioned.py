@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+import codeql_analyze
+import codeql_partitioned
+import rollup_cache
+from records import merge_csv_rows, read_csv_rows, write_csv_rows
+
+
+def results(python_folder):
+    return sorted(read_csv_rows(os.path.join(python_folder, 'codeql_analysis_results.csv')))
+
+
+def test_merge_drops_duplicate_rows(tmp_path):
+    row_a = ['Unused import', 'd', 'recommendation', 'm', '/b.py', '3', '1', '3', '9']
+    row_b = ['Empty except', 'd', 'recommendation', 'm', '/a.py', '12', '1', '12', '9']
+    row_c = ['Empty except', 'd', 'recommendation', 'm', '/a.py', '2', '1', '2', '9']
+    write_csv_rows(tmp_path / 'part0.csv', [row_a, row_b])
+    write_csv_rows(tmp_path / 'part1.csv', [row_b, row_c])
+    assert merge_csv_rows([tmp_path / 'part0.csv', tmp_path / 'part1.csv']) == [row_c, row_b, row_a]
+
+
+def test_partition_queries_balances_costs():
+    groups = codeql_partitioned.partition_queries({'a': 8, 'b': 5, 'c': 4, 'd': 3, 'e': 1}, 2)
+    assert sorted(groups) == [['a', 'd'], ['b', 'c', 'e']]
+
+
+@pytest.mark.parametrize('isolate', [False, True])
+def test_partitioned_results_equal_one_analysis(python_folder, qls_path, tmp_path, monkeypatch, isolate):
+    monkeypatch.setenv('MOCK_CODEQL_ALERTS', '3')
+    single = codeql_analyze.run_codeql_analysis(python_folder, str(tmp_path / 'db'), qls_path)
+    expected = results(python_folder)
+    partitioned = codeql_analyze.run_codeql_analysis(python_folder, str(tmp_path / 'db'), qls_path,
+                                                     query_partitions=3, isolate_partitions=isolate)
+    assert partitioned == single
+    assert results(python_folder) == expected
+
+
+def test_failed_partition_makes_the_run_incomplete(python_folder, qls_path, tmp_path, monkeypatch, capsys):
+    cache_path = str(tmp_path / 'rollup.json')
+    monkeypatch.setenv('MOCK_CODEQL_FAIL', 'part1.qls')
+    result = codeql_analyze.run_codeql_analysis(python_folder, str(tmp_path / 'db'), qls_path, cache_path=cache_path,
+                                                query_partitions=3)
+    assert result != -1
+    output = capsys.readouterr().out
+    assert '1 of 3 query partitions failed or produced partial results' in output
+    assert 'Analysis incomplete' in output
+    assert rollup_cache.load_cache(cache_path) == {}
+
+
+def test_partition_with_partial_results_counts_as_failed(python_folder, qls_path, tmp_path, monkeypatch, capsys):
+    cache_path = str(tmp_path / 'rollup.json')
+    monkeypatch.setenv('MOCK_CODEQL_TIMEOUT_QUERIES', 'py/unused-import')
+    result = codeql_analyze.run_codeql_analysis(python_folder, str(tmp_path / 'db'), qls_path, cache_path=cache_path,
+                                                query_partitions=3)
+    assert result != -1
+    output = capsys.readouterr().out
+    assert '1 of 3 query partitions failed or produced partial results' in output
+    assert 'Analysis incomplete' in output
+    assert rollup_cache.load_cache(cache_path) == {}
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import json
+import subprocess
+
+import pytest
+
+import codeql_analyze
+import codeql_progress
+import codeql_server
+
+
+def run_log_records(run_log):
+    with open(run_log, 'r', encoding='utf-8') as file:
+        return [json.loads(line) for line in file]
+
+
+def test_progress_events_and_run_log(python_folder, qls_path, tmp_path, monkeypatch):
+    monkeypatch.delenv('MOCK_CODEQL_QUIET')
+    events = []
+    run_log = str(tmp_path / 'runs.jsonl')
+    result = codeql_analyze.run_codeql_analysis(python_folder, str(tmp_path / 'db'), qls_path,
+                                                progress=events.append, run_log=run_log)
+    assert result[1] == 6
+    assert events[-1]['phase'] == 'analyze' and events[-1]['done'] == events[-1]['total'] == 5
+    assert max(event['done'] for event in events if event['phase'] == 'create') == 6
+    [record] = run_log_records(run_log)
+    assert record['result'] == list(result)
+    assert record['phases']['analyze']['queries'] == 5
+    assert codeql_analyze.backend is None
+
+
+def test_failed_run_is_logged(tmp_path):
+    run_log = str(tmp_path / 'runs.jsonl')
+
+    def failing_analysis(python_folder):
+        codeql_analyze.run_codeql(['database', 'analyze', 'missing-db'])
+
+    with pytest.raises(subprocess.CalledProcessError):
+        codeql_progress.run_tracked(failing_analysis, run_log, lambda event: None, python_folder='src')
+    [record] = run_log_records(run_log)
+    assert record['folder'] == 'src' and record['result'] is None
+    assert record['error'].startswith('CalledProcessError')
+    assert record['phases']['analyze']['failed'] == 1
+    assert codeql_analyze.backend is None
+
+
+def test_installed_server_backend_is_wrapped(python_folder, qls_path, tmp_path, monkeypatch):
+    monkeypatch.delenv('MOCK_CODEQL_QUIET')
+    pool = codeql_server.install()
+    try:
+        events = []
+        run_log = str(tmp_path / 'runs.jsonl')
+        commands = []
+        run = pool.run
+        monkeypatch.setattr(pool, 'run', lambda args, capture=False: commands.append(args) or run(args, capture))
+        result = codeql_analyze.run_codeql_analysis(python_folder, str(tmp_path / 'db'), qls_path,
+                                                    progress=events.append, run_log=run_log)
+        assert result != -1
+        assert ['database', 'analyze'] in [args[:2] for args in commands]
+        assert events[-1]['done'] == 5
+        assert run_log_records(run_log)[0]['phases']['analyze']['peak_rss_mb'] is None
+        assert codeql_analyze.backend is pool
+    finally:
+        codeql_server.uninstall()
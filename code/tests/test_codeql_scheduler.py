@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+import codeql_scheduler
+
+
+def test_incomplete_analysis_is_reported_and_not_cached(python_folder, qls_path, tmp_path, monkeypatch, capsys):
+    cache_path = str(tmp_path / 'rollup.json')
+    db_root = str(tmp_path / 'dbs')
+    monkeypatch.setenv('MOCK_CODEQL_TIMEOUT_QUERIES', 'py/unused-import')
+    incomplete = set()
+    partial = codeql_scheduler.schedule_codeql_analysis([python_folder], db_root, qls_path, 1, 1024,
+                                                        cache_path=cache_path, incomplete=incomplete)
+    assert partial[python_folder] != -1
+    assert incomplete == {python_folder}
+
+    monkeypatch.delenv('MOCK_CODEQL_TIMEOUT_QUERIES')
+    capsys.readouterr()
+    incomplete = set()
+    complete = codeql_scheduler.schedule_codeql_analysis([python_folder], db_root, qls_path, 1, 1024,
+                                                         cache_path=cache_path, incomplete=incomplete)
+    assert 'unchanged since the last analysis' not in capsys.readouterr().out
+    assert complete[python_folder][0] > partial[python_folder][0] and not incomplete
+    codeql_scheduler.schedule_codeql_analysis([python_folder], db_root, qls_path, 1, 1024, cache_path=cache_path)
+    assert 'unchanged since the last analysis' in capsys.readouterr().out
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+import os
+
+import codeql_analyze
+import codeql_sharded
+from records import read_csv_rows
+
+
+def results(folder):
+    return sorted(read_csv_rows(os.path.join(folder, 'codeql_analysis_results.csv')))
+
+
+def test_sharded_results_equal_one_analysis(python_folder, qls_path, tmp_path):
+    single = codeql_analyze.run_codeql_analysis(python_folder, str(tmp_path / 'db'), qls_path)
+    expected = results(python_folder)
+    incomplete = set()
+    assert codeql_sharded.run_sharded_analysis(python_folder, str(tmp_path / 'staging'), str(tmp_path / 'dbs'),
+                                               qls_path, shards=3, incomplete=incomplete) == single
+    assert results(python_folder) == expected and not incomplete
+
+
+def test_incomplete_shard_makes_the_merge_incomplete(python_folder, qls_path, tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('MOCK_CODEQL_TIMEOUT_QUERIES', 'py/unused-import')
+    incomplete = set()
+    result = codeql_sharded.run_sharded_analysis(python_folder, str(tmp_path / 'staging'), str(tmp_path / 'dbs'),
+                                                 qls_path, shards=3, incomplete=incomplete)
+    assert result != -1
+    assert incomplete == {python_folder}
+    assert 'Analysis incomplete (3 of 3 shards)' in capsys.readouterr().out
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import os
+
+import numpy as np
+
+import codeql_analyze
+import codeql_sarif
+import defect_labels
+
+
+def test_sarif_labels_equal_csv_labels(python_folder, qls_path, tmp_path, monkeypatch):
+    monkeypatch.setenv('MOCK_CODEQL_ALERTS', '2')
+    codeql_analyze.run_codeql_analysis(python_folder, str(tmp_path / 'db'), qls_path)
+    file_order = codeql_analyze.list_python_files(python_folder)
+    labels, (rows, cols, counts), rules = defect_labels.vectorize_results(
+        os.path.join(python_folder, 'codeql_analysis_results.csv'), file_order)
+    csv_hits = np.zeros((len(file_order), len(rules)), dtype=np.int32)
+    csv_hits[rows, cols] = counts
+
+    sarif_order, sarif_labels, sarif_hits, sarif_rules = codeql_sarif.run_sarif_analysis(
+        python_folder, str(tmp_path / 'db'), qls_path)
+    assert sarif_order == file_order
+    assert sarif_rules == rules
+    assert np.array_equal(sarif_labels, labels)
+    assert np.array_equal(sarif_hits, csv_hits)
+
+
+def test_sarif_stream_survives_small_chunks(python_folder, qls_path, tmp_path):
+    codeql_sarif.run_sarif_analysis(python_folder, str(tmp_path / 'db'), qls_path)
+    sarif_path = os.path.join(python_folder, 'codeql_analysis_results.sarif')
+    expected = list(codeql_sarif.iter_sarif_results(sarif_path))
+    assert expected
+    assert list(codeql_sarif.iter_sarif_results(sarif_path, chunk_size=7)) == expected
+
+
+def test_labels_are_written_on_a_cache_hit(python_folder, qls_path, tmp_path, capsys):
+    cache_path = str(tmp_path / 'rollup.json')
+    codeql_analyze.run_codeql_analysis(python_folder, str(tmp_path / 'db'), qls_path, cache_path=cache_path)
+    labels_path = os.path.join(python_folder, 'lists.npy')
+    assert not os.path.exists(labels_path)
+
+    codeql_analyze.run_codeql_analysis(python_folder, str(tmp_path / 'db'), qls_path, cache_path=cache_path,
+                                       write_labels=True)
+    assert 'unchanged since the last analysis' in capsys.readouterr().out
+    assert np.load(labels_path).shape == (6,)
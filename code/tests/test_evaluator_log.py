@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import csv
+import os
+
+import codeql_analyze
+
+
+def timings(python_folder):
+    with open(os.path.join(python_folder, 'codeql_query_timings.csv'), 'r', newline='', encoding='utf-8') as file:
+        return {row['path']: row for row in csv.DictReader(file)}
+
+
+def analyze(python_folder, qls_path, tmp_path):
+    return codeql_analyze.run_codeql_analysis(python_folder, str(tmp_path / 'db'), qls_path, evaluator_logs=True)
+
+
+def test_stale_log_is_not_reported(python_folder, qls_path, tmp_path, monkeypatch):
+    log_path = os.path.join(python_folder, 'codeql_evaluator_log.json')
+    with open(log_path, 'w', encoding='utf-8') as file:
+        file.write('{"type": "QUERY_STARTED", "queryName": "stale.ql"}\n')
+    monkeypatch.setenv('MOCK_CODEQL_FAIL', 'analyze')
+    assert analyze(python_folder, qls_path, tmp_path) == -1
+    assert not os.path.exists(log_path)
+    assert not os.path.exists(os.path.join(python_folder, 'codeql_query_timings.csv'))
+
+
+def test_slow_query_within_the_timeout_is_completed(python_folder, qls_path, tmp_path, monkeypatch):
+    monkeypatch.setenv('MOCK_CODEQL_QUERY_MILLIS', 'py/unused-import=25000')
+    analyze(python_folder, qls_path, tmp_path)
+    rows = timings(python_folder)
+    assert len(rows) == 5
+    assert rows['py/unused-import']['millis'] == '25000'
+    assert all(row['timed_out'] == '0' for row in rows.values())
+
+
+def test_timed_out_query_is_flagged(python_folder, qls_path, tmp_path, monkeypatch):
+    monkeypatch.setenv('MOCK_CODEQL_QUERY_MILLIS', 'py/unused-import=30000')
+    result = analyze(python_folder, qls_path, tmp_path)
+    assert result != -1
+    rows = timings(python_folder)
+    assert [query for query, row in rows.items() if row['timed_out'] == '1'] == ['py/unused-import']
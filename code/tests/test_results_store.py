@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+
+import results_store
+from records import write_csv_rows
+
+
+def write_results(folder, rules):
+    os.makedirs(folder, exist_ok=True)
+    write_csv_rows(os.path.join(folder, 'codeql_analysis_results.csv'),
+                   [[rule, 'd', 'warning', 'm', f"/{i}_0_2_x.py", '3', '1', '3', '9'] for i, rule in enumerate(rules)])
+
+
+def alert_groups(db_path):
+    connection = results_store.open_store(db_path)
+    counts = dict(connection.execute("SELECT tool || '/' || grp, COUNT(*) FROM alerts GROUP BY tool, grp"))
+    sources = connection.execute('SELECT COUNT(*) FROM sources').fetchone()[0]
+    connection.close()
+    return counts, sources
+
+
+def test_ingestion_is_incremental_and_drops_deleted_csvs(tmp_path):
+    root = tmp_path / 'generate'
+    db_path = str(tmp_path / 'results.db')
+    write_results(root / 'Claude' / 'raw', ['Unused import', 'Empty except'])
+    write_results(root / 'Claude' / 'fix', ['Unused import'])
+    assert results_store.ingest_tree(str(root), db_path) == (2, 0)
+    assert results_store.ingest_tree(str(root), db_path) == (0, 2)
+    assert alert_groups(db_path) == ({'Claude/fix': 1, 'Claude/raw': 2}, 2)
+
+    connection = results_store.open_store(db_path)
+    assert results_store.rules_only_in(connection, 'Claude', 'raw', 'fix') == [('Empty except', 1)]
+    connection.close()
+
+    shutil.rmtree(root / 'Claude' / 'fix')
+    assert results_store.ingest_tree(str(root), db_path) == (0, 1)
+    assert alert_groups(db_path) == ({'Claude/raw': 2}, 1)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+import os
+
+import codeql_analyze
+import rollup_cache
+
+
+def test_rollup_recomputes_changed_files_only(tmp_path):
+    for folder, name, lines in (('a', 'x.py', 2), ('a', 'y.py', 3), ('b', 'z.py', 4)):
+        os.makedirs(tmp_path / folder, exist_ok=True)
+        (tmp_path / folder / name).write_text('pass\n' * lines, encoding='utf-8')
+    processed = []
+
+    def count_lines(path):
+        processed.append(os.path.basename(path))
+        with open(path, 'r', encoding='utf-8') as file:
+            return (sum(1 for _ in file), 1)
+
+    cache = {}
+    _, totals = rollup_cache.rollup(str(tmp_path), count_lines, cache)
+    assert totals == [9, 3] and sorted(processed) == ['x.py', 'y.py', 'z.py']
+
+    processed.clear()
+    assert rollup_cache.rollup(str(tmp_path), count_lines, cache)[1] == [9, 3]
+    assert processed == []
+
+    (tmp_path / 'a' / 'y.py').write_text('pass\n' * 10, encoding='utf-8')
+    assert rollup_cache.rollup(str(tmp_path), count_lines, cache)[1] == [16, 3]
+    assert processed == ['y.py']
+    assert dict(rollup_cache.file_values(cache, str(tmp_path / 'a'))) == {
+        os.path.join(str(tmp_path / 'a'), 'x.py'): [2, 1], os.path.join(str(tmp_path / 'a'), 'y.py'): [10, 1]}
+
+
+def test_suite_digest_follows_query_and_pack_edits(tmp_path):
+    pack = tmp_path / 'pack'
+    pack.mkdir()
+    (pack / 'qlpack.yml').write_text('name: test/queries\n', encoding='utf-8')
+    (pack / 'a.ql').write_text('/** @id test/a */\nselect 1\n', encoding='utf-8')
+    qls_path = str(pack / 'suite.qls')
+    with open(qls_path, 'w', encoding='utf-8') as file:
+        file.write('- description: Test suite\n')
+
+    first = codeql_analyze.suite_digest(qls_path)
+    assert codeql_analyze.suite_digest(qls_path) == first
+    (pack / 'a.ql').write_text('/** @id test/a */\nselect 2\n', encoding='utf-8')
+    second = codeql_analyze.suite_digest(qls_path)
+    assert second != first
+    (pack / 'qlpack.yml').write_text('name: test/queries\nversion: 1.0.1\n', encoding='utf-8')
+    assert codeql_analyze.suite_digest(qls_path) not in (first, second)
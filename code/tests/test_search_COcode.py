@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+import search_COcode
+from records import CommentTable
+
+SOURCES = {
+    'a/1_0_2_x.py': '# result = compute(value)\n# This explains the next line\nvalue = 1\n',
+    'a/b/2_0_2_x.py': '# for item in items:\n#     print(item)\nitems = []\n',
+    '3_0_2_x.py': '# Only a plain sentence here\npass\n',
+}
+
+
+def write_sources(root):
+    for relative, code in SOURCES.items():
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(code, encoding='utf-8')
+
+
+def table_rows(table):
+    return sorted(table.row(index) for index in range(len(table)))
+
+
+def test_cached_scan_fills_the_table_like_a_full_scan(tmp_path):
+    root = tmp_path / 'src'
+    write_sources(root)
+    full = CommentTable()
+    totals = search_COcode.process_directory(str(root), table=full)
+    assert len(full) == 3 and totals[2] > 0
+
+    for _ in range(2):
+        cached = CommentTable()
+        assert search_COcode.process_directory(str(root), cache_path=str(tmp_path / 'cache.json'),
+                                               table=cached) == totals
+        assert table_rows(cached) == table_rows(full)
+
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+import suite_builder
+
+
+def write_queries(folder, names):
+    folder.mkdir()
+    for name in names:
+        (folder / f"{name}.ql").write_text(f"/**\n * @name {name.title()}\n * @id py/{name}\n */\nselect 1\n",
+                                           encoding='utf-8')
+    qls_path = folder / 'suite.qls'
+    qls_path.write_text('- description: Calibration suite\n', encoding='utf-8')
+    return str(qls_path)
+
+
+def test_timed_out_queries_stay_in_the_fast_suite(python_folder, tmp_path, monkeypatch):
+    qls_path = write_queries(tmp_path / 'queries', ['alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta'])
+    monkeypatch.setenv('MOCK_CODEQL_TIMEOUT_QUERIES', 'py/zeta')
+    profile = suite_builder.profile_suite(python_folder, str(tmp_path / 'db'), qls_path, str(tmp_path / 'cache'))
+    by_id = {entry['id']: entry for entry in profile}
+    assert by_id['py/zeta']['timed_out'] and by_id['py/zeta']['hits'] == 0
+    assert any(entry['hits'] for entry in profile)
+
+    selected = {entry['id'] for entry in suite_builder.select_fast_queries(profile)}
+    assert 'py/zeta' in selected
+    assert selected == {entry['id'] for entry in profile if entry['hits'] or entry['timed_out']}